@@ -1,6 +1,11 @@
 #! /bin/bash
 set -e
 export MPLBACKEND=Agg
-python act.py
-python act.py vax
-python act_vax.py
+
+# Keep numpy, scipy, matplotlib etc imported between runs, see worker.py:
+python worker.py start
+trap 'python worker.py stop' EXIT
+
+# Both runs, in parallel and sharing downloaded data. See reff.py:
+python worker.py run reff.py act
+python worker.py run act_vax.py
@@ -5,6 +5,8 @@ import matplotlib.units as munits
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 
+import svgmin
+
 converter = mdates.ConciseDateConverter()
 
 munits.registry[np.datetime64] = converter
@@ -112,6 +114,6 @@ plt.title(f"{STATE} cumulative vaccinations per capita")
 
 plt.tight_layout()
 
-plt.savefig("COVID_ACT_projected_doses.svg")
+svgmin.savefig(plt, "COVID_ACT_projected_doses.svg")
 plt.savefig("COVID_ACT_projected_doses.png", dpi=133)
 plt.show()
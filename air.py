@@ -0,0 +1,163 @@
+# Local store of Australian Immunisation Register (AIR) vaccination counts by age band
+# and dose, from Ken Tsang's air.json, with covidbase data (see convert_covidbase_data.py)
+# for dates before it starts. Rather than downloading, parsing and merging the whole
+# history every run, we keep it as arrays in .npy files, which are memory-mapped when
+# loaded, and each update appends only the rows added to air.json since the last one.
+#
+# air.json is a JSON array with new rows appended at the end. We remember the byte offset
+# of the end of the last row we ingested and the bytes just before it, and each update
+# asks for the file from a little before that offset with a range request. If those bytes
+# are unchanged, everything after them is new rows. If not, or if the server doesn't
+# honour the range request, or if the store is more than a week old (since revisions
+# further back wouldn't be detected), we do a full refresh instead.
+#
+# Usage:
+#
+#     dates, counts = air.dose_counts()
+#     counts[:, :, coverage_cube.FIRST]  # Cumulative first doses by date and age band
+#
+# counts is as returned by coverage_cube.build(), for the age bands in
+# coverage_cube.AGE_BANDS.
+
+import json
+import datetime
+import urllib.error
+from pathlib import Path
+
+import numpy as np
+
+import prefetch
+import coverage_cube
+
+AIR_JSON = "https://vaccinedata.covid19nearme.com.au/data/air.json"
+COVIDBASE_FILE = Path('covidbase_data.npz')
+
+# Use covidbase data prior to this date and AIR data thereafter:
+AIR_START_DATE = np.datetime64('2021-06-30')
+
+STORE_DIR = Path('.cache', 'air')
+FULL_REFRESH_INTERVAL = 7  # days
+TAIL_BYTES = 256
+
+
+def _end_of_rows(data):
+    """Offset of the end of the last row of the JSON array in data, which is before any
+    whitespace preceding the closing bracket, since appending a row may change that"""
+    end = data.rfind(b']')
+    if end == -1:
+        raise ValueError("air.json is not a JSON array")
+    return len(data[:end].rstrip())
+
+
+def _load_covidbase(path=COVIDBASE_FILE):
+    """Return dates and counts from covidbase_data.npz, as written by
+    convert_covidbase_data.py"""
+    with np.load(path) as data:
+        if list(data['bands']) != coverage_cube.AGE_BANDS:
+            raise ValueError(f"{path} has different age bands to coverage_cube")
+        return data['dates'], data['counts']
+
+
+def _full_refresh():
+    print("AIR: full refresh")
+    data = prefetch.fetch(AIR_JSON)
+    dates, counts = coverage_cube.build(json.loads(data))
+    covidbase_dates, covidbase_counts = _load_covidbase()
+    before_AIR = covidbase_dates < AIR_START_DATE
+    dates = np.concatenate([dates, covidbase_dates[before_AIR]])
+    counts = np.concatenate([counts, covidbase_counts[before_AIR]])
+    order = np.argsort(dates, kind='stable')
+    dates, counts = dates[order], counts[order]
+    end = _end_of_rows(data)
+    meta = {
+        'refreshed': str(np.datetime64(datetime.datetime.utcnow(), 'D')),
+        'offset': end,
+        'tail': data[max(end - TAIL_BYTES, 0) : end].hex(),
+    }
+    return dates, counts, meta
+
+
+def _update(store):
+    """Append any new rows in air.json to the store. Return the updated store, the same
+    store if there are no new rows, or None if a full refresh is needed"""
+    dates, counts, meta = store
+    today = np.datetime64(datetime.datetime.utcnow(), 'D')
+    if today - np.datetime64(meta['refreshed']) >= FULL_REFRESH_INTERVAL:
+        return None
+    tail = bytes.fromhex(meta['tail'])
+    start = meta['offset'] - len(tail)
+    try:
+        data = prefetch.fetch(AIR_JSON, headers={'Range': f'bytes={start}-'})
+    except urllib.error.HTTPError as e:
+        # Range not satisfiable, because the file has shrunk:
+        if e.code == 416:
+            return None
+        raise
+
+    # Check what we already have hasn't changed, which also catches the server ignoring
+    # the range request and sending the whole file:
+    if not data.startswith(tail):
+        print("AIR: existing data has changed")
+        return None
+    new = data[len(tail) : _end_of_rows(data)].strip()
+    if not new:
+        print("AIR: no new rows")
+        return store
+    if not new.startswith(b','):
+        return None
+    new_dates, new_counts = coverage_cube.build(json.loads(b'[' + new[1:] + b']'))
+    if new_dates[0] <= dates[-1]:
+        print("AIR: new rows aren't after existing ones")
+        return None
+
+    print(f"AIR: appending {len(new_dates)} row(s)")
+    end = start + _end_of_rows(data)
+    data = data[: end - start]
+    meta = dict(meta, offset=end, tail=data[-TAIL_BYTES:].hex())
+    dates = np.concatenate([dates, new_dates])
+    counts = np.concatenate([counts, new_counts])
+    return dates, counts, meta
+
+
+def _load_store():
+    try:
+        meta = json.loads((STORE_DIR / 'meta.json').read_text())
+        dates = np.load(STORE_DIR / 'dates.npy', mmap_mode='r')
+        counts = np.load(STORE_DIR / 'counts.npy', mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if meta.get('bands') != coverage_cube.AGE_BANDS:
+        return None
+    return dates, counts, meta
+
+
+def _save_store(dates, counts, meta):
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    # Write to temporary files and rename, so a reader never sees a partial file. Readers
+    # with the old files memory-mapped keep seeing the old ones:
+    for name, array in [('dates', dates), ('counts', counts)]:
+        tmp = STORE_DIR / f'{name}.tmp.npy'
+        np.save(tmp, array)
+        tmp.replace(STORE_DIR / f'{name}.npy')
+    tmp = STORE_DIR / 'meta.tmp.json'
+    tmp.write_text(json.dumps(dict(meta, bands=coverage_cube.AGE_BANDS), indent=4))
+    tmp.replace(STORE_DIR / 'meta.json')
+
+
+def dose_counts():
+    """Return (dates, counts), where counts is an (n_dates, n_age_bands, 2) array of
+    cumulative first and second doses, with NaN for second doses prior to
+    AIR_START_DATE"""
+    store = _load_store()
+    updated = None
+    if store is not None:
+        updated = _update(store)
+    if updated is None:
+        updated = _full_refresh()
+    # Only write the store if it changed:
+    if updated is not store:
+        _save_store(*updated)
+        # Memory-map what we just saved:
+        updated = _load_store()
+    dates, counts, _ = updated
+    return dates, counts
@@ -11,9 +11,14 @@ n_days = (today - start_date).days
 Path('nsw_animated').mkdir(exist_ok=True)
 Path('nsw_animated_linear').mkdir(exist_ok=True)
 
-for i in range(n_days + 1):
-    print(i)
-    check_call(['python', 'nsw.py', 'old', str(i)])
+# Keep numpy, scipy, matplotlib etc imported between runs, see worker.py:
+check_call(['python', 'worker.py', 'start'])
+try:
+    for i in range(n_days + 1):
+        print(i)
+        check_call(['python', 'worker.py', 'run', 'nsw.py', 'old', str(i)])
+finally:
+    check_call(['python', 'worker.py', 'stop'])
 
 DELAY = 3000
 for name in ['nsw_animated', 'nsw_animated_linear']:
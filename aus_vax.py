@@ -1,21 +1,35 @@
 import sys
+import io
 from datetime import datetime
 import json
-import requests
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.units as munits
 import matplotlib.dates as mdates
 import matplotlib.ticker as ticker
 from pathlib import Path
-from pytz import timezone
 import pandas as pd
 
+import air
+import covidlive
+import coverage_cube
+import figure_manifest
+import figure_pool
+import prefetch
+import svgmin
+import vax_supply
+
 converter = mdates.ConciseDateConverter()
 munits.registry[np.datetime64] = converter
 munits.registry[datetime.date] = converter
 munits.registry[datetime] = converter
 
+# The figures depend on the modules that compute what they plot as well as on this
+# script, so include their source in figure digests too:
+figure_manifest.use_script(
+    'aus_vax', __file__, vax_supply.__file__, coverage_cube.__file__, air.__file__
+)
+
 
 def n_day_average(data, n=14):
     ret = np.cumsum(data, dtype=float)
@@ -61,9 +75,11 @@ def exponential_smoothing(data, pts):
 
 
 def get_data():
-    COVIDLIVE = 'https://covidlive.com.au/covid-live.json'
     # PDFPARSER = "https://vaccinedata.covid19nearme.com.au/data/all.json"
-    covidlivedata = json.loads(requests.get(COVIDLIVE).content)
+    reports = covidlive.read_reports(
+        ['VACC_DOSE_CNT', 'VACC_GP_CNT', 'VACC_AGED_CARE_CNT'],
+        codes=['AUS', 'NSW', 'VIC', 'SA', 'WA', 'TAS', 'QLD', 'NT', 'ACT'],
+    )
     # pdfdata = json.loads(requests.get(PDFPARSER).content)[-1]
 
     START_DATE = np.datetime64('2021-02-21')
@@ -82,22 +98,21 @@ def get_data():
 
     # Get data before today from covidlive:
     # YESTERDAY = np.datetime64(datetime.now().strftime('%Y-%m-%d')) - 1
-    for report in covidlivedata:
-        date = np.datetime64(report['REPORT_DATE']) - 1
-        # if date == YESTERDAY:
-        #     continue
-        if report['VACC_DOSE_CNT'] is None:
-            continue
-        state = report['CODE']
-        doses = int(report['VACC_DOSE_CNT'])
-        if state != 'AUS' and report['VACC_GP_CNT'] is not None:
-            doses -= int(report['VACC_AGED_CARE_CNT']) + int(report['VACC_GP_CNT'])
-        doses_by_state[state].append((date, doses))
-
-    for state, data in doses_by_state.items():
-        data.sort()
-        dates, doses = [np.array(a) for a in zip(*data)]
-        doses_by_state[state] = dates[dates >= START_DATE], doses[dates >= START_DATE]
+    for state in doses_by_state:
+        report = reports[state]
+        dates = report['dates'] - 1
+        doses = report['VACC_DOSE_CNT']
+        if state != 'AUS':
+            # Exclude GP and aged care doses where they're reported:
+            doses = np.where(
+                np.isnan(report['VACC_GP_CNT']),
+                doses,
+                doses - (report['VACC_AGED_CARE_CNT'] + report['VACC_GP_CNT']),
+            )
+        valid = ~np.isnan(doses) & (dates >= START_DATE)
+        dates, doses = dates[valid], doses[valid]
+        order = np.lexsort((doses, dates))
+        doses_by_state[state] = dates[order], doses[order]
 
     # Truncate all to most recent date all jurisdictions have data for:
     valid_n_dates = min(len(d) for d, _ in doses_by_state.values())
@@ -210,7 +225,16 @@ pfizer_supply_data = """
 2021-09-05      7_238_190 + 500_000 + 4 * 1_125_000 + 1_000_000 + 1_000_000 + 200_000 + 500_000 # Regular, Moderna, and Singapore Pfizer
 """
 
-LONGPROJECT = False or 'project' in sys.argv
+# Which figures to plot: the default ones, those with axes spanning the whole projection
+# ('project'), or both ('both'), for which the data and simulation are shared:
+if 'both' in sys.argv:
+    HORIZONS = [False, True]
+else:
+    HORIZONS = ['project' in sys.argv]
+
+# Simulate many variations on the projection's assumptions about supply and uptake, and
+# show credible intervals for projected doses and the date of 80% 16+ coverage:
+SCENARIOS = 'scenarios' in sys.argv
 
 AZ_OS_supply_data = """
 2021-03-07      300_000
@@ -273,9 +297,6 @@ PFIZER_PROJECTED_SHIPMENTS= """ # In thousands per week
 2022-01-02 2000 + 600
 """
 
-PLOT_END_DATE = (
-    np.datetime64('2022-01-31') if LONGPROJECT else dates[-1] + 50 #np.datetime64('2021-05-31')
-)
 CUMULATIVE_YMAX = 35  # million
 DAILY_YMAX = 380
 
@@ -330,6 +351,7 @@ AZ_local_supply[-1] = AZ_MAX_DOSES
 
 # Estimated Pfizer supply.
 
+N_ACTUAL_PFIZER_SHIPMENTS = len(pfizer_supply)
 for d, p in zip(*unpack_data(PFIZER_PROJECTED_SHIPMENTS)):
     pfizer_supply_dates = np.append(pfizer_supply_dates, [d])
     pfizer_supply = np.append(pfizer_supply, [pfizer_supply[-1] + p * 1000])
@@ -340,10 +362,8 @@ AZ_shipments = np.diff(AZ_OS_suppy, prepend=0)
 AZ_production = np.diff(AZ_local_supply, prepend=0)
 
 if PROJECT:
-    if LONGPROJECT:
-        projection_end = np.datetime64('2022-01-31')
-    else:
-        projection_end = np.datetime64('2022-01-31')
+    # The same for all horizons, so one simulation serves them all:
+    projection_end = np.datetime64('2022-01-31')
     projection_dates = np.arange(dates[-1] + 1, projection_end)
     all_dates = np.concatenate((dates, projection_dates))
 else:
@@ -352,119 +372,64 @@ else:
 for d, p in zip(pfizer_supply_dates, pfizer_shipments):
     print(str(d), p / 1000)
 # Calculate vaccine utilisation:
-first_doses = np.zeros(len(all_dates), dtype=float)
-first_doses[: len(doses)] = doses
-first_doses[len(doses) :] = doses[-1]
-AZ_first_doses = np.zeros_like(first_doses)
-pfizer_first_doses = np.zeros_like(first_doses)
-AZ_second_doses = np.zeros_like(first_doses)
-pfizer_second_doses = np.zeros_like(first_doses)
-AZ_reserved = np.zeros_like(first_doses)
-pfizer_reserved = np.zeros_like(first_doses)
-AZ_available = np.zeros_like(first_doses)
-pfizer_available = np.zeros_like(first_doses)
-wasted = np.zeros_like(first_doses)
-
 tau_AZ = 77
 tau_pfizer = 25
 
-pfizer_available += pfizer_shipments[pfizer_supply_dates < dates[0]].sum()
-AZ_available += AZ_shipments[AZ_OS_supply_dates < dates[0]].sum()
-AZ_available += AZ_production[AZ_local_supply_dates < dates[0]].sum()
-
-
-for i, date in enumerate(all_dates):
-    if date in pfizer_supply_dates:
-        pfizer_lot = pfizer_shipments[pfizer_supply_dates == date][0]
-        if date < np.datetime64('2021-06-27'):
-            pfizer_available[i:] +=  0.5 * (1 - PFIZER_WASTAGE) * pfizer_lot
-            pfizer_reserved[i:] += 0.5 * (1 - PFIZER_WASTAGE) * pfizer_lot
-            wasted[i:] += PFIZER_WASTAGE * pfizer_lot
-        else:
-            outstanding_pfizer_second_doses = pfizer_first_doses[i] - pfizer_second_doses[i]
-            reserve_allocation = 0.4 * outstanding_pfizer_second_doses - pfizer_reserved[i]
-            pfizer_available[i:] += (1 - PFIZER_WASTAGE) * pfizer_lot - reserve_allocation
-            pfizer_reserved[i:] += reserve_allocation
-            wasted[i:] += PFIZER_WASTAGE * pfizer_lot
-
-    if date in AZ_OS_supply_dates:
-        AZ_lot = AZ_shipments[AZ_OS_supply_dates == date][0]
-        AZ_available[i:] += 0.5 * (1 - AZ_WASTAGE) * AZ_lot
-        AZ_reserved[i:] += 0.5 * (1 - AZ_WASTAGE) * AZ_lot
-        wasted[i:] += AZ_WASTAGE * AZ_lot
-    if date in AZ_local_supply_dates:
-        AZ_lot = AZ_production[AZ_local_supply_dates == date][0]
-        if date < np.datetime64('2021-04-11'):
-            AZ_available[i:] += 0.5 * (1 - AZ_WASTAGE) * AZ_lot
-            AZ_reserved[i:] += 0.5 * (1 - AZ_WASTAGE) * AZ_lot
-        else:
-            outstanding_AZ_second_doses = AZ_first_doses[i] - AZ_second_doses[i]
-            reserve_allocation = 0.66 * outstanding_AZ_second_doses - AZ_reserved[i]
-            AZ_available[i:] += (1 - AZ_WASTAGE) * AZ_lot - reserve_allocation
-            AZ_reserved[i:] += reserve_allocation
-            wasted[i:] += AZ_WASTAGE * AZ_lot
-            # Once we're finished our 5M local (plus 350k imported) AZ first doses, all
-            # remaining supply is reserved for 2nd doses:
-            if AZ_available[i] + AZ_first_doses[i] > MAX_AZ_ADMINISTERED:
-                excess = AZ_first_doses[i] + AZ_available[i] - MAX_AZ_ADMINISTERED
-                AZ_available[i:] -= excess
-                AZ_reserved[i:] += excess
-    if i == 0:
-        first_doses_today = first_doses[i]
-    elif i < len(dates):
-        first_doses_today = first_doses[i] - first_doses[i - 1]
-    if i < len(dates):
-        P = 2 # Pfizer preference factor
-        AZ_frac = AZ_available[i] / (AZ_available[i] + P * pfizer_available[i])
-        pfizer_frac = P * pfizer_available[i] / (AZ_available[i] + P * pfizer_available[i])
-
-        AZ_first_doses_today = AZ_frac * first_doses_today
-        pfizer_first_doses_today = pfizer_frac * first_doses_today
-    else:
-        # This is the assumption for projecting based on expected supply. That we use 5%
-        # of available doses each day on first doses. Since a dose will be reserved as
-        # well, this means we're always 10 days away from running out of vaccine at the
-        # current rate - which is approximately what we see in the data.
-        AZ_first_doses_today = 1 / 21 * AZ_available[i]
-        pfizer_first_doses_today = 1 / 21 * pfizer_available[i]
-
-        first_doses_today = AZ_first_doses_today + pfizer_first_doses_today
-        total_first_doses = AZ_first_doses[i] + pfizer_first_doses[i]
-        first_doses_today = max(
-            0, min(MAX_ELIGIBLE - total_first_doses, first_doses_today)
-        )
-        pfizer_first_doses_today = first_doses_today - AZ_first_doses_today
-        first_doses[i:] += first_doses_today
-
-    # AZ_frac = AZ_available[i] / (AZ_available[i] + pfizer_available[i])
-    # pfizer_frac = pfizer_available[i] / (AZ_available[i] + pfizer_available[i])
-
-    # AZ_first_doses_today = AZ_frac * first_doses_today
-    # pfizer_first_doses_today = pfizer_frac * first_doses_today
-
-    # Once we're finished our 8M local (plus 350k imported) AZ first doses, all
-    # remaining supply is reserved for 2nd doses:
-    # if AZ_first_doses[i] + AZ_first_doses_today > 8.35e6:
-    #     excess = AZ_first_doses[i] + AZ_first_doses_today - 8.35e6
-    #     AZ_first_doses_today -= excess
-    #     pfizer_first_doses_today += excess
-    #     AZ_reserved[i:] += AZ_available[i:]
-    #     AZ_available[i:] = 0
-
-    AZ_first_doses[i:] += AZ_first_doses_today
-    pfizer_first_doses[i:] += pfizer_first_doses_today
-
-    AZ_available[i:] -= AZ_first_doses_today
-    pfizer_available[i:] -= pfizer_first_doses_today
-
-    AZ_reserved[i + tau_AZ:] -= AZ_first_doses_today
-    pfizer_reserved[i + tau_pfizer:] -= pfizer_first_doses_today
-
-    first_doses[i + tau_AZ :] -= AZ_first_doses_today
-    first_doses[i + tau_pfizer :] -= pfizer_first_doses_today
-
-    AZ_second_doses[i + tau_AZ :] += AZ_first_doses_today
-    pfizer_second_doses[i + tau_pfizer :] += pfizer_first_doses_today
+supply_curves = vax_supply.simulate(
+    all_dates,
+    doses,
+    pfizer_supply=(pfizer_supply_dates, pfizer_shipments),
+    AZ_OS_supply=(AZ_OS_supply_dates, AZ_shipments),
+    AZ_local_supply=(AZ_local_supply_dates, AZ_production),
+    max_AZ_administered=MAX_AZ_ADMINISTERED,
+    max_eligible=MAX_ELIGIBLE,
+    pfizer_wastage=PFIZER_WASTAGE,
+    AZ_wastage=AZ_WASTAGE,
+    tau_pfizer=tau_pfizer,
+    tau_AZ=tau_AZ,
+    pfizer_preference=2,
+    daily_usage=1 / 21,
+)
+first_doses = supply_curves['first_doses']
+AZ_first_doses = supply_curves['AZ_first_doses']
+pfizer_first_doses = supply_curves['pfizer_first_doses']
+AZ_second_doses = supply_curves['AZ_second_doses']
+pfizer_second_doses = supply_curves['pfizer_second_doses']
+AZ_reserved = supply_curves['AZ_reserved']
+pfizer_reserved = supply_curves['pfizer_reserved']
+AZ_available = supply_curves['AZ_available']
+pfizer_available = supply_curves['pfizer_available']
+wasted = supply_curves['wasted']
+
+if SCENARIOS:
+    # Each scenario scales projected Pfizer/Moderna shipments by an overall factor and a
+    # factor for each week, has its own Pfizer preference factor and fraction of
+    # available doses used per day, and caps first doses at some fraction of the
+    # eligible population. The main projection assumes everyone eligible gets a first
+    # dose, so it tends to be at the optimistic end of the credible intervals:
+    N_SCENARIOS = 2000
+    CREDIBLE_INTERVAL = 90  # percent
+    rng = np.random.default_rng(0)
+    supply_factor = rng.lognormal(0, 0.15, (N_SCENARIOS, 1)) * rng.lognormal(
+        0, 0.2, (N_SCENARIOS, len(pfizer_shipments))
+    )
+    supply_factor[:, :N_ACTUAL_PFIZER_SHIPMENTS] = 1
+    scenario_curves = vax_supply.simulate(
+        all_dates,
+        doses,
+        pfizer_supply=(pfizer_supply_dates, supply_factor * pfizer_shipments),
+        AZ_OS_supply=(AZ_OS_supply_dates, AZ_shipments),
+        AZ_local_supply=(AZ_local_supply_dates, AZ_production),
+        max_AZ_administered=MAX_AZ_ADMINISTERED,
+        max_eligible=rng.uniform(0.8, 1, N_SCENARIOS) * MAX_ELIGIBLE,
+        pfizer_wastage=PFIZER_WASTAGE,
+        AZ_wastage=AZ_WASTAGE,
+        tau_pfizer=tau_pfizer,
+        tau_AZ=tau_AZ,
+        pfizer_preference=rng.lognormal(np.log(2), 0.35, N_SCENARIOS),
+        daily_usage=rng.uniform(1 / 28, 1 / 14, N_SCENARIOS),
+    )
+    CI_PERCENTILES = [50 - CREDIBLE_INTERVAL / 2, 50 + CREDIBLE_INTERVAL / 2]
 
 
 proj_doses = AZ_first_doses + AZ_second_doses + pfizer_first_doses + pfizer_second_doses
@@ -517,344 +482,113 @@ def diff_and_smooth(dat):
 # # Gaussian smooth 1 week:
 # nonreserved_rate = gaussian_smoothing(nonreserved_rate, 7)
 
-nonreserved_rate = diff_and_smooth(
+def projected_rate(administered):
+    """Smoothed daily doses from simulated cumulative doses administered, adjusted to
+    join on to the latest actual rate"""
+    rate = diff_and_smooth(administered)
+    # Smooth out any remaining discontinuity:
+    err = rate[len(dates) - 1] - smoothed_daily_doses[-1]
+    offset = err * np.exp(-(np.arange(50)) / 14)
+    rate[len(dates) - 1 : len(dates) + 49] -= offset
+    return rate
+
+nonreserved_rate = projected_rate(
     AZ_first_doses + AZ_second_doses + pfizer_first_doses + pfizer_second_doses
 )
-# Smooth out any remaining discontinuity:
-err = nonreserved_rate[len(dates) - 1] - smoothed_daily_doses[-1]
-offset = err * np.exp(-(np.arange(50)) / 14)
-nonreserved_rate[len(dates) - 1 : len(dates) + 49] -= offset
-
-def state_label(state):
-    if state == 'FED':
-        return 'GPs/fed. care'
-    else:
-        return f"{state.upper()} clinics"
 
 
-fig1 = plt.figure(figsize=(8, 6))
-
-cumsum = np.zeros(len(dates))
-colours = list(reversed([f'C{i}' for i in range(9)]))
-for i, state in enumerate(['NT', 'ACT', 'TAS', 'SA', 'WA', 'QLD', 'VIC', 'NSW', 'FED']):
-    doses = doses_by_state[state]
-    latest_doses = doses[-1]
-
-    plt.fill_between(
-        dates + 1,
-        cumsum / 1e6,
-        (cumsum + doses) / 1e6,
-        label=f'{state_label(state)} ({doses[-1] / 1000:.1f}k)',
-        step='pre',
-        color=colours[i],
-        linewidth=0,
+# Hash of the inputs to the dose and supply figures, so we can skip re-rendering them if
+# unchanged:
+def supply_digest(longproject):
+    return figure_manifest.figure_hash(
+        dates,
+        *doses_by_state.values(),
+        today=np.datetime64(datetime.now(), 'D'),
+        longproject=longproject,
+        scenarios=SCENARIOS,
     )
-    cumsum += doses
 
-if PROJECT:
-    plt.fill_between(
-        all_dates[len(dates) - 1 :] + 1,
-        (
-            doses_by_state['AUS'][-1]
-            + nonreserved_rate[len(dates) - 1 :].cumsum()
-        )
-        / 1e6,
-        # proj_doses[len(dates) - 1 :] / 1e6,
-        label='Projection',
-        step='post',
-        color='cyan',
-        alpha=0.5, linewidth=0,
-    )
 
-ax1 = plt.gca()
-
-plt.axis(
-    xmin=dates[0].astype(int) + 1,
-    xmax=PLOT_END_DATE,
-    ymin=0,
-    ymax=2*MAX_ELIGIBLE/1e6 if LONGPROJECT else CUMULATIVE_YMAX,
-)
+# Everything below up to the figures doesn't depend on the horizon the figures are
+# plotted to, so is computed once for both:
 
 latest_cumulative_doses = doses_by_state["AUS"][-1]
 
-if LONGPROJECT:
-    plt.title("Projected cumulative doses")
-else:
-    plt.title(f'AUS cumulative doses. Total to date: {latest_cumulative_doses/1e6:.2f}M')
-plt.ylabel('Cumulative doses (millions)')
-
-
-fig2 = plt.figure(figsize=(8, 6))
+if SCENARIOS:
+    scenario_administered = sum(
+        scenario_curves[name]
+        for name in [
+            'AZ_first_doses',
+            'AZ_second_doses',
+            'pfizer_first_doses',
+            'pfizer_second_doses',
+        ]
+    )
+    scenario_cumulative = doses_by_state['AUS'][-1] + np.array(
+        [projected_rate(a)[len(dates) - 1 :].cumsum() for a in scenario_administered]
+    )
+    cumulative_doses_CI = np.percentile(scenario_cumulative, CI_PERCENTILES, axis=0)
 
-cumsum = np.zeros(len(dates))
-colours = list(reversed([f'C{i}' for i in range(9)]))
-for i, state in enumerate(['NT', 'ACT', 'TAS', 'SA', 'WA', 'QLD', 'VIC', 'NSW', 'FED']):
+# 7-day average daily doses by administration channel:
+STATES_STACKED = ['NT', 'ACT', 'TAS', 'SA', 'WA', 'QLD', 'VIC', 'NSW', 'FED']
+smoothed_daily_doses_by_state = {}
+for state in STATES_STACKED:
     doses = doses_by_state[state]
     # smoothed_doses = gaussian_smoothing(np.diff(doses, prepend=0), 2).cumsum()
     # smoothed_doses = padded_gaussian_smoothing(np.diff(doses, prepend=0), 2).cumsum()
     smoothed_doses = n_day_average(np.diff(doses, prepend=0), 7).cumsum()
     smoothed_doses = gaussian_smoothing(np.diff(smoothed_doses, prepend=0), 1).cumsum()
-    daily_doses = np.diff(smoothed_doses, prepend=0)
-    latest_daily_doses = daily_doses[-1]
-
-    plt.fill_between(
-        dates + 1,
-        cumsum / 1e3,
-        (cumsum + daily_doses) / 1e3,
-        label=f'{state_label(state)} ({daily_doses[-1] / 1000:.1f}k/day)',
-        step='pre',
-        color=colours[i],
-        linewidth=0,
-    )
-    cumsum += daily_doses
-
-
-if PROJECT:
-    daily_proj_doses = np.diff(proj_doses, prepend=0)
-    plt.fill_between(
-        all_dates[len(dates) - 1 :] + 1,
-        nonreserved_rate[len(dates) - 1 :] / 1e3,
-        # gaussian_smoothing(daily_proj_doses / 1e3, 4)[len(dates) - 1 :],
-        # padded_gaussian_smoothing(daily_proj_doses / 1e3, 4)[len(dates) - 1 :],
-        label='Projection',
-        step='post',
-        color='cyan',
-        alpha=0.5,
-        linewidth=0,
-    )
-
-latest_daily_doses = cumsum[-1]
-
-if LONGPROJECT:
-    plt.title("Projected daily doses")
-else:
-    plt.title(
-        '7-day average daily doses by administration channel\n'
-        + f'Latest national rate: {latest_daily_doses / 1000:.1f}k/day'
-    )
-
-plt.ylabel('Daily doses (thousands)')
-
-plt.axis(
-    xmin=dates[0].astype(int) + 1,
-    xmax=PLOT_END_DATE,
-    ymin=0,
-    ymax=DAILY_YMAX,
-)
-plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(20))
-ax2 = plt.gca()
+    smoothed_daily_doses_by_state[state] = np.diff(smoothed_doses, prepend=0)
 
-
-if LONGPROJECT:
-    endindex = len(all_dates)
-else:
-    endindex = len(dates)
-    
-fig3 = plt.figure(figsize=(8, 6))
-cumsum = np.zeros(len(all_dates))
-for arr, label, colour in [
-    (AZ_first_doses + pfizer_first_doses, 'Administered first doses', 'C0'),
-    (AZ_available + pfizer_available, 'Available for first doses', 'C2'),
-    (AZ_second_doses + pfizer_second_doses, 'Administered second doses', 'C1'),
-    (AZ_reserved + pfizer_reserved, 'Reserved for second doses', 'C3'),
-    # (wasted, 'Wasted', 'C4'),
-]:
-    plt.fill_between(
-        all_dates[: endindex] + 1,
-        cumsum[: endindex] / 1e6,
-        (cumsum + arr)[: endindex] / 1e6,
-        label=f'{label} ({arr[len(dates)-1] / 1000:.0f}k)',
-        step='pre',
-        color=colour,
-        linewidth=0,
-    )
-    cumsum += arr
-
-used = AZ_first_doses[len(dates) - 1] + pfizer_first_doses[len(dates) - 1]
-unused = AZ_available[len(dates) - 1] + pfizer_available[len(dates) - 1]
-utilisation = 100 * used / (used + unused)
-plt.ylabel('Cumulative doses (millions)')
-plt.title(f"Estimated vaccine utilisation: first dose utilisation rate: {utilisation:.1f}%")
-plt.axis(
-    xmin=dates[0].astype(int) + 1,
-    xmax=PLOT_END_DATE,
-    ymin=0,
-    ymax=2*MAX_ELIGIBLE/1e6 if LONGPROJECT else CUMULATIVE_YMAX,
-)
-ax3 = plt.gca()
-
-
-fig4 = plt.figure(figsize=(8, 6))
-cumsum = np.zeros(len(all_dates))
-for arr, label, colour in [
-    (AZ_first_doses, 'AZ administered first doses', 'C0'),
-    (AZ_available, 'AZ available for first doses', 'C2'),
-    (AZ_second_doses, 'AZ administered second doses', 'C1'),
-    (AZ_reserved, 'AZ reserved for second doses', 'C3'),
-]:
-    plt.fill_between(
-        all_dates[: endindex] + 1,
-        cumsum[: endindex] / 1e6,
-        (cumsum + arr)[: endindex] / 1e6,
-        label=f'{label} ({arr[len(dates)-1] / 1000:.0f}k)',
-        step='pre',
-        color=colour,
-        linewidth=0,
-    )
-    cumsum += arr
-
-used = AZ_first_doses[len(dates) - 1]
-unused = AZ_available[len(dates) - 1]
-utilisation = 100 * used / (used + unused)
-plt.ylabel('Cumulative doses (millions)')
-plt.title(
-    f"Estimated AZ vaccine utilisation: first dose utilisation rate: {utilisation:.1f}%"
-)
-plt.axis(
-    xmin=dates[0].astype(int) + 1,
-    xmax=PLOT_END_DATE,
-    ymin=0,
-    ymax=2*MAX_ELIGIBLE/1e6 if LONGPROJECT else CUMULATIVE_YMAX,
-)
-ax4 = plt.gca()
-
-
-fig5 = plt.figure(figsize=(8, 6))
-cumsum = np.zeros(len(all_dates))
-for arr, label, colour in [
-    (pfizer_first_doses, 'Pfizer/Moderna administered first doses', 'C0'),
-    (pfizer_available, 'Pfizer/Moderna available for first doses', 'C2'),
-    (pfizer_second_doses, 'Pfizer/Moderna administered second doses', 'C1'),
-    (pfizer_reserved, 'Pfizer/Moderna reserved for second doses', 'C3'),
-]:
-    plt.fill_between(
-        all_dates[: endindex] + 1,
-        cumsum[: endindex] / 1e6,
-        (cumsum + arr)[: endindex] / 1e6,
-        label=f'{label} ({arr[len(dates)-1] / 1000:.0f}k)',
-        step='pre',
-        color=colour,
-        linewidth=0,
-    )
-    cumsum += arr
-
-used = pfizer_first_doses[len(dates) - 1]
-unused = pfizer_available[len(dates) - 1]
-utilisation = 100 * used / (used + unused)
-plt.ylabel('Cumulative doses (millions)')
-plt.title(
-    f"Estimated Pfizer/Moderna vaccine utilisation: first dose utilisation rate: {utilisation:.1f}%"
-)
-plt.axis(
-    xmin=dates[0].astype(int) + 1,
-    xmax=PLOT_END_DATE,
-    ymin=0,
-    ymax=2*MAX_ELIGIBLE/1e6 if LONGPROJECT else CUMULATIVE_YMAX,
-)
-ax5 = plt.gca()
-
-
-# Plot of projection by dose type
-fig6 = plt.figure(figsize=(8, 6))
-cumsum = np.zeros(len(all_dates))
-for doses, label in [
-    (pfizer_first_doses, "Pfizer/Moderna first doses"),
-    (pfizer_second_doses, "Pfizer/Moderna second doses"),
-    (AZ_first_doses, "AZ first doses"),
-    (AZ_second_doses, "AZ second doses"),
-]:
-    rate = diff_and_smooth(doses)
-    plt.fill_between(
-        all_dates + 1,
-        cumsum / 1e3,
-        (cumsum + rate) / 1e3,
-        label=label,
-        step='pre',
-        # color=colours[i],
-        linewidth=0,
-    )
-    cumsum += rate
-plt.axis(
-    xmin=dates[0].astype(int) + 1,
-    xmax=PLOT_END_DATE,
-    ymin=0,
-    ymax=DAILY_YMAX,
-)
-plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(20))
-plt.title('Projected daily doses by type')
-plt.ylabel('Daily doses (thousands)')
-today = np.datetime64(datetime.now(), 'D')
-plt.axvline(today, linestyle=":", color='k', label=f"Today ({today})")
-ax6 = plt.gca()
-
-
-# Plot of projection 1st vs 2nd doses
-fig7 = plt.figure(figsize=(8, 6))
+latest_daily_doses = sum(smoothed_daily_doses_by_state.values())[-1]
 
 proj_first_doses = diff_and_smooth(AZ_first_doses + pfizer_first_doses).cumsum()
 proj_second_doses = diff_and_smooth(AZ_second_doses + pfizer_second_doses).cumsum()
 
-plt.step(
-    all_dates + 1,
-    proj_first_doses / 1e6,
-    where='pre',
-    label="First doses",
-)
-plt.step(
-    all_dates + 1,
-    proj_second_doses / 1e6,
-    where='pre',
-    label="Second doses",
-)
-    
-# all_first_doses = diff_and_smooth(AZ_first_doses + pfizer_first_doses).cumsum()
-# all_second_doses = diff_and_smooth(AZ_second_doses + pfizer_second_doses).cumsum()
-# adult_first_dose_percent = 100 * all_first_doses / POP_16_PLUS
-# adult_second_dose_percent = 100 * all_second_doses / POP_16_PLUS
-# for i, date in enumerate(all_dates):
-#     print(
-#         date,
-#         f"first dose: {adult_first_dose_percent[i]:.02f}",
-#         f"second dose: {adult_second_dose_percent[i]:.02f}",
-#     )
-
-plt.axis(
-    xmin=dates[0].astype(int) + 1,
-    xmax=PLOT_END_DATE,
-    ymin=0,
-    ymax=MAX_ELIGIBLE/1e6 if LONGPROJECT else CUMULATIVE_YMAX,
-
-)
-plt.title('Projected cumulative 1st and 2nd doses')
-plt.ylabel('Cumulative doses (millions)')
-today = np.datetime64(datetime.now(), 'D')
-plt.axvline(today, linestyle=":", color='k', label=f"Today ({today})")
-plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(2.0))
-ax7 = plt.gca()
+if SCENARIOS:
+    scenario_second_doses = np.array(
+        [
+            diff_and_smooth(AZ_second + pfizer_second).cumsum()
+            for AZ_second, pfizer_second in zip(
+                scenario_curves['AZ_second_doses'],
+                scenario_curves['pfizer_second_doses'],
+            )
+        ]
+    )
+    second_doses_CI = np.percentile(scenario_second_doses, CI_PERCENTILES, axis=0)
 
 PHASE_B_DATE = all_dates[proj_second_doses.searchsorted(0.7 * POP_16_PLUS)] + 1
 PHASE_C_DATE = all_dates[proj_second_doses.searchsorted(0.8 * POP_16_PLUS)] + 1
+phase_C_label = f"Phase C 80% target ({PHASE_C_DATE})"
+if SCENARIOS:
+    # Index of the day each scenario reaches 80% coverage, which is len(all_dates) for
+    # scenarios that don't reach it by the end of the simulation:
+    phase_C_days = [
+        second.searchsorted(0.8 * POP_16_PLUS) for second in scenario_second_doses
+    ]
+    PHASE_C_INTERVAL = [
+        all_dates[0] + int(np.percentile(phase_C_days, p, method='nearest')) + 1
+        for p in CI_PERCENTILES
+    ]
+    interval = " to ".join(
+        str(d) if d <= all_dates[-1] + 1 else f"after {all_dates[-1] + 1}"
+        for d in PHASE_C_INTERVAL
+    )
+    phase_C_label = (
+        f"Phase C 80% target ({PHASE_C_DATE}, {CREDIBLE_INTERVAL}% CI {interval})"
+    )
 
-plt.axhline(
-    0.7 * POP_16_PLUS / 1e6,
-    linestyle="--",
-    color='C4',
-    label=f"Phase B 70% target ({PHASE_B_DATE})",
-)
-plt.axhline(
-    0.8 * POP_16_PLUS / 1e6,
-    linestyle="--",
-    color='C2',
-    label=f"Phase C 80% target ({PHASE_C_DATE})",
-)
+today = np.datetime64(datetime.now(), 'D')
 
-twinax = plt.twinx()
-twinax.axis(ymin=0, ymax=100 * MAX_ELIGIBLE / POP_16_PLUS)
-twinax.yaxis.set_major_locator(ticker.MultipleLocator(10.0))
-plt.ylabel("Percentage of population aged 16+")
+def state_label(state):
+    if state == 'FED':
+        return 'GPs/fed. care'
+    else:
+        return f"{state.upper()} clinics"
 
 
-for ax in [ax1, ax2, ax3, ax4, ax5, ax6, ax7]:
+def shade_phases(ax):
+    """Shade the rollout phases behind everything plotted on ax"""
     ax.fill_betweenx(
         [0, ax.get_ylim()[1]],
         2 * [dates[0].astype(int)],
@@ -911,37 +645,225 @@ for ax in [ax1, ax2, ax3, ax4, ax5, ax6, ax7]:
         )
 
 
-handles, labels = ax1.get_legend_handles_labels()
-if PROJECT:
-    order = [8, 7, 6, 5, 4, 3, 2, 1, 0, 9, 10, 11, 12, 13]
-else:
-    order = [8, 7, 6, 5, 4, 3, 2, 1, 0, 9, 10, 11, 12]
-ax1.legend(
-    [handles[idx] for idx in order],
-    [labels[idx] for idx in order],
-    loc='upper left',
-    # ncol=2,
-    fontsize="small"
-)
-ax1.yaxis.set_major_locator(ticker.MultipleLocator(5 if LONGPROJECT else 2))
+def format_dates(ax, longproject):
+    locator = mdates.DayLocator([1] if longproject else [1, 15])
+    formatter = mdates.ConciseDateFormatter(locator)
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(formatter)
+    ax.get_xaxis().get_major_formatter().show_offset = False
+    ax.grid(True, linestyle=":", color='k')
 
 
-handles, labels = ax2.get_legend_handles_labels()
-if PROJECT:
-    order = [8, 7, 6, 5, 4, 3, 2, 1, 0, 9, 10, 11, 12, 13]
-else:
-    order = [8, 7, 6, 5, 4, 3, 2, 1, 0, 9, 10, 11, 12]
-ax2.legend(
-    [handles[idx] for idx in order],
-    [labels[idx] for idx in order],
-    loc='upper left',
-    # ncol=2,
-    fontsize="small"
-)
+def get_plot_end_date(longproject):
+    return np.datetime64('2022-01-31') if longproject else dates[-1] + 50
+
+
+def plot_cumulative_doses(longproject):
+    fig1 = plt.figure(figsize=(8, 6))
+
+    cumsum = np.zeros(len(dates))
+    colours = list(reversed([f'C{i}' for i in range(9)]))
+    for i, state in enumerate(STATES_STACKED):
+        doses = doses_by_state[state]
+
+        plt.fill_between(
+            dates + 1,
+            cumsum / 1e6,
+            (cumsum + doses) / 1e6,
+            label=f'{state_label(state)} ({doses[-1] / 1000:.1f}k)',
+            step='pre',
+            color=colours[i],
+            linewidth=0,
+        )
+        cumsum += doses
+
+    if PROJECT:
+        plt.fill_between(
+            all_dates[len(dates) - 1 :] + 1,
+            (
+                doses_by_state['AUS'][-1]
+                + nonreserved_rate[len(dates) - 1 :].cumsum()
+            )
+            / 1e6,
+            # proj_doses[len(dates) - 1 :] / 1e6,
+            label='Projection',
+            step='post',
+            color='cyan',
+            alpha=0.5, linewidth=0,
+        )
+        if SCENARIOS:
+            lower, upper = cumulative_doses_CI
+            plt.fill_between(
+                all_dates[len(dates) - 1 :] + 1,
+                lower / 1e6,
+                upper / 1e6,
+                label=f'Projection {CREDIBLE_INTERVAL}% credible interval',
+                step='post',
+                color='darkcyan',
+                alpha=0.35,
+                linewidth=0,
+            )
+
+    ax1 = plt.gca()
+
+    plt.axis(
+        xmin=dates[0].astype(int) + 1,
+        xmax=get_plot_end_date(longproject),
+        ymin=0,
+        ymax=2*MAX_ELIGIBLE/1e6 if longproject else CUMULATIVE_YMAX,
+    )
+
+    if longproject:
+        plt.title("Projected cumulative doses")
+    else:
+        plt.title(f'AUS cumulative doses. Total to date: {latest_cumulative_doses/1e6:.2f}M')
+    plt.ylabel('Cumulative doses (millions)')
+
+    shade_phases(ax1)
+
+    handles, labels = ax1.get_legend_handles_labels()
+    if PROJECT and SCENARIOS:
+        order = [8, 7, 6, 5, 4, 3, 2, 1, 0, 9, 10, 11, 12, 13, 14]
+    elif PROJECT:
+        order = [8, 7, 6, 5, 4, 3, 2, 1, 0, 9, 10, 11, 12, 13]
+    else:
+        order = [8, 7, 6, 5, 4, 3, 2, 1, 0, 9, 10, 11, 12]
+    ax1.legend(
+        [handles[idx] for idx in order],
+        [labels[idx] for idx in order],
+        loc='upper left',
+        # ncol=2,
+        fontsize="small"
+    )
+    ax1.yaxis.set_major_locator(ticker.MultipleLocator(5 if longproject else 2))
+
+    format_dates(ax1, longproject)
+    return fig1
+
+
+def plot_daily_doses_by_state(longproject):
+    fig2 = plt.figure(figsize=(8, 6))
+
+    cumsum = np.zeros(len(dates))
+    colours = list(reversed([f'C{i}' for i in range(9)]))
+    for i, state in enumerate(STATES_STACKED):
+        daily_doses = smoothed_daily_doses_by_state[state]
+        plt.fill_between(
+            dates + 1,
+            cumsum / 1e3,
+            (cumsum + daily_doses) / 1e3,
+            label=f'{state_label(state)} ({daily_doses[-1] / 1000:.1f}k/day)',
+            step='pre',
+            color=colours[i],
+            linewidth=0,
+        )
+        cumsum += daily_doses
+
+
+    if PROJECT:
+        daily_proj_doses = np.diff(proj_doses, prepend=0)
+        plt.fill_between(
+            all_dates[len(dates) - 1 :] + 1,
+            nonreserved_rate[len(dates) - 1 :] / 1e3,
+            # gaussian_smoothing(daily_proj_doses / 1e3, 4)[len(dates) - 1 :],
+            # padded_gaussian_smoothing(daily_proj_doses / 1e3, 4)[len(dates) - 1 :],
+            label='Projection',
+            step='post',
+            color='cyan',
+            alpha=0.5,
+            linewidth=0,
+        )
+
+    if longproject:
+        plt.title("Projected daily doses")
+    else:
+        plt.title(
+            '7-day average daily doses by administration channel\n'
+            + f'Latest national rate: {latest_daily_doses / 1000:.1f}k/day'
+        )
+
+    plt.ylabel('Daily doses (thousands)')
+
+    plt.axis(
+        xmin=dates[0].astype(int) + 1,
+        xmax=get_plot_end_date(longproject),
+        ymin=0,
+        ymax=DAILY_YMAX,
+    )
+    plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(20))
+    ax2 = plt.gca()
+
+    shade_phases(ax2)
+
+    handles, labels = ax2.get_legend_handles_labels()
+    if PROJECT:
+        order = [8, 7, 6, 5, 4, 3, 2, 1, 0, 9, 10, 11, 12, 13]
+    else:
+        order = [8, 7, 6, 5, 4, 3, 2, 1, 0, 9, 10, 11, 12]
+    ax2.legend(
+        [handles[idx] for idx in order],
+        [labels[idx] for idx in order],
+        loc='upper left',
+        # ncol=2,
+        fontsize="small"
+    )
+
+    format_dates(ax2, longproject)
+    return fig2
+
+
+def plot_utilisation(first_doses, available, second_doses, reserved, vaccine, longproject):
+    """Plot cumulative first and second doses administered, and doses available for
+    first doses and reserved for second doses, of the named vaccine, or all vaccines if
+    vaccine is empty"""
+
+    def label(description):
+        return f'{vaccine} {description}' if vaccine else description.capitalize()
+
+    if longproject:
+        endindex = len(all_dates)
+    else:
+        endindex = len(dates)
+
+    fig = plt.figure(figsize=(8, 6))
+    cumsum = np.zeros(len(all_dates))
+    for arr, description, colour in [
+        (first_doses, 'administered first doses', 'C0'),
+        (available, 'available for first doses', 'C2'),
+        (second_doses, 'administered second doses', 'C1'),
+        (reserved, 'reserved for second doses', 'C3'),
+        # (wasted, 'wasted', 'C4'),
+    ]:
+        plt.fill_between(
+            all_dates[: endindex] + 1,
+            cumsum[: endindex] / 1e6,
+            (cumsum + arr)[: endindex] / 1e6,
+            label=f'{label(description)} ({arr[len(dates)-1] / 1000:.0f}k)',
+            step='pre',
+            color=colour,
+            linewidth=0,
+        )
+        cumsum += arr
+
+    used = first_doses[len(dates) - 1]
+    unused = available[len(dates) - 1]
+    utilisation = 100 * used / (used + unused)
+    plt.ylabel('Cumulative doses (millions)')
+    plt.title(
+        f"Estimated {vaccine + ' ' if vaccine else ''}vaccine utilisation: "
+        + f"first dose utilisation rate: {utilisation:.1f}%"
+    )
+    plt.axis(
+        xmin=dates[0].astype(int) + 1,
+        xmax=get_plot_end_date(longproject),
+        ymin=0,
+        ymax=2*MAX_ELIGIBLE/1e6 if longproject else CUMULATIVE_YMAX,
+    )
+    ax = plt.gca()
 
+    shade_phases(ax)
 
-for ax in [ax3, ax4, ax5]:
-    ax.yaxis.set_major_locator(ticker.MultipleLocator(5 if LONGPROJECT else 2))
+    ax.yaxis.set_major_locator(ticker.MultipleLocator(5 if longproject else 2))
     handles, labels = ax.get_legend_handles_labels()
     order = [3, 2, 1, 0, 4, 5, 6, 7]
     ax.legend(
@@ -952,56 +874,231 @@ for ax in [ax3, ax4, ax5]:
         fontsize="small"
     )
 
-handles, labels = ax6.get_legend_handles_labels()
-order = [1, 2, 3, 4, 5, 6, 7, 8, 0]
-ax6.legend(
-    [handles[idx] for idx in order],
-    [labels[idx] for idx in order],
-    loc='upper left',
-    # ncol=2,
-    fontsize="small"
-)
+    format_dates(ax, longproject)
+    return fig
+
+
+def plot_projection_by_type(longproject):
+    # Plot of projection by dose type
+    fig6 = plt.figure(figsize=(8, 6))
+    cumsum = np.zeros(len(all_dates))
+    for doses, label in [
+        (pfizer_first_doses, "Pfizer/Moderna first doses"),
+        (pfizer_second_doses, "Pfizer/Moderna second doses"),
+        (AZ_first_doses, "AZ first doses"),
+        (AZ_second_doses, "AZ second doses"),
+    ]:
+        rate = diff_and_smooth(doses)
+        plt.fill_between(
+            all_dates + 1,
+            cumsum / 1e3,
+            (cumsum + rate) / 1e3,
+            label=label,
+            step='pre',
+            # color=colours[i],
+            linewidth=0,
+        )
+        cumsum += rate
+    plt.axis(
+        xmin=dates[0].astype(int) + 1,
+        xmax=get_plot_end_date(longproject),
+        ymin=0,
+        ymax=DAILY_YMAX,
+    )
+    plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(20))
+    plt.title('Projected daily doses by type')
+    plt.ylabel('Daily doses (thousands)')
+    plt.axvline(today, linestyle=":", color='k', label=f"Today ({today})")
+    ax6 = plt.gca()
 
+    shade_phases(ax6)
 
-handles, labels = ax7.get_legend_handles_labels()
-order = [0, 1, 5, 6, 7, 8, 3, 4, 2]
-ax7.legend(
-    [handles[idx] for idx in order],
-    [labels[idx] for idx in order],
-    loc='lower right',
-    # ncol=2,
-    fontsize="small"
-)
+    handles, labels = ax6.get_legend_handles_labels()
+    order = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+    ax6.legend(
+        [handles[idx] for idx in order],
+        [labels[idx] for idx in order],
+        loc='upper left',
+        # ncol=2,
+        fontsize="small"
+    )
 
-for ax in [ax1, ax2, ax3, ax4, ax5, ax6, ax7]:
-    locator = mdates.DayLocator([1] if LONGPROJECT else [1, 15])
-    formatter = mdates.ConciseDateFormatter(locator)
-    ax.xaxis.set_major_locator(locator)
-    ax.xaxis.set_major_formatter(formatter)
-    ax.get_xaxis().get_major_formatter().show_offset = False
-    ax.grid(True, linestyle=":", color='k')
+    format_dates(ax6, longproject)
+    return fig6
 
 
-# Plot of doses by weekday
-fig8 = plt.figure(figsize=(8, 6))
-
-doses_by_day = np.diff(doses_by_state['AUS'])
-if len(doses_by_day) % 7:
-    doses_by_day = np.append(doses_by_day, [np.nan] * (7 - len(doses_by_day) % 7))
-N_WEEKS = 5
-days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-for i in reversed(range(N_WEEKS)):
-    start = len(doses_by_day) + (-N_WEEKS + i) * 7
-    block = doses_by_day[start : start + 7]
-    date = (dates[start] + 1).astype(datetime).strftime('%B %d')
-    plt.plot(days, block / 1e3, 'o-', label=f"Week beginning {date}",  zorder=i)
-plt.grid(True, linestyle=':', color='k', alpha=0.5)
-plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(20))
-# plt.gca().set_xticklabels()
-plt.legend()
-plt.ylabel('Daily doses (thousands)')
-plt.axis(ymin=0)
-plt.title('National daily doses by weekday')
+def plot_projection_cumulative_by_type(longproject):
+    # Plot of projection 1st vs 2nd doses
+    fig7 = plt.figure(figsize=(8, 6))
+
+    plt.step(
+        all_dates + 1,
+        proj_first_doses / 1e6,
+        where='pre',
+        label="First doses",
+    )
+    plt.step(
+        all_dates + 1,
+        proj_second_doses / 1e6,
+        where='pre',
+        label="Second doses",
+    )
+    if SCENARIOS:
+        lower, upper = second_doses_CI
+        plt.fill_between(
+            all_dates + 1,
+            lower / 1e6,
+            upper / 1e6,
+            label=f"Second doses {CREDIBLE_INTERVAL}% credible interval",
+            step='pre',
+            color='C1',
+            alpha=0.3,
+            linewidth=0,
+        )
+
+    # all_first_doses = diff_and_smooth(AZ_first_doses + pfizer_first_doses).cumsum()
+    # all_second_doses = diff_and_smooth(AZ_second_doses + pfizer_second_doses).cumsum()
+    # adult_first_dose_percent = 100 * all_first_doses / POP_16_PLUS
+    # adult_second_dose_percent = 100 * all_second_doses / POP_16_PLUS
+    # for i, date in enumerate(all_dates):
+    #     print(
+    #         date,
+    #         f"first dose: {adult_first_dose_percent[i]:.02f}",
+    #         f"second dose: {adult_second_dose_percent[i]:.02f}",
+    #     )
+
+    plt.axis(
+        xmin=dates[0].astype(int) + 1,
+        xmax=get_plot_end_date(longproject),
+        ymin=0,
+        ymax=MAX_ELIGIBLE/1e6 if longproject else CUMULATIVE_YMAX,
+
+    )
+    plt.title('Projected cumulative 1st and 2nd doses')
+    plt.ylabel('Cumulative doses (millions)')
+    plt.axvline(today, linestyle=":", color='k', label=f"Today ({today})")
+    plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(2.0))
+    ax7 = plt.gca()
+
+    plt.axhline(
+        0.7 * POP_16_PLUS / 1e6,
+        linestyle="--",
+        color='C4',
+        label=f"Phase B 70% target ({PHASE_B_DATE})",
+    )
+    plt.axhline(
+        0.8 * POP_16_PLUS / 1e6,
+        linestyle="--",
+        color='C2',
+        label=phase_C_label,
+    )
+
+    twinax = plt.twinx()
+    twinax.axis(ymin=0, ymax=100 * MAX_ELIGIBLE / POP_16_PLUS)
+    twinax.yaxis.set_major_locator(ticker.MultipleLocator(10.0))
+    plt.ylabel("Percentage of population aged 16+")
+
+    shade_phases(ax7)
+
+    handles, labels = ax7.get_legend_handles_labels()
+    if SCENARIOS:
+        order = [0, 1, 2, 6, 7, 8, 9, 4, 5, 3]
+    else:
+        order = [0, 1, 5, 6, 7, 8, 3, 4, 2]
+    ax7.legend(
+        [handles[idx] for idx in order],
+        [labels[idx] for idx in order],
+        loc='lower right',
+        # ncol=2,
+        fontsize="small"
+    )
+
+    format_dates(ax7, longproject)
+    return fig7
+
+
+def plot_doses_by_weekday():
+    # Plot of doses by weekday
+    fig8 = plt.figure(figsize=(8, 6))
+
+    doses_by_day = np.diff(doses_by_state['AUS'])
+    if len(doses_by_day) % 7:
+        doses_by_day = np.append(doses_by_day, [np.nan] * (7 - len(doses_by_day) % 7))
+    N_WEEKS = 5
+    days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    for i in reversed(range(N_WEEKS)):
+        start = len(doses_by_day) + (-N_WEEKS + i) * 7
+        block = doses_by_day[start : start + 7]
+        date = (dates[start] + 1).astype(datetime).strftime('%B %d')
+        plt.plot(days, block / 1e3, 'o-', label=f"Week beginning {date}",  zorder=i)
+    plt.grid(True, linestyle=':', color='k', alpha=0.5)
+    plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(20))
+    # plt.gca().set_xticklabels()
+    plt.legend()
+    plt.ylabel('Daily doses (thousands)')
+    plt.axis(ymin=0)
+    plt.title('National daily doses by weekday')
+    return fig8
+
+
+# Each figure is plotted and saved in a forked child process, as soon as the data it
+# needs is ready, while this process carries on getting the data for the rest:
+pool = figure_pool.FigurePool()
+
+for longproject in HORIZONS:
+    digest = supply_digest(longproject)
+    suffix = '_longproject' if longproject else ''
+    pool.submit(f'cumulative_doses{suffix}', digest, plot_cumulative_doses, longproject)
+    pool.submit(
+        f'daily_doses_by_state{suffix}', digest, plot_daily_doses_by_state, longproject
+    )
+    if longproject:
+        pool.submit('projection_by_type', digest, plot_projection_by_type, longproject)
+        pool.submit(
+            'projection_cumulative_by_type',
+            digest,
+            plot_projection_cumulative_by_type,
+            longproject,
+        )
+        continue
+    for name, vaccine, first_doses, available, second_doses, reserved in [
+        (
+            'utilisation',
+            '',
+            AZ_first_doses + pfizer_first_doses,
+            AZ_available + pfizer_available,
+            AZ_second_doses + pfizer_second_doses,
+            AZ_reserved + pfizer_reserved,
+        ),
+        (
+            'az_utilisation',
+            'AZ',
+            AZ_first_doses,
+            AZ_available,
+            AZ_second_doses,
+            AZ_reserved,
+        ),
+        (
+            'pfizer-moderna_utilisation',
+            'Pfizer/Moderna',
+            pfizer_first_doses,
+            pfizer_available,
+            pfizer_second_doses,
+            pfizer_reserved,
+        ),
+    ]:
+        pool.submit(
+            name,
+            digest,
+            plot_utilisation,
+            first_doses,
+            available,
+            second_doses,
+            reserved,
+            vaccine,
+            longproject,
+        )
+    pool.submit('doses_by_weekday', digest, plot_doses_by_weekday)
 
 
 # Plots of percent coverage by age group
@@ -1031,79 +1128,72 @@ POP_DATA = {
 for pops in POP_DATA.values():
     pops['TOTAL'] = pops['MALE'] + pops['FEMALE'] 
 
-AIR_JSON = "https://vaccinedata.covid19nearme.com.au/data/air.json"
-AIR_data = json.loads(requests.get(AIR_JSON).content)
-with open('covidbase_data.json') as f:
-    covidbase_data = json.load(f)
+# Merged covidbase (prior to June 30) and Ken Tsang's AIR data, from the local store,
+# updated with any new AIR data:
+coverage_dates, dose_counts = air.dose_counts()
+
+AGE_GROUPS = [
+    ['90_94', '95_PLUS'],
+    ['80_84', '85_89'],
+    ['70_74', '75_79'],
+    ['60_64', '65_69'],
+    ['50_54', '55_59'],
+    ['40_44', '45_49'],
+    ['30_34', '35_39'],
+    ['20_24', '25_29'],
+    ['16_19'],
+]
 
-# Convert dates in both datasets to np.datetime64:
-for row in AIR_data + covidbase_data:
-    row['DATE_AS_AT'] = np.datetime64(row['DATE_AS_AT'])
+labels_by_age = [
+    f'Ages {ranges[0].split("_")[0]}–{ranges[-1].split("_")[-1]}'
+    for ranges in AGE_GROUPS
+]
+labels_by_age[0] = 'Ages 90+'
 
-# Merge the datasets, using covidbase prior to June 30 and Ken Tsang's data thereafter:
-AIR_START_DATE = np.datetime64('2021-06-30')
+coverage_by_age = coverage_cube.group_coverage(
+    dose_counts,
+    AGE_GROUPS,
+    {age_range: pops['TOTAL'] for age_range, pops in POP_DATA.items()},
+)
+# covidbase data only has first doses:
+has_second_doses = coverage_dates >= air.AIR_START_DATE
 
-doses_by_age = AIR_data + [
-    row for row in covidbase_data if row['DATE_AS_AT'] < AIR_START_DATE
-]
-doses_by_age.sort(key=lambda x: x['DATE_AS_AT'])
+first_dose_coverage_dates = coverage_dates
+second_dose_coverage_dates = coverage_dates[has_second_doses]
+first_dose_coverage_by_age = list(
+    np.ascontiguousarray(coverage_by_age[:, :, coverage_cube.FIRST].T)
+)
+second_dose_coverage_by_age = list(
+    np.ascontiguousarray(coverage_by_age[has_second_doses, :, coverage_cube.SECOND].T)
+)
 
-first_dose_coverage_dates = np.array([row['DATE_AS_AT'] for row in doses_by_age])
-second_dose_coverage_dates = first_dose_coverage_dates[
-    first_dose_coverage_dates >= AIR_START_DATE
-]
+age_digest = figure_manifest.figure_hash(
+    first_dose_coverage_dates,
+    second_dose_coverage_dates,
+    *first_dose_coverage_by_age,
+    *second_dose_coverage_by_age,
+)
 
-labels_by_age = []
-first_dose_coverage_by_age = []
-second_dose_coverage_by_age = []
 
-for group_start in [16, 20, 30, 40, 50, 60, 70, 80, 90][::-1]:
-    if group_start == 16:
-        ranges = ['16_19']
-    elif group_start == 90:
-        ranges = ['90_94', '95_PLUS']
-    else:
-        ranges = [f'{group_start}_{group_start+4}', f'{group_start+5}_{group_start+9}']
-    first_dose_coverage = []
-    second_dose_coverage = []
-    for row in doses_by_age:
-        first_doses = 0
-        second_doses = 0
-        pop = 0
-        for age_range in ranges:
-            first_doses += row[f'AIR_{age_range}_FIRST_DOSE_COUNT']
-            if row['DATE_AS_AT'] >= AIR_START_DATE:
-                second_doses += row[f'AIR_{age_range}_SECOND_DOSE_COUNT']
-            pop += POP_DATA[age_range]['TOTAL']
-        first_dose_coverage.append(100 * first_doses / pop)
-        if row['DATE_AS_AT'] >= AIR_START_DATE:
-            second_dose_coverage.append(100 * second_doses / pop)
-    first_dose_coverage_by_age.append(np.array(first_dose_coverage))
-    second_dose_coverage_by_age.append(np.array(second_dose_coverage))
-    if group_start == 90:
-        label = 'Ages 90+'
-    else:
-        label = f'Ages {ranges[0].split("_")[0]}–{ranges[-1].split("_")[-1]}'
-    labels_by_age.append(label)
+def plot_coverage_by_age(dose_dates, dose_coverage_by_age, dose, legend_loc):
+    """Plot coverage by age group of the given dose, 'First' or 'Second'"""
+    fig = plt.figure(figsize=(8, 6))
+    for coverage, label in zip(dose_coverage_by_age, labels_by_age):
+        plt.plot(dose_dates, coverage, label=f"{label} ({coverage[-1]:.1f} %)")
 
-fig9 = plt.figure(figsize=(8, 6))
-for coverage, label in zip(first_dose_coverage_by_age, labels_by_age):
-    plt.plot(
-        first_dose_coverage_dates, coverage, label=f"{label} ({coverage[-1]:.1f} %)"
+    plt.legend(loc=legend_loc, prop={'size': 9})
+    plt.grid(True, linestyle=':', color='k', alpha=0.5)
+    locator = mdates.DayLocator([1, 15])
+    formatter = mdates.ConciseDateFormatter(locator)
+    plt.gca().xaxis.set_major_locator(locator)
+    plt.gca().xaxis.set_major_formatter(formatter)
+    plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(10))
+    plt.axis(
+        xmin=np.datetime64('2021-05-09'), xmax=np.datetime64('2022-01-01'), ymin=0, ymax=100
     )
-
-plt.legend(loc='upper right', prop={'size': 9})
-plt.grid(True, linestyle=':', color='k', alpha=0.5)
-locator = mdates.DayLocator([1, 15])
-formatter = mdates.ConciseDateFormatter(locator)
-plt.gca().xaxis.set_major_locator(locator)
-plt.gca().xaxis.set_major_formatter(formatter)
-plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(10))
-plt.axis(
-    xmin=np.datetime64('2021-05-09'), xmax=np.datetime64('2022-01-01'), ymin=0, ymax=100
-)
-plt.title("First dose coverage by age group")
-plt.ylabel("Vaccine coverage (%)")
+    plt.title(f"{dose} dose coverage by age group")
+    plt.ylabel("Vaccine coverage (%)")
+    return fig
 
 
 # import pickle
@@ -1114,71 +1204,69 @@ plt.ylabel("Vaccine coverage (%)")
 #     )
 
 
-fig10 = plt.figure(figsize=(8, 6))
-for coverage, label in zip(first_dose_coverage_by_age, labels_by_age):
-    smoothed_coverage = 7 * n_day_average(np.diff(coverage), 7)[7:]
-    smoothed_coverage = gaussian_smoothing(smoothed_coverage, 1)
-
-    plt.plot(
-        first_dose_coverage_dates[8:],
-        smoothed_coverage,
-        label=f"{label} ({smoothed_coverage[-1]:.1f} %/week)",
-    )
-plt.legend(loc='upper right', prop={'size': 9})
-plt.grid(True, linestyle=':', color='k', alpha=0.5)
-locator = mdates.DayLocator([1, 15])
-formatter = mdates.ConciseDateFormatter(locator)
-plt.gca().xaxis.set_major_locator(locator)
-plt.gca().xaxis.set_major_formatter(formatter)
-plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(1.0))
-plt.axis(
-    xmin=np.datetime64('2021-05-09'), xmax=np.datetime64('2022-01-01'), ymin=0, ymax=10
-)
-plt.title("First dose weekly increase by age group")
-plt.ylabel("Vaccination rate (% of age group / week)")
-
-fig11 = plt.figure(figsize=(8, 6))
-for coverage, label in zip(second_dose_coverage_by_age, labels_by_age):
-    plt.plot(
-        second_dose_coverage_dates, coverage, label=f"{label} ({coverage[-1]:.1f} %)"
+def plot_coverage_rate_by_age(dose_dates, dose_coverage_by_age, dose):
+    """Plot weekly increase in coverage by age group of the given dose, 'First' or
+    'Second'"""
+    fig = plt.figure(figsize=(8, 6))
+    for coverage, label in zip(dose_coverage_by_age, labels_by_age):
+        smoothed_coverage = 7 * n_day_average(np.diff(coverage), 7)[7:]
+        smoothed_coverage = gaussian_smoothing(smoothed_coverage, 1)
+        plt.plot(
+            dose_dates[8:],
+            smoothed_coverage,
+            label=f"{label} ({smoothed_coverage[-1]:.1f} %/week)",
+        )
+    plt.legend(loc='upper right', prop={'size': 9})
+    plt.grid(True, linestyle=':', color='k', alpha=0.5)
+    locator = mdates.DayLocator([1, 15])
+    formatter = mdates.ConciseDateFormatter(locator)
+    plt.gca().xaxis.set_major_locator(locator)
+    plt.gca().xaxis.set_major_formatter(formatter)
+    plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(1.0))
+    plt.axis(
+        xmin=np.datetime64('2021-05-09'), xmax=np.datetime64('2022-01-01'), ymin=0, ymax=10
     )
+    plt.title(f"{dose} dose weekly increase by age group")
+    plt.ylabel("Vaccination rate (% of age group / week)")
+    return fig
 
-plt.legend(loc='upper left', prop={'size': 9})
-plt.grid(True, linestyle=':', color='k', alpha=0.5)
-locator = mdates.DayLocator([1, 15])
-formatter = mdates.ConciseDateFormatter(locator)
-plt.gca().xaxis.set_major_locator(locator)
-plt.gca().xaxis.set_major_formatter(formatter)
-plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(10))
-plt.axis(
-    xmin=np.datetime64('2021-05-09'), xmax=np.datetime64('2022-01-01'), ymin=0, ymax=100
-)
-plt.title("Second dose coverage by age group")
-plt.ylabel("Vaccine coverage (%)")
-
-
-fig12 = plt.figure(figsize=(8, 6))
-for coverage, label in zip(second_dose_coverage_by_age, labels_by_age):
-    smoothed_coverage = 7 * n_day_average(np.diff(coverage), 7)[7:]
-    smoothed_coverage = gaussian_smoothing(smoothed_coverage, 1)
-    plt.plot(
-        second_dose_coverage_dates[8:],
-        smoothed_coverage,
-        label=f"{label} ({smoothed_coverage[-1]:.1f} %/week)",
-    )
-plt.legend(loc='upper right', prop={'size': 9})
-plt.grid(True, linestyle=':', color='k', alpha=0.5)
-locator = mdates.DayLocator([1, 15])
-formatter = mdates.ConciseDateFormatter(locator)
-plt.gca().xaxis.set_major_locator(locator)
-plt.gca().xaxis.set_major_formatter(formatter)
-plt.gca().yaxis.set_major_locator(ticker.MultipleLocator(1.0))
-plt.axis(
-    xmin=np.datetime64('2021-05-09'), xmax=np.datetime64('2022-01-01'), ymin=0, ymax=10
-)
-plt.title("Second dose weekly increase by age group")
-plt.ylabel("Vaccination rate (% of age group / week)")
 
+if False in HORIZONS:
+    for name, rate_name, dose_dates, dose_coverage_by_age, dose, legend_loc in [
+        (
+            'coverage_by_agegroup',
+            'coverage_rate_by_agegroup',
+            first_dose_coverage_dates,
+            first_dose_coverage_by_age,
+            'First',
+            'upper right',
+        ),
+        (
+            'coverage_2nd_by_agegroup',
+            'coverage_2nd_rate_by_agegroup',
+            second_dose_coverage_dates,
+            second_dose_coverage_by_age,
+            'Second',
+            'upper left',
+        ),
+    ]:
+        pool.submit(
+            name,
+            age_digest,
+            plot_coverage_by_age,
+            dose_dates,
+            dose_coverage_by_age,
+            dose,
+            legend_loc,
+        )
+        pool.submit(
+            rate_name,
+            age_digest,
+            plot_coverage_rate_by_age,
+            dose_dates,
+            dose_coverage_by_age,
+            dose,
+        )
 
 
 POPS_16_PLUS = {
@@ -1194,10 +1282,14 @@ POPS_16_PLUS = {
 }
 
 
-def first_and_second_by_state(state):
-    df = pd.read_html(
-        f"https://covidlive.com.au/report/daily-vaccinations-people/{state.lower()}"
-    )[1]
+# Number of covidlive pages to download at once:
+STATE_PAGE_WORKERS = 4
+
+
+def first_and_second_by_state(state, page):
+    """Parse dates and cumulative first and second doses from a state's covidlive daily
+    vaccinations page, as bytes"""
+    df = pd.read_html(io.StringIO(page.decode('utf8')))[1]
     first = np.array(df['FIRST'][::-1])
     second = np.array(df['SECOND'][::-1])
     dates = np.array(
@@ -1213,19 +1305,21 @@ def first_and_second_by_state(state):
     return dates, first, second
 
 
-fig13 = plt.figure(figsize=(8, 6))
-ax13 = plt.gca()
-
-fig14 = plt.figure(figsize=(8, 6))
-ax14 = plt.gca()
-
-fig15 = plt.figure(figsize=(8, 6))
-ax15 = plt.gca()
+# Download all the state pages concurrently, with retries, and parse each as it arrives:
+state_pages = {
+    state: f"https://covidlive.com.au/report/daily-vaccinations-people/{state.lower()}"
+    for state in POPS_16_PLUS
+}
+first_and_second = {}
+for state, page in prefetch.prefetch(state_pages, max_workers=STATE_PAGE_WORKERS):
+    first_and_second[state] = first_and_second_by_state(state, page)
 
-fig16 = plt.figure(figsize=(8, 6))
-ax16 = plt.gca()
+state_arrays = []
+coverage_by_state = {}
+latest_coverage_by_state = {}
 for state, pop in POPS_16_PLUS.items():
-    dates, first, second = first_and_second_by_state(state)
+    state_dates, first, second = first_and_second[state]
+    state_arrays.extend([state_dates, first, second])
     percent_first = 100 * first / pop
     percent_second = 100 * second / pop
 
@@ -1235,31 +1329,43 @@ for state, pop in POPS_16_PLUS.items():
     smoothed_first_rate = gaussian_smoothing(smoothed_first_rate, 1)
     smoothed_second_rate = gaussian_smoothing(smoothed_second_rate, 1)
 
-    label = 'National' if state == 'AUS' else state
+    coverage_by_state[state] = {
+        'dates': state_dates,
+        'first': percent_first,
+        'second': percent_second,
+        'first_rate': smoothed_first_rate,
+        'second_rate': smoothed_second_rate,
+    }
+    latest_coverage_by_state[state] = {
+        'first': percent_first[-1],
+        'second': percent_second[-1],
+    }
 
-    ax13.plot(
-        dates,
-        gaussian_smoothing(percent_first, 0.666),
-        label=f"{label} ({percent_first[-1]:.1f} %)",
-    )
-    ax14.plot(
-        dates,
-        gaussian_smoothing(percent_second, 0.666),
-        label=f"{label} ({percent_second[-1]:.1f} %)",
-    )
-    ax15.plot(
-        dates[7:],
-        smoothed_first_rate,
-        label=f"{label} ({smoothed_first_rate[-1]:.1f} %/week)",
-    )
-    ax16.plot(
-        dates[7:],
-        smoothed_second_rate,
-        label=f"{label} ({smoothed_second_rate[-1]:.1f} %/week)",
-    )
+state_digest = figure_manifest.figure_hash(*state_arrays)
+
+
+def plot_coverage_by_state(dose, rate_plot):
+    """Plot coverage by state of the given dose, 'first' or 'second', or its weekly
+    increase if rate_plot"""
+    fig = plt.figure(figsize=(8, 6))
+    ax = plt.gca()
+    for state, coverage in coverage_by_state.items():
+        label = 'National' if state == 'AUS' else state
+        if rate_plot:
+            rate = coverage[f'{dose}_rate']
+            ax.plot(
+                coverage['dates'][7:],
+                rate,
+                label=f"{label} ({rate[-1]:.1f} %/week)",
+            )
+        else:
+            percent = coverage[dose]
+            ax.plot(
+                coverage['dates'],
+                gaussian_smoothing(percent, 0.666),
+                label=f"{label} ({percent[-1]:.1f} %)",
+            )
 
-for ax in [ax13, ax14, ax15, ax16]:
-    rate_plot = ax in [ax15, ax16] 
     ax.legend(loc='upper right' if rate_plot else 'upper left', prop={'size': 9})
     ax.grid(True, linestyle=':', color='k', alpha=0.5)
     locator = mdates.DayLocator([1, 15])
@@ -1275,20 +1381,28 @@ for ax in [ax13, ax14, ax15, ax16]:
     )
     if rate_plot:
         ax.set_ylabel("Vaccination rate (% of 16+ population / week)")
+        ax.set_title(f"{dose.capitalize()} dose weekly increase by state/territory")
     else:
         ax.set_ylabel("Vaccine coverage (% of 16+ population)")
+        ax.set_title(f"{dose.capitalize()} dose coverage by state/territory")
+    return fig
 
 
-ax13.set_title("First dose coverage by state/territory")
-ax14.set_title("Second dose coverage by state/territory")
-ax15.set_title("First dose weekly increase by state/territory")
-ax16.set_title("Second dose weekly increase by state/territory")
-
+if False in HORIZONS:
+    for name, dose, rate_plot in [
+        ('coverage_by_state', 'first', False),
+        ('coverage_2nd_by_state', 'second', False),
+        ('coverage_rate_by_state', 'first', True),
+        ('coverage_2nd_rate_by_state', 'second', True),
+    ]:
+        pool.submit(name, state_digest, plot_coverage_by_state, dose, rate_plot)
 
 
 # Update the date in the HTML
 html_file = 'aus_vaccinations.html'
 html_lines = Path(html_file).read_text().splitlines()
+from pytz import timezone
+
 now = datetime.now(timezone('Australia/Melbourne')).strftime('%Y-%m-%d %H:%M')
 for i, line in enumerate(html_lines):
     if 'Last updated' in line:
@@ -1296,38 +1410,19 @@ for i, line in enumerate(html_lines):
 Path(html_file).write_text('\n'.join(html_lines) + '\n')
 
 # Save some deets to a file for the auto reddit posting to use:
+vax_stats = {
+    'latest_cumulative_doses': latest_cumulative_doses,
+    'latest_daily_doses': latest_daily_doses,
+    'phase_C_date': str(PHASE_C_DATE),
+    'today': str(today),
+    # Percent of 16+ population with first and second doses:
+    'coverage_by_state': latest_coverage_by_state,
+}
+if SCENARIOS:
+    vax_stats['phase_C_date_interval'] = [str(d) for d in PHASE_C_INTERVAL]
 with open("latest_vax_stats.json", 'w') as f:
-    json.dump(
-        {
-            'latest_cumulative_doses': latest_cumulative_doses,
-            'latest_daily_doses': latest_daily_doses,
-            'phase_C_date': str(PHASE_C_DATE),
-            'today': str(today),
-        },
-        f,
-        indent=4,
-    )
+    json.dump(vax_stats, f, indent=4)
 
-for extension in ['png', 'svg']:
-    if LONGPROJECT:
-        fig1.savefig(f'cumulative_doses_longproject.{extension}')
-        fig2.savefig(f'daily_doses_by_state_longproject.{extension}')
-        fig6.savefig(f'projection_by_type.{extension}')
-        fig7.savefig(f'projection_cumulative_by_type.{extension}')
-    else:
-        fig1.savefig(f'cumulative_doses.{extension}')
-        fig2.savefig(f'daily_doses_by_state.{extension}')
-        fig3.savefig(f'utilisation.{extension}')
-        fig4.savefig(f'az_utilisation.{extension}')
-        fig5.savefig(f'pfizer-moderna_utilisation.{extension}')
-        fig8.savefig(f'doses_by_weekday.{extension}')
-        fig9.savefig(f'coverage_by_agegroup.{extension}')
-        fig10.savefig(f'coverage_rate_by_agegroup.{extension}')
-        fig11.savefig(f'coverage_2nd_by_agegroup.{extension}')
-        fig12.savefig(f'coverage_2nd_rate_by_agegroup.{extension}')
-        fig13.savefig(f'coverage_by_state.{extension}')
-        fig14.savefig(f'coverage_2nd_by_state.{extension}')
-        fig15.savefig(f'coverage_rate_by_state.{extension}')
-        fig16.savefig(f'coverage_2nd_rate_by_state.{extension}')
-
-plt.show()
+pool.join()
+figure_manifest.report()
+svgmin.report()
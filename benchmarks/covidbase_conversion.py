@@ -0,0 +1,136 @@
+# Compare converting the covidbase spreadsheet and loading the result the way
+# convert_covidbase_data.py and aus_vax.py used to (a loop over df.iterrows() writing an
+# indented covidbase_data.json, loaded with json.load() and coverage_cube.build()), versus
+# convert_covidbase_data.convert() writing covidbase_data.npz, loaded by air.py. Checks
+# they get the same counts, and fails if either step is slower than it used to be.
+#
+# Usage:
+#
+#     python benchmarks/covidbase_conversion.py
+#
+# The spreadsheet is synthetic, with the same columns as the real one and a row per day.
+
+import io
+import sys
+import json
+import time
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import air
+import coverage_cube
+import convert_covidbase_data
+
+N_DATES = 365
+REPEATS = 3
+
+
+def synthetic_spreadsheet():
+    """Return CSV data like covidbase's, with cumulative percentages vaccinated for each
+    age band and sex, and a note row without a date, as the real one has"""
+    rng = np.random.default_rng(0)
+    dates = np.datetime64('2021-02-22') + np.arange(N_DATES)
+    columns = {'Date': [datetime.fromisoformat(str(d)).strftime('%d %b %y') for d in dates]}
+    for band in convert_covidbase_data.BANDS:
+        for sex in convert_covidbase_data.SEXES:
+            percent = np.minimum(np.cumsum(rng.uniform(0, 0.3, N_DATES)), 100)
+            columns[convert_covidbase_data._column(band, sex)] = [
+                f'{p:.1f}%' for p in percent
+            ]
+    df = pd.DataFrame(columns)
+    df['Total_%_Vaccinated'] = df.iloc[:, 1]
+    df.loc[len(df)] = {'Date': None}
+    return df.to_csv(index=False).encode()
+
+
+def convert_old(data, path):
+    POP_DATA = convert_covidbase_data.POP_DATA
+    df = pd.read_csv(io.StringIO(data.decode('utf8')))
+    processed_data = []
+    for i, row in df.iterrows():
+        date = row['Date']
+        if not isinstance(date, str):
+            continue
+        date = datetime.strptime(date, '%d %b %y')
+        date = np.datetime64(date, 'D')
+        if date < np.datetime64('2021-05-09'):
+            continue
+        data_for_date = {'DATE_AS_AT': str(date)}
+        for age_group in POP_DATA:
+            doses_in_age_group = 0
+            for sex in ['MALE', 'FEMALE']:
+                covidbase_sex = sex.capitalize()
+                covidbase_age_group = age_group.replace('_PLUS', '+').replace("_", '-')
+                covidase_column_name = f'{covidbase_sex}_{covidbase_age_group}_%_Vaccinated'
+                doses_percent = float(row[covidase_column_name].rstrip('%'))
+                pop = POP_DATA[age_group][sex]
+                doses = doses_percent * pop / 100.0
+                data_for_date[f'AIR_{age_group}_{sex}_PCT'] = doses_percent
+                doses_in_age_group += doses
+            total = POP_DATA[age_group]['MALE'] + POP_DATA[age_group]['FEMALE']
+            percent_in_age_group = 100 * doses_in_age_group / total
+            doses_in_age_group = int(round(doses_in_age_group))
+            percent_in_age_group = round(percent_in_age_group, 1)
+            data_for_date[f'AIR_{age_group}_FIRST_DOSE_COUNT'] = doses_in_age_group
+            data_for_date[f'AIR_{age_group}_FIRST_DOSE_PCT'] = percent_in_age_group
+        processed_data.append(data_for_date)
+
+    with open(path, 'w') as f:
+        json.dump(processed_data, f, indent=4)
+
+
+def convert_new(data, path):
+    df = pd.read_csv(io.BytesIO(data))
+    convert_covidbase_data.save(*convert_covidbase_data.convert(df), path=path)
+
+
+def load_old(path):
+    with open(path) as f:
+        return coverage_cube.build(json.load(f))
+
+
+def load_new(path):
+    return air._load_covidbase(path)
+
+
+def timed(function, *args):
+    """Return the result and the best of REPEATS run times"""
+    elapsed = []
+    for _ in range(REPEATS):
+        start_time = time.perf_counter()
+        result = function(*args)
+        elapsed.append(time.perf_counter() - start_time)
+    return result, min(elapsed)
+
+
+if __name__ == '__main__':
+    data = synthetic_spreadsheet()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_file = Path(tmpdir, 'covidbase_data.json')
+        npz_file = Path(tmpdir, 'covidbase_data.npz')
+        _, old_convert_time = timed(convert_old, data, json_file)
+        _, new_convert_time = timed(convert_new, data, npz_file)
+        (old_dates, old_counts), old_load_time = timed(load_old, json_file)
+        (new_dates, new_counts), new_load_time = timed(load_new, npz_file)
+        print(f"{len(new_dates)} dates")
+        print(f"  JSON: {json_file.stat().st_size / 1e3:6.0f} kB")
+        print(f"   npz: {npz_file.stat().st_size / 1e3:6.0f} kB")
+
+    assert np.array_equal(old_dates, new_dates)
+    assert np.array_equal(old_counts, new_counts, equal_nan=True)
+    print("            convert     load")
+    print(f"      old: {old_convert_time:7.4f} s {old_load_time:7.4f} s")
+    print(f"      new: {new_convert_time:7.4f} s {new_load_time:7.4f} s")
+    print(
+        f"    ratio: {old_convert_time / new_convert_time:7.1f} × "
+        f"{old_load_time / new_load_time:7.1f} ×"
+    )
+    if new_convert_time >= old_convert_time:
+        sys.exit("convert_covidbase_data.convert() is no longer faster than iterrows()")
+    if new_load_time >= old_load_time:
+        sys.exit("Loading covidbase_data.npz is no longer faster than the JSON")
@@ -0,0 +1,120 @@
+# Compare parse time and peak memory of reading covid-live.json the way aus_vax.py used
+# to (json.loads() of the whole download, then a loop over every report pulling out the
+# fields it needs), versus covidlive.read_reports() streaming it. Checks they get the
+# same numbers, and fails if the streaming parser uses more memory.
+#
+# Usage:
+#
+#     python benchmarks/covidlive_parse.py [covid-live.json]
+#
+# With no argument, a synthetic feed of similar size and shape to the real one is used.
+# A real one can be recorded with:
+#
+#     curl -o covid-live.json https://covidlive.com.au/covid-live.json
+
+import gc
+import sys
+import json
+import time
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import covidlive
+
+CODES = ['AUS', 'NSW', 'VIC', 'QLD', 'WA', 'SA', 'TAS', 'ACT', 'NT']
+FIELDS = ['VACC_DOSE_CNT', 'VACC_GP_CNT', 'VACC_AGED_CARE_CNT']
+N_DAYS = 650
+REPEATS = 3
+OTHER_FIELDS = [
+    'CASE_CNT', 'TEST_CNT', 'DEATH_CNT', 'RECOV_CNT', 'MED_ICU_CNT', 'MED_VENT_CNT',
+    'MED_HOSP_CNT', 'SRC_OVERSEAS_CNT', 'SRC_INTERSTATE_CNT', 'SRC_CONTACT_CNT',
+    'SRC_UNKNOWN_CNT', 'SRC_INVES_CNT', 'ACTIVE_CNT', 'NEW_CASE_CNT', 'VACC_DIST_CNT',
+    'VACC_PEOPLE_CNT', 'VACC_FIRST_DOSE_CNT', 'VACC_BOOSTER_CNT',
+]
+
+
+def synthetic_feed(path):
+    """Write a feed of N_DAYS reports per jurisdiction, newest first, each with the
+    fields of interest, and a current and previous value for a bunch of others"""
+    rng = np.random.default_rng(0)
+    reports = []
+    for day in reversed(range(N_DAYS)):
+        date = np.datetime64('2020-01-25') + day
+        for code in CODES:
+            report = {
+                'REPORT_DATE': str(date),
+                'LAST_UPDATED_DATE': str(date),
+                'CODE': code,
+                'NAME': f"{code} jurisdiction",
+            }
+            for field in OTHER_FIELDS + FIELDS:
+                value = int(rng.integers(0, 10_000_000)) if day > 300 else None
+                report[field] = value
+                report[f'PREV_{field}'] = value
+            reports.append(report)
+    path.write_text(json.dumps(reports))
+
+
+def parse_old(path):
+    covidlivedata = json.loads(path.read_bytes())
+    result = {}
+    for report in covidlivedata:
+        if report['CODE'] not in CODES:
+            continue
+        column = result.setdefault(report['CODE'], {'dates': []} | {f: [] for f in FIELDS})
+        column['dates'].append(np.datetime64(report['REPORT_DATE']))
+        for field in FIELDS:
+            column[field].append(report[field])
+    return result
+
+
+def parse_new(path):
+    return covidlive.read_reports(FIELDS, codes=CODES, json_file=path)
+
+
+def measure(parse, path):
+    """Return the result, the best of REPEATS run times, and peak memory, which is
+    measured in a separate run since tracing allocations slows things down a lot"""
+    elapsed = []
+    for _ in range(REPEATS):
+        gc.collect()
+        start_time = time.perf_counter()
+        result = parse(path)
+        elapsed.append(time.perf_counter() - start_time)
+    gc.collect()
+    tracemalloc.start()
+    parse(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, min(elapsed), peak
+
+
+def check(old, new):
+    for code, column in old.items():
+        order = np.argsort(np.array(column['dates']), kind='stable')
+        assert np.array_equal(np.array(column['dates'])[order], new[code]['dates'])
+        for field in FIELDS:
+            expected = np.array(column[field], dtype=float)[order]
+            assert np.array_equal(expected, new[code][field], equal_nan=True), field
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if len(sys.argv) > 1:
+            path = Path(sys.argv[1])
+        else:
+            path = Path(tmpdir, 'covid-live.json')
+            synthetic_feed(path)
+        print(f"{path}: {path.stat().st_size / 1e6:.1f} MB")
+        old, old_time, old_peak = measure(parse_old, path)
+        new, new_time, new_peak = measure(parse_new, path)
+    check(old, new)
+    print(f"     json.loads: {old_time:5.2f} s  {old_peak / 1e6:6.1f} MB peak")
+    print(f"      streaming: {new_time:5.2f} s  {new_peak / 1e6:6.1f} MB peak")
+    print(f"          ratio: {old_time / new_time:5.2f} ×  {old_peak / new_peak:6.1f} ×")
+    if new_peak >= old_peak:
+        sys.exit("covidlive.read_reports() no longer uses less memory than json.loads()")
@@ -0,0 +1,72 @@
+# Compare SVG size and render time of covid.py's projection styles: one translucent
+# line per scenario (the old way, still available with `python covid.py spaghetti`),
+# versus nested quantile bands. Uses synthetic exponential scenarios on a grid of panels
+# the same shape as COVID.svg, so doesn't need any downloads.
+
+import io
+import sys
+import time
+
+import numpy as np
+import matplotlib
+
+matplotlib.use('SVG')
+import matplotlib.pyplot as plt
+
+plt.rcParams['svg.fonttype'] = 'none'
+
+NUM_SIMS = 50
+N_PANELS = 80
+COLS = 5
+PROJECTION_QUANTILES = [(0, 100), (10, 90), (25, 75), (40, 60)]
+PROJECTION_BAND_ALPHA = 0.2
+
+
+def scenarios(rng):
+    x = np.arange(25, dtype=float)
+    params = np.array([rng.normal(0, 0.05), 10 ** rng.uniform(1, 4)])
+    covariance = np.diag([0.01, 0.1 * params[1]]) ** 2
+    scenario_params = rng.multivariate_normal(params, covariance, NUM_SIMS)
+    k, A = scenario_params[:, :1], scenario_params[:, 1:]
+    return x, A * np.exp((k * (x - x[5])).clip(-100, 100))
+
+
+def plot_spaghetti(ax, x, projections):
+    for projection in projections:
+        ax.plot(x, projection, '-', color='orange', alpha=0.02, linewidth=4)
+
+
+def plot_bands(ax, x, projections):
+    bands = np.percentile(projections, np.ravel(PROJECTION_QUANTILES), axis=0)
+    for lower, upper in bands.reshape(len(PROJECTION_QUANTILES), 2, -1):
+        ax.fill_between(
+            x, lower, upper, facecolor='orange', alpha=PROJECTION_BAND_ALPHA, linewidth=0
+        )
+
+
+def render(plot_function):
+    rng = np.random.default_rng(0)
+    rows = int(np.ceil(N_PANELS / COLS))
+    fig, axes = plt.subplots(rows, COLS, figsize=(18.5, rows * 5.4), squeeze=False)
+    start_time = time.perf_counter()
+    for ax in axes.flat[:N_PANELS]:
+        plot_function(ax, *scenarios(rng))
+        ax.set_yscale('log')
+        ax.axis(ymin=1e-2, ymax=1e6)
+    buf = io.BytesIO()
+    fig.savefig(buf, format='svg')
+    elapsed = time.perf_counter() - start_time
+    plt.close(fig)
+    return len(buf.getvalue()), elapsed
+
+
+if __name__ == '__main__':
+    if sys.argv[1:]:
+        N_PANELS = int(sys.argv[1])
+    results = {}
+    for name, plot_function in [('spaghetti', plot_spaghetti), ('bands', plot_bands)]:
+        results[name] = render(plot_function)
+        size, elapsed = results[name]
+        print(f"{name:>10}: {size / 1e6:6.2f} MB  {elapsed:6.2f} s  ({N_PANELS} panels)")
+    (old_size, old_time), (new_size, new_time) = results.values()
+    print(f"{'ratio':>10}: {old_size / new_size:6.1f} ×     {old_time / new_time:6.1f} ×")
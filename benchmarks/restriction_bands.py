@@ -0,0 +1,114 @@
+# Compare SVG size and render time of the restriction timeline behind nsw.py's R_eff plot
+# with the end-of-lockdown fade drawn as 30 translucent patches (the old way), versus as
+# one image with restrictions.fade(). Reports sizes before and after svgmin, and fails if
+# the fade doesn't make the figure smaller, so it can be used as a size regression check.
+
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import matplotlib
+
+matplotlib.use('SVG')
+import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import restrictions
+import svgmin
+
+MASKS = np.datetime64('2021-06-21')
+LGA_LOCKDOWN = np.datetime64('2021-06-26')
+LOCKDOWN = np.datetime64('2021-06-27')
+TIGHTER_LOCKDOWN = np.datetime64('2021-07-10')
+NONCRITICAL_RETAIL_CLOSED = np.datetime64('2021-07-18')
+STATEWIDE = np.datetime64('2021-08-15')
+CURFEW = np.datetime64('2021-08-23')
+END_LOCKDOWN = np.datetime64('2021-10-01')
+
+
+def whiten(color, f):
+    white = np.array(mcolors.to_rgb("white"))
+    return (1 - f) * white + f * np.array(mcolors.to_rgb(color))
+
+
+def bands(ax):
+    for start, end, color, edgecolor, hatch, label in [
+        (MASKS, LGA_LOCKDOWN, whiten("yellow", 0.5), None, None, "Initial"),
+        (LGA_LOCKDOWN, LOCKDOWN, whiten("yellow", 0.5), whiten("orange", 0.5), "//////", "LGA"),
+        (LOCKDOWN, TIGHTER_LOCKDOWN, whiten("orange", 0.5), None, None, "Lockdown"),
+        (TIGHTER_LOCKDOWN, NONCRITICAL_RETAIL_CLOSED, whiten("orange", 0.5), whiten("red", 0.35), "//////", "Tightened"),
+        (NONCRITICAL_RETAIL_CLOSED, STATEWIDE, whiten("red", 0.35), None, None, "Retail"),
+        (STATEWIDE, CURFEW, whiten("red", 0.35), whiten("red", 0.45), "//////", "Statewide"),
+    ]:
+        ax.fill_betweenx(
+            [-10, 10],
+            [start, start],
+            [end, end],
+            color=color,
+            edgecolor=edgecolor,
+            hatch=hatch,
+            linewidth=0,
+            label=label,
+        )
+    ax.fill_betweenx(
+        [-10, 10],
+        [CURFEW, CURFEW],
+        [END_LOCKDOWN, END_LOCKDOWN],
+        color="red",
+        alpha=0.45,
+        linewidth=0,
+        label="Curfew",
+    )
+
+
+def fade_patches(ax):
+    for i in range(30):
+        ax.fill_betweenx(
+            [-10, 10],
+            [END_LOCKDOWN.astype(int) + i / 3] * 2,
+            [END_LOCKDOWN.astype(int) + (i + 1) / 3] * 2,
+            color="red",
+            alpha=0.45 * (30 - i) / 30,
+            linewidth=0,
+            zorder=-10,
+        )
+
+
+def fade_image(ax):
+    restrictions.fade(ax, END_LOCKDOWN, 10, color="red", alpha=0.45)
+
+
+def render(fade_function):
+    fig = plt.figure(figsize=(10, 6))
+    ax = plt.axes()
+    start_time = time.perf_counter()
+    bands(ax)
+    fade_function(ax)
+    ax.legend(loc='upper left')
+    ax.axis(
+        xmin=np.datetime64('2021-06-01'), xmax=np.datetime64('2021-10-31'), ymin=0, ymax=4
+    )
+    buf = io.StringIO()
+    fig.savefig(buf, format='svg')
+    elapsed = time.perf_counter() - start_time
+    plt.close(fig)
+    svg = buf.getvalue()
+    return len(svg.encode()), len(svgmin.minify(svg).encode()), svg.count('<path'), elapsed
+
+
+if __name__ == '__main__':
+    results = {}
+    for name, fade_function in [('patches', fade_patches), ('image', fade_image)]:
+        results[name] = render(fade_function)
+        size, minified_size, paths, elapsed = results[name]
+        print(
+            f"{name:>8}: {size / 1e3:6.1f} kB  {minified_size / 1e3:6.1f} kB minified  "
+            f"{paths:4d} paths  {elapsed:5.2f} s"
+        )
+    (old_size, old_minified, _, _), (new_size, new_minified, _, _) = results.values()
+    print(f"{'ratio':>8}: {old_size / new_size:6.2f} ×  {old_minified / new_minified:6.2f} ×")
+    if new_minified >= old_minified:
+        sys.exit("restrictions.fade() no longer makes the SVG smaller")
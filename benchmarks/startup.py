@@ -0,0 +1,116 @@
+# Measure how long each entry-point script spends in module-level imports before it can
+# start doing anything useful, using python's -X importtime. Only the script's top-level
+# import statements are run (not the script itself, which would download things), so
+# imports deferred into functions or later in the script aren't counted, which is the
+# point. Each is run a few times and the fastest kept, to reduce noise.
+#
+# Usage:
+#
+#     python benchmarks/startup.py                    # Print a breakdown per script
+#     python benchmarks/startup.py --save FILE        # And save the results as JSON
+#     python benchmarks/startup.py --compare FILE     # And compare to saved results
+#
+# With --compare, exits with an error if any script's import time has grown by more than
+# REGRESSION_FACTOR (and REGRESSION_MS, so tiny scripts don't trip it on noise).
+# Modules that aren't installed are reported and skipped.
+
+import ast
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+REPEATS = 5
+TOP_N = 3
+REGRESSION_FACTOR = 1.25
+REGRESSION_MS = 50
+
+
+def top_level_imports(script):
+    """Source of each import statement in the body of the script's module"""
+    source = script.read_text()
+    return [
+        ast.get_source_segment(source, node)
+        for node in ast.parse(source).body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+
+
+def importtime(code):
+    """Run code with -X importtime, and return {module: cumulative ms} for the modules
+    it imported directly, plus the list of modules that failed to import"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=REPO,
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, MPLBACKEND='Agg'),
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Nesting is shown by indentation. Only count those imported directly:
+        if name.startswith('  ', 1):
+            continue
+        times[name.strip()] = int(cumulative) / 1000
+    return times, result.stdout.split()
+
+
+def measure(script, baseline):
+    code = '\n'.join(
+        f"try:\n    {' '.join(statement.split())}\nexcept ImportError as e:\n    print(e.name)"
+        for statement in top_level_imports(script)
+    )
+    best = None
+    for _ in range(REPEATS):
+        times, missing = importtime(code)
+        for name in baseline:
+            times.pop(name, None)
+        if best is None or sum(times.values()) < sum(best.values()):
+            best = times
+    return best, missing
+
+
+def main():
+    args = sys.argv[1:]
+    save = args[args.index('--save') + 1] if '--save' in args else None
+    compare = args[args.index('--compare') + 1] if '--compare' in args else None
+
+    # Modules python imports at startup regardless:
+    baseline, _ = importtime('pass')
+
+    results = {}
+    for script in sorted(REPO.glob('*.py')):
+        times, missing = measure(script, baseline)
+        total = sum(times.values())
+        results[script.name] = total
+        heaviest = sorted(times.items(), key=lambda item: -item[1])[:TOP_N]
+        breakdown = ', '.join(f"{name} {ms:.0f}" for name, ms in heaviest)
+        line = f"{script.name:>32}: {total:7.0f} ms  ({breakdown})"
+        if missing:
+            line += f"  [not installed: {', '.join(missing)}]"
+        print(line)
+
+    if save:
+        Path(save).write_text(json.dumps(results, indent=4, sort_keys=True) + '\n')
+
+    if compare:
+        previous = json.loads(Path(compare).read_text())
+        regressions = []
+        for name, total in results.items():
+            if name not in previous:
+                continue
+            before = previous[name]
+            if total > before * REGRESSION_FACTOR and total - before > REGRESSION_MS:
+                regressions.append(f"{name}: {before:.0f} ms → {total:.0f} ms")
+        if regressions:
+            sys.exit("Startup regressions:\n" + '\n'.join(regressions))
+        print("No startup regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+# Compare run time of aus_vax.py's vaccine supply simulation written as it used to be,
+# with every change applied to the rest of each array (quadratic in the number of days),
+# versus vax_supply.simulate(), over increasingly long projections of synthetic supply and
+# uptake data. Fails if the curves differ by more than floating point rounding, so it can
+# be used as a check that vax_supply.simulate() still does what the old loop did. Also
+# times simulating N_SCENARIOS scenarios at once, as aus_vax.py's scenarios mode does.
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import vax_supply
+
+START_DATE = np.datetime64('2021-02-22')
+N_PAST_DAYS = 210
+PROJECTION_DAYS = [140, 1000, 5000, 20000]
+
+AZ_WASTAGE = 0.125
+PFIZER_WASTAGE = 0.05
+MAX_AZ_ADMINISTERED = 7.05e6
+MAX_ELIGIBLE = 21_852_349
+TAU_AZ = 77
+TAU_PFIZER = 25
+
+RTOL = 1e-9
+N_SCENARIOS = 2000
+
+
+def synthetic_data(n_days):
+    """Dates, cumulative first doses, and (dates, shipments) for Pfizer, overseas AZ and
+    local AZ supply, the latter two weekly throughout"""
+    all_dates = START_DATE + np.arange(N_PAST_DAYS + n_days)
+    days = np.arange(N_PAST_DAYS)
+    doses = (600 * days**1.5).cumsum() / 20
+    weeks = START_DATE - 7 + 7 * np.arange((N_PAST_DAYS + n_days) // 7 + 2)
+    pfizer = (weeks, np.linspace(150e3, 2e6, len(weeks)))
+    AZ_OS = (weeks[:6], np.full(6, 300e3))
+    AZ_local = (weeks[5:], np.full(len(weeks) - 5, 1e6))
+    return all_dates, doses, pfizer, AZ_OS, AZ_local
+
+
+def old_simulate(all_dates, doses, pfizer, AZ_OS, AZ_local):
+    """The simulation loop as it was in aus_vax.py"""
+    pfizer_supply_dates, pfizer_shipments = pfizer
+    AZ_OS_supply_dates, AZ_shipments = AZ_OS
+    AZ_local_supply_dates, AZ_production = AZ_local
+    first_doses = np.zeros(len(all_dates), dtype=float)
+    first_doses[: len(doses)] = doses
+    first_doses[len(doses) :] = doses[-1]
+    curves = {name: np.zeros_like(first_doses) for name in vax_supply.CURVES}
+    curves['first_doses'] = first_doses
+    AZ_first_doses = curves['AZ_first_doses']
+    pfizer_first_doses = curves['pfizer_first_doses']
+    AZ_second_doses = curves['AZ_second_doses']
+    pfizer_second_doses = curves['pfizer_second_doses']
+    AZ_reserved = curves['AZ_reserved']
+    pfizer_reserved = curves['pfizer_reserved']
+    AZ_available = curves['AZ_available']
+    pfizer_available = curves['pfizer_available']
+    wasted = curves['wasted']
+
+    pfizer_available += pfizer_shipments[pfizer_supply_dates < all_dates[0]].sum()
+    AZ_available += AZ_shipments[AZ_OS_supply_dates < all_dates[0]].sum()
+    AZ_available += AZ_production[AZ_local_supply_dates < all_dates[0]].sum()
+
+    for i, date in enumerate(all_dates):
+        if date in pfizer_supply_dates:
+            pfizer_lot = pfizer_shipments[pfizer_supply_dates == date][0]
+            if date < np.datetime64('2021-06-27'):
+                pfizer_available[i:] += 0.5 * (1 - PFIZER_WASTAGE) * pfizer_lot
+                pfizer_reserved[i:] += 0.5 * (1 - PFIZER_WASTAGE) * pfizer_lot
+                wasted[i:] += PFIZER_WASTAGE * pfizer_lot
+            else:
+                outstanding = pfizer_first_doses[i] - pfizer_second_doses[i]
+                reserve_allocation = 0.4 * outstanding - pfizer_reserved[i]
+                pfizer_available[i:] += (1 - PFIZER_WASTAGE) * pfizer_lot - reserve_allocation
+                pfizer_reserved[i:] += reserve_allocation
+                wasted[i:] += PFIZER_WASTAGE * pfizer_lot
+        if date in AZ_OS_supply_dates:
+            AZ_lot = AZ_shipments[AZ_OS_supply_dates == date][0]
+            AZ_available[i:] += 0.5 * (1 - AZ_WASTAGE) * AZ_lot
+            AZ_reserved[i:] += 0.5 * (1 - AZ_WASTAGE) * AZ_lot
+            wasted[i:] += AZ_WASTAGE * AZ_lot
+        if date in AZ_local_supply_dates:
+            AZ_lot = AZ_production[AZ_local_supply_dates == date][0]
+            if date < np.datetime64('2021-04-11'):
+                AZ_available[i:] += 0.5 * (1 - AZ_WASTAGE) * AZ_lot
+                AZ_reserved[i:] += 0.5 * (1 - AZ_WASTAGE) * AZ_lot
+            else:
+                outstanding = AZ_first_doses[i] - AZ_second_doses[i]
+                reserve_allocation = 0.66 * outstanding - AZ_reserved[i]
+                AZ_available[i:] += (1 - AZ_WASTAGE) * AZ_lot - reserve_allocation
+                AZ_reserved[i:] += reserve_allocation
+                wasted[i:] += AZ_WASTAGE * AZ_lot
+                if AZ_available[i] + AZ_first_doses[i] > MAX_AZ_ADMINISTERED:
+                    excess = AZ_first_doses[i] + AZ_available[i] - MAX_AZ_ADMINISTERED
+                    AZ_available[i:] -= excess
+                    AZ_reserved[i:] += excess
+        if i == 0:
+            first_doses_today = first_doses[i]
+        elif i < len(doses):
+            first_doses_today = first_doses[i] - first_doses[i - 1]
+        if i < len(doses):
+            P = 2
+            AZ_frac = AZ_available[i] / (AZ_available[i] + P * pfizer_available[i])
+            pfizer_frac = P * pfizer_available[i] / (AZ_available[i] + P * pfizer_available[i])
+            AZ_first_doses_today = AZ_frac * first_doses_today
+            pfizer_first_doses_today = pfizer_frac * first_doses_today
+        else:
+            AZ_first_doses_today = 1 / 21 * AZ_available[i]
+            pfizer_first_doses_today = 1 / 21 * pfizer_available[i]
+            first_doses_today = AZ_first_doses_today + pfizer_first_doses_today
+            total_first_doses = AZ_first_doses[i] + pfizer_first_doses[i]
+            first_doses_today = max(
+                0, min(MAX_ELIGIBLE - total_first_doses, first_doses_today)
+            )
+            pfizer_first_doses_today = first_doses_today - AZ_first_doses_today
+            first_doses[i:] += first_doses_today
+
+        AZ_first_doses[i:] += AZ_first_doses_today
+        pfizer_first_doses[i:] += pfizer_first_doses_today
+        AZ_available[i:] -= AZ_first_doses_today
+        pfizer_available[i:] -= pfizer_first_doses_today
+        AZ_reserved[i + TAU_AZ :] -= AZ_first_doses_today
+        pfizer_reserved[i + TAU_PFIZER :] -= pfizer_first_doses_today
+        first_doses[i + TAU_AZ :] -= AZ_first_doses_today
+        first_doses[i + TAU_PFIZER :] -= pfizer_first_doses_today
+        AZ_second_doses[i + TAU_AZ :] += AZ_first_doses_today
+        pfizer_second_doses[i + TAU_PFIZER :] += pfizer_first_doses_today
+
+    return curves
+
+
+def new_simulate(all_dates, doses, pfizer, AZ_OS, AZ_local, **kwargs):
+    return vax_supply.simulate(
+        all_dates,
+        doses,
+        pfizer_supply=pfizer,
+        AZ_OS_supply=AZ_OS,
+        AZ_local_supply=AZ_local,
+        max_AZ_administered=MAX_AZ_ADMINISTERED,
+        max_eligible=MAX_ELIGIBLE,
+        pfizer_wastage=PFIZER_WASTAGE,
+        AZ_wastage=AZ_WASTAGE,
+        tau_pfizer=TAU_PFIZER,
+        tau_AZ=TAU_AZ,
+        **kwargs,
+    )
+
+
+def timed(function, *args, **kwargs):
+    start_time = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start_time
+
+
+if __name__ == '__main__':
+    for n_days in PROJECTION_DAYS:
+        data = synthetic_data(n_days)
+        old_curves, old_time = timed(old_simulate, *data)
+        new_curves, new_time = timed(new_simulate, *data)
+        print(
+            f"{n_days:5d} days projected:  old {old_time:6.2f} s  new {new_time:6.3f} s  "
+            f"{old_time / new_time:6.1f} ×"
+        )
+        for name in vax_supply.CURVES:
+            scale = np.abs(old_curves[name]).max() or 1
+            if np.abs(old_curves[name] - new_curves[name]).max() > RTOL * scale:
+                sys.exit(f"vax_supply.simulate() gives a different {name} curve")
+
+    rng = np.random.default_rng(0)
+    all_dates, doses, (pfizer_dates, pfizer_shipments), AZ_OS, AZ_local = synthetic_data(
+        PROJECTION_DAYS[0]
+    )
+    pfizer = pfizer_dates, rng.lognormal(0, 0.2, (N_SCENARIOS, 1)) * pfizer_shipments
+    _, batch_time = timed(
+        new_simulate,
+        all_dates,
+        doses,
+        pfizer,
+        AZ_OS,
+        AZ_local,
+        daily_usage=rng.uniform(1 / 28, 1 / 14, N_SCENARIOS),
+    )
+    print(f"{N_SCENARIOS} scenarios, {PROJECTION_DAYS[0]} days projected: {batch_time:.2f} s")
@@ -1,10 +1,29 @@
-import pandas as pd
+# Convert covidbase's spreadsheet of first dose coverage by age and sex into
+# covidbase_data.npz, the dates × age bands × dose number counts that air.py merges with
+# AIR data for dates prior to AIR_START_DATE, in coverage_cube.build()'s layout.
+#
+# Usage:
+#
+#     python convert_covidbase_data.py                  # Download and convert it
+#     python convert_covidbase_data.py --from-json PATH # Convert a covidbase_data.json
+#
+# --from-json converts the JSON this script used to write, which is no longer in the repo
+# but can be got from git history, e.g. with
+# `git show 79fb96a^:covidbase_data.json > covidbase_data.json`.
+#
+# Each age band's first dose count is the sum over sexes of percent vaccinated times
+# population, rounded to the nearest person. Second doses aren't in the data and are NaN.
+
 import io
-from subprocess import check_output
-from datetime import datetime
-import numpy as np
+import sys
 import json
 
+import numpy as np
+import pandas as pd
+
+import prefetch
+import coverage_cube
+
 # population data from here:
 
 # ABS Estimated Resident Population, June 2020
@@ -31,46 +50,83 @@ POP_DATA = {
     '95_PLUS': {'MALE': 15_720, 'FEMALE': 37_186},
 }
 
-for pops in POP_DATA.values():
-    pops['TOTAL'] = pops['MALE'] + pops['FEMALE'] 
+SEXES = ['MALE', 'FEMALE']
+BANDS = coverage_cube.AGE_BANDS
+assert list(POP_DATA) == BANDS
 
-age_groups = list(POP_DATA.keys())
+START_DATE = np.datetime64('2021-05-09')
+OUTPUT_FILE = 'covidbase_data.npz'
 
 # Redirected from https://covidbaseau.com/vaccinations/download
 url = (
     "https://docs.google.com/spreadsheets/d/"
     "1gStZ55jH-weWAkI-EGhOzYo-lQeEKNlvm1F_Y70E4gc/export?format=csv"
 )
-data = check_output(['curl', '-L', url])
-
-df = pd.read_csv(io.StringIO(data.decode('utf8')))
-
-processed_data = []
-for i, row in df.iterrows():
-    date = row['Date']
-    if not isinstance(date, str):
-        continue
-    date = datetime.strptime(date, '%d %b %y')
-    date = np.datetime64(date, 'D')
-    if date < np.datetime64('2021-05-09'):
-        continue
-    data_for_date = {'DATE_AS_AT': str(date)}
-    for age_group in age_groups:
-        doses_in_age_group = 0
-        for sex in ['MALE', 'FEMALE']:
-            covidbase_sex = sex.capitalize()
-            covidbase_age_group = age_group.replace('_PLUS', '+').replace("_", '-')
-            covidase_column_name = f'{covidbase_sex}_{covidbase_age_group}_%_Vaccinated'
-            doses_percent = float(row[covidase_column_name].rstrip('%'))
-            doses = doses_percent * POP_DATA[age_group][sex] / 100.0
-            data_for_date[f'AIR_{age_group}_{sex}_PCT'] = doses_percent
-            doses_in_age_group += doses
-        percent_in_age_group = 100 * doses_in_age_group / POP_DATA[age_group]['TOTAL']
-        doses_in_age_group = int(round(doses_in_age_group))
-        percent_in_age_group = round(percent_in_age_group, 1)
-        data_for_date[f'AIR_{age_group}_FIRST_DOSE_COUNT'] = doses_in_age_group
-        data_for_date[f'AIR_{age_group}_FIRST_DOSE_PCT'] = percent_in_age_group
-    processed_data.append(data_for_date)
-
-with open('covidbase_data.json', 'w') as f:
-    json.dump(processed_data, f, indent=4)
+
+
+def _column(band, sex):
+    """Name of covidbase's column for percent vaccinated of the age band and sex"""
+    band = band.replace('_PLUS', '+').replace('_', '-')
+    return f"{sex.capitalize()}_{band}_%_Vaccinated"
+
+
+def _cube(dates, first_doses):
+    """Return dates and counts in coverage_cube.build()'s layout, after checking them"""
+    if np.any(np.diff(dates) <= np.timedelta64(0)):
+        raise ValueError("covidbase dates are not unique and increasing")
+    counts = np.full((len(dates), len(BANDS), len(coverage_cube.DOSES)), np.nan)
+    counts[:, :, coverage_cube.FIRST] = first_doses
+    return dates, counts
+
+
+def convert(df):
+    """Return dates and counts from the covidbase spreadsheet as a DataFrame"""
+    columns = [_column(band, sex) for band in BANDS for sex in SEXES]
+    missing = [column for column in columns + ['Date'] if column not in df]
+    if missing:
+        raise ValueError(f"covidbase data is missing columns: {missing}")
+
+    # Rows without a date are notes, not data:
+    df = df[df['Date'].notna()]
+    dates = pd.to_datetime(df['Date'], format='%d %b %y').to_numpy('datetime64[D]')
+    df = df[dates >= START_DATE]
+    dates = dates[dates >= START_DATE]
+
+    percent = df[columns].astype(str).apply(lambda column: column.str.rstrip('%'))
+    percent = percent.apply(pd.to_numeric).to_numpy(float)
+    if not np.all((0 <= percent) & (percent <= 100)):
+        raise ValueError("covidbase percentages are missing or not between 0 and 100")
+
+    percent = percent.reshape(len(dates), len(BANDS), len(SEXES))
+    pops = np.array([[POP_DATA[band][sex] for sex in SEXES] for band in BANDS])
+    doses = percent * pops / 100.0
+    first_doses = np.round(doses[:, :, 0] + doses[:, :, 1])
+    return _cube(dates, first_doses)
+
+
+def from_json(path):
+    """Return dates and counts from a covidbase_data.json as this script used to write"""
+    with open(path) as f:
+        rows = json.load(f)
+    dates = np.array([row['DATE_AS_AT'] for row in rows], dtype='datetime64[D]')
+    first_doses = np.array(
+        [[row[f'AIR_{band}_FIRST_DOSE_COUNT'] for band in BANDS] for row in rows],
+        dtype=float,
+    )
+    return _cube(dates, first_doses)
+
+
+def save(dates, counts, path=OUTPUT_FILE):
+    np.savez_compressed(path, dates=dates, bands=BANDS, counts=counts)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--from-json'] and len(sys.argv) == 3:
+        dates, counts = from_json(sys.argv[2])
+    elif len(sys.argv) == 1:
+        df = pd.read_csv(io.BytesIO(prefetch.fetch(url)))
+        dates, counts = convert(df)
+    else:
+        sys.exit(f"usage: {sys.argv[0]} [--from-json PATH]")
+    save(dates, counts)
+    print(f"{OUTPUT_FILE}: {len(dates)} dates, {dates[0]} to {dates[-1]}")
@@ -0,0 +1,61 @@
+# Vaccination counts by age band from Australian Immunisation Register (AIR) data, as in
+# Ken Tsang's air.json, built once into a single array of dates × age bands × dose
+# number. Coverage for any grouping of the age bands is then a sum over
+# the bands axis for all dates and doses at once, rather than a loop over rows, groups
+# and bands looking up keys like AIR_20_24_FIRST_DOSE_COUNT.
+#
+# Usage:
+#
+#     dates, counts = coverage_cube.build(AIR_data)
+#     coverage = coverage_cube.group_coverage(counts, [['16_19'], ['20_24', '25_29']], pops)
+#     coverage[:, 1, coverage_cube.SECOND]  # % of 20-29 year olds with 2 doses, by date
+#
+# Counts missing from a row, such as second doses in covidbase data, are NaN.
+
+import numpy as np
+
+AGE_BANDS = [
+    '16_19',
+    '20_24',
+    '25_29',
+    '30_34',
+    '35_39',
+    '40_44',
+    '45_49',
+    '50_54',
+    '55_59',
+    '60_64',
+    '65_69',
+    '70_74',
+    '75_79',
+    '80_84',
+    '85_89',
+    '90_94',
+    '95_PLUS',
+]
+
+DOSES = ['FIRST', 'SECOND']
+FIRST, SECOND = 0, 1
+
+
+def build(rows, bands=AGE_BANDS):
+    """Return dates and an (n_dates, n_bands, 2) array of cumulative first and second dose
+    counts from AIR rows (dicts with DATE_AS_AT and AIR_<band>_<dose>_DOSE_COUNT keys),
+    sorted by date"""
+    rows = sorted(rows, key=lambda row: row['DATE_AS_AT'])
+    keys = [f'AIR_{band}_{dose}_DOSE_COUNT' for band in bands for dose in DOSES]
+    dates = np.array([row['DATE_AS_AT'] for row in rows], dtype='datetime64[D]')
+    counts = np.array([[row.get(key) for key in keys] for row in rows], dtype=float)
+    return dates, counts.reshape(len(rows), len(bands), len(DOSES))
+
+
+def group_coverage(counts, groups, populations, bands=AGE_BANDS):
+    """Return an (n_dates, n_groups, 2) array of the percentage of each group of age bands
+    that has had each dose, given counts from build() and populations as a dict {band:
+    population}"""
+    coverage = []
+    for group in groups:
+        indices = [bands.index(band) for band in group]
+        population = sum(populations[band] for band in group)
+        coverage.append(100 * counts[:, indices].sum(axis=1) / population)
+    return np.stack(coverage, axis=1)
@@ -1,13 +1,24 @@
 import sys
 import os
-from scipy.optimize import curve_fit
+import io
+import multiprocessing
 import numpy as np
 import datetime
+import functools
+import json
 import matplotlib.units as munits
 import matplotlib.dates as mdates
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 
+import figure_manifest
+import jhu
+import nyt_counties
+import owid
+import prefetch
+import svgmin
+
 NBSP = u"\u00A0"
 converter = mdates.ConciseDateConverter()
 locator = mdates.DayLocator([1])
@@ -35,6 +46,26 @@ N_DAYS_PROJECTION = 20
 # countries:
 US_STATES = 'US' in sys.argv
 
+# Whether to plot US counties, from NYT's county data. There are thousands, so only the
+# per-county data (and figures, with 'svgs') are made, not a combined figure:
+COUNTIES = 'counties' in sys.argv
+US_STATES = US_STATES or COUNTIES
+
+# Whether to draw projections the old way, as one translucent line per scenario, instead
+# of as quantile bands. Only really useful for comparing the two:
+SPAGHETTI = 'spaghetti' in sys.argv
+
+# Whether to also save each region's figure as an SVG. The pages draw them in the browser
+# with covid_plots.js from the data bundle instead, so by default only the bundle and the
+# combined figure are made, and existing SVGs are replaced with redirects to the pages:
+REGION_SVGS = 'svgs' in sys.argv
+
+# Quantile ranges of the projected scenarios to shade, and the opacity of each. The
+# nested bands stack up to about the same density as the overlapping translucent lines
+# did, but are four SVG paths per plot instead of fifty:
+PROJECTION_QUANTILES = [(0, 100), (10, 90), (25, 75), (40, 60)]
+PROJECTION_BAND_ALPHA = 0.2
+
 
 def exponential_smoothing(arr, tau):
     k = 1 / tau
@@ -44,105 +75,183 @@ def exponential_smoothing(arr, tau):
         result[i] = k * y + (1 - k) * result[i - 1]
     return result
 
-def estimate_recoveries(cases, deaths, clip_to_living=True):
-    from scipy.signal import convolve
-
-    living_cases = cases - deaths
-    t = np.arange(30)
-
-    SEVERE = 0.15
-    MILD = 1 - SEVERE
-    mu_mild = 17
-    sigma_mild = 4
-    mu_severe = 32
-    sigma_severe = 11
+# Parameters of the recovery time distribution: a mix of mild and severe cases, each
+# with a Gaussian distribution of days from case confirmation to recovery:
+SEVERE = 0.15
+MU_MILD = 17
+SIGMA_MILD = 4
+MU_SEVERE = 32
+SIGMA_SEVERE = 11
+RECOVERY_KERNEL_DAYS = 30
+
+
+def recovery_kernel(
+    severe=SEVERE,
+    mu_mild=MU_MILD,
+    sigma_mild=SIGMA_MILD,
+    mu_severe=MU_SEVERE,
+    sigma_severe=SIGMA_SEVERE,
+):
+    """Return the distribution of days from confirmation to recovery. Parameters may be
+    scalars, or arrays of one value per region, in which case the result has one row per
+    region"""
+    t = np.arange(RECOVERY_KERNEL_DAYS)
+    params = np.broadcast_arrays(severe, mu_mild, sigma_mild, mu_severe, sigma_severe)
+    severe, mu_mild, sigma_mild, mu_severe, sigma_severe = [
+        np.asarray(p, dtype=float)[..., np.newaxis] for p in params
+    ]
 
     mild_recovery_curve = np.exp(-((t - mu_mild) ** 2) / (2 * sigma_mild ** 2))
-    mild_recovery_curve /= mild_recovery_curve.sum()
+    mild_recovery_curve /= mild_recovery_curve.sum(axis=-1, keepdims=True)
 
     severe_recovery_curve = np.exp(-((t - mu_severe) ** 2) / (2 * sigma_severe ** 2))
-    severe_recovery_curve /= severe_recovery_curve.sum()
+    severe_recovery_curve /= severe_recovery_curve.sum(axis=-1, keepdims=True)
+
+    return (1 - severe) * mild_recovery_curve + severe * severe_recovery_curve
+
 
-    recovery_curve = MILD * mild_recovery_curve + SEVERE * severe_recovery_curve
+def estimate_recoveries_batch(cases, deaths, kernel=None, clip_to_living=True):
+    """Estimate recoveries for a (regions, dates) array of cumulative cases and deaths,
+    convolving all regions at once. kernel is from recovery_kernel(), and may have one
+    row per region. Defaults to the same kernel for all regions."""
+    from scipy.signal import fftconvolve
 
-    result = convolve(living_cases, recovery_curve)[: len(cases)].astype(int)
+    cases = np.atleast_2d(cases)
+    deaths = np.atleast_2d(deaths)
+    if kernel is None:
+        kernel = recovery_kernel()
+    kernel = np.atleast_2d(kernel)
+
+    living_cases = cases - deaths
+    result = fftconvolve(living_cases, kernel, axes=1)[:, : cases.shape[1]]
+    # Round off FFT noise before truncating, so we agree with direct convolution:
+    result = result.round(6).astype(int)
     if clip_to_living:
-        result = result.clip(0, cases - deaths)
+        result = result.clip(0, living_cases)
 
     return result
 
 
-if US_STATES:
+def estimate_recoveries(cases, deaths, clip_to_living=True):
+    return estimate_recoveries_batch(cases, deaths, clip_to_living=clip_to_living)[0]
+
 
-    # NYT repo url and directory we're interested in:
-    REPO_URL = "https://raw.githubusercontent.com/nytimes/covid-19-data/master"
-    df = pd.read_csv(f"{REPO_URL}/us-states.csv")
+if COUNTIES:
 
-    datestrings = list(sorted(set(df['date'])))[1:]
-    cases = {}
-    deaths = {}
-    recoveries = {}
+    SOURCES = {
+        'cases': (nyt_counties.COUNTIES_URL, 300),
+        'populations': nyt_counties.CENSUS_URL,
+    }
 
     IGNORE_STATES = [
         'Northern Mariana Islands',
         'Virgin Islands',
         'Guam',
         'American Samoa',
+        'Puerto Rico',
     ]
 
-    for state in set(df['state']):
-        if state in IGNORE_STATES:
-            continue
-        cases[state] = []
-        deaths[state] = []
-        subdf = df[df['state'] == state]
-        for date in datestrings:
-            rows = subdf[subdf['date'] == date]
-            if len(rows):
-                assert len(rows) == 1
-                cases[state].append(rows['cases'].array[0])
-                deaths[state].append(rows['deaths'].array[0])
-            else:
-                cases[state].append(0)
-                deaths[state].append(0)
-
-        cases[state] = np.array(cases[state])
-        deaths[state] = np.array(deaths[state])
-        recoveries[state] = estimate_recoveries(cases[state], deaths[state])
-
-    dates = np.array(
-        [
-            np.datetime64(datetime.datetime.strptime(date, "%Y-%m-%d"), 'D')
-            for date in datestrings
-        ]
-    )
+    def process_counties(csv_file):
+        dates, counties, cases, deaths = nyt_counties.read_counties(
+            csv_file, IGNORE_STATES
+        )
+        # The arrays are views into the county × date matrices:
+        return dates, counties, dict(zip(counties, cases)), dict(zip(counties, deaths))
+
+    PARSERS = {
+        'cases': process_counties,
+        'populations': nyt_counties.read_populations,
+    }
+
+elif US_STATES:
+
+    # NYT repo url:
+    NYT_REPO_URL = "https://raw.githubusercontent.com/nytimes/covid-19-data/master"
 
     # Vaccine repo url and directory we're interested in:
-    REPO_URL = "https://raw.githubusercontent.com/govex/COVID-19/master"
-    DATA_DIR = "data_tables/vaccine_data/us_data/time_series/"
-    df = pd.read_csv(f"{REPO_URL}/{DATA_DIR}/vaccine_data_us_timeline.csv")
-    df=df[df['Vaccine_Type']=='All']
+    GOVEX_REPO_URL = "https://raw.githubusercontent.com/govex/COVID-19/master"
+    GOVEX_DATA_DIR = "data_tables/vaccine_data/us_data/time_series/"
 
-    vax_data = {}
-    for state, subdf in df.groupby('Province_State'):
-        vax_data[state] = {
-            'dates': np.array([np.datetime64(date, 'D') for date in subdf['Date']]),
-            'vaccinated': np.array(
-                [
-                    x.replace("\u202c", "") if isinstance(x, str) else x
-                    for x in subdf['Stage_One_Doses']
-                ],
-                dtype=float,  # Work around an errant unicode character in data
-            ),
-        }
+    SOURCES = {
+        'cases': f"{NYT_REPO_URL}/us-states.csv",
+        'vaccinations': f"{GOVEX_REPO_URL}/{GOVEX_DATA_DIR}/vaccine_data_us_timeline.csv",
+    }
 
+    IGNORE_STATES = [
+        'Northern Mariana Islands',
+        'Virgin Islands',
+        'Guam',
+        'American Samoa',
+    ]
+
+    def process_cases(csv_file):
+        df = pd.read_csv(csv_file)
+
+        datestrings = list(sorted(set(df['date'])))[1:]
+        cases = {}
+        deaths = {}
+
+        for state in set(df['state']):
+            if state in IGNORE_STATES:
+                continue
+            cases[state] = []
+            deaths[state] = []
+            subdf = df[df['state'] == state]
+            for date in datestrings:
+                rows = subdf[subdf['date'] == date]
+                if len(rows):
+                    assert len(rows) == 1
+                    cases[state].append(rows['cases'].array[0])
+                    deaths[state].append(rows['deaths'].array[0])
+                else:
+                    cases[state].append(0)
+                    deaths[state].append(0)
+
+            cases[state] = np.array(cases[state])
+            deaths[state] = np.array(deaths[state])
+
+        states = list(cases)
+        estimated = estimate_recoveries_batch(
+            [cases[state] for state in states], [deaths[state] for state in states]
+        )
+        recoveries = dict(zip(states, estimated))
 
+        dates = np.array(
+            [
+                np.datetime64(datetime.datetime.strptime(date, "%Y-%m-%d"), 'D')
+                for date in datestrings
+            ]
+        )
+        return dates, cases, deaths, recoveries
+
+    def process_vaccinations(csv_file):
+        df = pd.read_csv(csv_file)
+        df=df[df['Vaccine_Type']=='All']
+
+        vax_data = {}
+        for state, subdf in df.groupby('Province_State'):
+            vax_data[state] = {
+                'dates': np.array([np.datetime64(date, 'D') for date in subdf['Date']]),
+                'vaccinated': np.array(
+                    [
+                        x.replace("\u202c", "") if isinstance(x, str) else x
+                        for x in subdf['Stage_One_Doses']
+                    ],
+                    dtype=float,  # Work around an errant unicode character in data
+                ),
+            }
+        return vax_data
+
+    PARSERS = {'cases': process_cases, 'vaccinations': process_vaccinations}
 
 else:
 
-    # JH repo location and subdirectory we're interested in:
-    REPO_URL = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master"
-    DATA_DIR = "csse_covid_19_data/csse_covid_19_time_series"
+    # JH data comes from our local store, updated incrementally from JH's daily reports
+    # by jhu.py, so only OWID's file is downloaded in full each run:
+    SOURCES = {
+        # OWID's file is big, give it longer:
+        'vaccinations': (owid.VACCINATIONS_URL, 180),
+    }
 
     # Translate JH country names to what we call them:
     COUNTRY_NAMES = {
@@ -153,62 +262,68 @@ else:
     
     PROVINCES_TO_TREAT_AS_COUNTRIES = ['Hong Kong']
 
-    def process_file(csv_file):
-        COLS_TO_DROP = ['Province/State', 'Country/Region', 'Lat', 'Long']
-        df = pd.read_csv(f"{REPO_URL}/{DATA_DIR}/{csv_file}")
-        dates = None
-        data = {}
-        for country, subdf in df.groupby('Country/Region'):
-            country = COUNTRY_NAMES.get(country, country)
-            subdf = subdf.drop(columns=COLS_TO_DROP)
-            if dates is None:
-                dates = np.array(
-                [
-                    np.datetime64(datetime.datetime.strptime(date, "%m/%d/%y"), 'D')
-                    for date in subdf.columns
-                ]
+    def process_jhu():
+        dates, data = jhu.global_time_series(PROVINCES_TO_TREAT_AS_COUNTRIES)
+        results = [dates]
+        for kind in ['confirmed', 'deaths', 'recovered']:
+            results.append(
+                {COUNTRY_NAMES.get(c, c): counts for c, counts in data[kind].items()}
             )
-            data[country] = np.array(subdf.sum())
-
-        for country, subdf in df.groupby('Province/State'):
-            if country in PROVINCES_TO_TREAT_AS_COUNTRIES:
-                country = COUNTRY_NAMES.get(country, country)
-                subdf = subdf.drop(columns=COLS_TO_DROP)
-                data[country] = np.array(subdf.sum())
+        return results
 
-        return dates, data
-    
+    NOT_REAL_COUNTRIES = ['Scotland', 'Northern Ireland', 'England', 'Wales']
 
-    dates, cases = process_file('time_series_covid19_confirmed_global.csv')
-    _, deaths = process_file('time_series_covid19_deaths_global.csv')
-    _, recoveries = process_file('time_series_covid19_recovered_global.csv')
+    def process_vaccinations(csv_file):
+        data = owid.read_vaccinations(['people_vaccinated'], csv_file=csv_file)
+        vax_data = {}
+        for country, country_data in data.items():
+            if country in NOT_REAL_COUNTRIES:
+                continue
+            vax_data[country] = {
+                'dates': country_data['dates'],
+                'vaccinated': country_data['people_vaccinated'],
+            }
+        return vax_data
+
+    PARSERS = {'vaccinations': process_vaccinations}
+
+
+# Download everything at once, and parse each file as soon as it arrives:
+results = {}
+with ThreadPoolExecutor(max_workers=1) as executor:
+    if not US_STATES:
+        # Update the JH store concurrently with the other downloads:
+        jhu_results = executor.submit(process_jhu)
+    for name, data in prefetch.prefetch(SOURCES):
+        results[name] = PARSERS[name](io.BytesIO(data))
+    if not US_STATES:
+        results['jhu'] = jhu_results.result()
+
+if COUNTIES:
+    dates, county_fips, cases, deaths = results['cases']
+    # No per-county vaccination data:
+    vax_data = {}
+elif US_STATES:
+    dates, cases, deaths, recoveries = results['cases']
+else:
+    dates, cases, deaths, recoveries = results['jhu']
 
     cases['World'] = sum(cases.values())
     deaths['World'] = sum(deaths.values())
     recoveries['World'] = sum(recoveries.values())
 
-    # OWID repo location and subdirectory we're interested in:
-    REPO_URL = "https://raw.githubusercontent.com/owid/covid-19-data/master"
-    DATA_DIR = "public/data/vaccinations"
-    df = pd.read_csv(f"{REPO_URL}/{DATA_DIR}/vaccinations.csv")
+if not COUNTIES:
+    vax_data = results['vaccinations']
+
 
-    NOT_REAL_COUNTRIES = ['Scotland', 'Northern Ireland', 'England', 'Wales']
-    vax_data = {}
-    for country, subdf in df.groupby('location'):
-        if country in NOT_REAL_COUNTRIES:
-            continue
-        vax_data[country] = {
-            'dates': np.array(
-                [
-                    np.datetime64(datetime.datetime.strptime(date, "%Y-%m-%d"), 'D')
-                    for date in subdf['date']
-                ]
-            ),
-            'vaccinated': np.array(subdf['people_vaccinated']),
-        }
 
+if COUNTIES:
+    populations = nyt_counties.county_populations(county_fips, results['populations'])
+    missing = [county for county in cases if county not in populations]
+    if missing:
+        print(f"Skipping {len(missing)} counties with no population data")
 
-if US_STATES:
+elif US_STATES:
     df = pd.read_csv("nst-est2019-01.csv", header=3, skipfooter=5, engine='python')
     df = df.rename(columns={'Unnamed: 0': 'State'})
     populations = {}
@@ -347,10 +462,11 @@ for country in countries:
 
 
 # Print html for per-country links when adding a new country:
+# html_file = 'COVID_US.html' if US_STATES else 'COVID.html'
 # links = []
 # for country in sorted(countries, key=lambda c: '' if c == 'World' else c):
 #     links.append(
-#         f'{NBSP*4}<a href="COVID/{country.replace(" ", "_")}.svg">•{country}</a>'
+#         f'{NBSP*4}<a href="{html_file}#{country.replace(" ", "_")}">•{country}</a>'
 #     )
 
 # TABLE_NCOLS = 3
@@ -458,6 +574,110 @@ def make_exponential(t0):
 
     return exponential
 
+
+def fit_growth_rates(x_fit, active):
+    """Fit an exponential to active cases over each window of FIT_PTS days. Returns
+    growth rates and their uncertainties for each window, and the final window's fit
+    parameters and covariance for make_exponential(x_fit[-1]), or None if there's no fit"""
+    from scipy.optimize import curve_fit
+
+    params = covariance = None
+    k_arr = []
+    u_k_arr = []
+
+    for j in range(FIT_PTS, len(active)):
+
+        t2 = x_fit[j]
+        t1 = x_fit[j - FIT_PTS + 1]
+        y2 = active[j]
+        y1 = active[j - FIT_PTS + 1]
+        if 0 in [y2, y1] or y1 == y2 or y1 < 0 or y2 < 0:
+            k_arr.append(0)
+            u_k_arr.append(0)
+            params = None
+        else:
+            k_guess = np.log(y2 / y1) / (t2 - t1)
+            A_guess = active[-1]
+
+            params, covariance = curve_fit(
+                make_exponential(t2),
+                x_fit[j - FIT_PTS + 1 : j + 1],
+                active[j - FIT_PTS + 1 : j + 1],
+                [k_guess, A_guess],
+                maxfev=100000,
+            )
+
+            k_arr.append(params[0])
+            u_k_arr.append(np.sqrt(covariance[0, 0]))
+
+    return np.array(k_arr), np.array(u_k_arr), params, covariance
+
+
+def fit_growth_rates_batch(x, active):
+    """Fit exponentials to a (regions, dates) array of active cases over each window of
+    FIT_PTS days, for all regions at once, by linear least squares on log(active). This
+    is a much faster stand-in for the per-window curve_fit when there are thousands of
+    regions. Returns (k, u_k, params, covariance): growth rates and their uncertainties
+    of shape (regions, dates - FIT_PTS), and the final window's (k, log(A)) parameters of
+    make_exponential(x[-1]) and their covariance, which are NaN where there's no fit."""
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    active = np.asarray(active, dtype=float)
+    # Windows ending at each of FIT_PTS, ..., len(x) - 1, like the curve_fit loop:
+    t = sliding_window_view(x[1:], FIT_PTS)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = sliding_window_view(np.log(active[:, 1:]), FIT_PTS, axis=1)
+        t_mean = t.mean(axis=-1)
+        dt = t - t_mean[:, np.newaxis]
+        S_tt = (dt ** 2).sum(axis=-1)
+        y_mean = y.mean(axis=-1)
+        k = (dt * (y - y_mean[..., np.newaxis])).sum(axis=-1) / S_tt
+        residuals = y - y_mean[..., np.newaxis] - k[..., np.newaxis] * dt
+        s2 = (residuals ** 2).sum(axis=-1) / (FIT_PTS - 2)
+        u_k = np.sqrt(s2 / S_tt)
+
+    # The curve_fit loop skips a window if its endpoints are equal, or either is zero or
+    # negative. Fitting to the log here additionally needs every point in the window to be
+    # positive, so windows with a zero or negative count anywhere in them are skipped too,
+    # where the curve_fit loop would have fit them. Skipped windows report k = 0:
+    windows = sliding_window_view(active[:, 1:], FIT_PTS, axis=1)
+    y1, y2 = windows[..., 0], windows[..., -1]
+    valid = (windows > 0).all(axis=-1) & (y1 != y2)
+    k = np.where(valid, k, 0)
+    u_k = np.where(valid, u_k, 0)
+
+    # log(A) is the fitted log(active) at t0 = x[-1], the end of the final window:
+    t0_offset = x[-1] - t_mean[-1]
+    params = np.stack([k[:, -1], y_mean[:, -1] + k[:, -1] * t0_offset], axis=-1)
+    var_k = s2[:, -1] / S_tt[-1]
+    covariance = np.empty((len(active), 2, 2))
+    covariance[:, 0, 0] = var_k
+    covariance[:, 0, 1] = covariance[:, 1, 0] = var_k * t0_offset
+    covariance[:, 1, 1] = s2[:, -1] / FIT_PTS + var_k * t0_offset ** 2
+    params[~valid[:, -1]] = np.nan
+    covariance[~valid[:, -1]] = np.nan
+    return k, u_k, params, covariance
+
+
+def plot_projections(ax, x, projections):
+    """Plot projected scenarios, an array of shape (n_scenarios, len(x)), as nested
+    quantile bands, or as one translucent line each if SPAGHETTI is set"""
+    if SPAGHETTI:
+        for projection in projections:
+            ax.plot(x, projection, '-', color='orange', alpha=0.02, linewidth=4)
+        return
+    bands = np.percentile(projections, np.ravel(PROJECTION_QUANTILES), axis=0)
+    for lower, upper in bands.reshape(len(PROJECTION_QUANTILES), 2, -1):
+        ax.fill_between(
+            x,
+            lower,
+            upper,
+            facecolor='orange',
+            alpha=PROJECTION_BAND_ALPHA,
+            linewidth=0,
+        )
+
+
 COLS = 5
 ROWS = int(np.ceil(len(countries) / COLS))
 
@@ -468,311 +688,492 @@ DATES_START_INDEX = 2
 SUBPLOT_HEIGHT = 10.8 / 3 * 1.5
 TOTAL_WIDTH = 18.5
 
+# Number of processes to render single-region figures with:
+RENDER_PROCESSES = os.cpu_count()
+
 import matplotlib.gridspec as gridspec
 
-for SINGLE in [False, True]:
-    if SINGLE:
-        fig = plt.figure(figsize=(10, 10))
-        gs = gridspec.GridSpec(ncols=1, nrows=20, figure=fig)
-    else:
-        fig = plt.figure(figsize=(TOTAL_WIDTH, ROWS * SUBPLOT_HEIGHT))
-        gs = gridspec.GridSpec(ncols=COLS, nrows=20 * ROWS, figure=fig)
-
-    for i, country in enumerate(
-        sorted(countries, key=lambda c: -np.nanmax(deaths[c] / populations[c]))
-    ):
-        if SINGLE:
-            row = col = 0
-            plt.clf()
-        else:
-            row, col = divmod(i, COLS)
+# Estimate recoveries for all countries at once, rather than once per country per plot:
+estimated_recoveries = dict(
+    zip(
+        countries,
+        estimate_recoveries_batch(
+            [cases[country] for country in countries],
+            [deaths[country] for country in countries],
+        ),
+    )
+)
+
+if COUNTIES:
+    # Too many counties to curve_fit every window of every one, fit them all at once:
+    growth_fits = dict(
+        zip(
+            countries,
+            zip(
+                *fit_growth_rates_batch(
+                    dates.astype(float),
+                    [
+                        cases[county] - deaths[county] - estimated_recoveries[county]
+                        for county in countries
+                    ],
+                )
+            ),
+        )
+    )
 
-        ax1 = fig.add_subplot(gs[20 * row : 20 * row + 12, col])
-        ax2 = fig.add_subplot(gs[20 * row + 12 : 20 * row + 18, col])
-        ax3 = ax2.twinx() # Solely to add an extra scale to ax2
-        ax4 = ax1.twinx()
+# Hashes of each country's input data, so we can skip plots that haven't changed:
+country_digests = {}
+for country in countries:
+    country_digests[country] = figure_manifest.figure_hash(
+        dates,
+        cases[country],
+        deaths[country],
+        vax_data[country]['dates'],
+        vax_data[country]['vaccinated'],
+        population=populations[country],
+        icu_beds=None if US_STATES else icu_beds.get(country, np.nan),
+        spaghetti=SPAGHETTI,
+    )
+all_digest = figure_manifest.figure_hash(countries=country_digests)
+all_countries_file = 'COVID_US.svg' if US_STATES else 'COVID.svg'
 
-        print(country)
 
-        # recovered = recoveries[country]
-        recovered = estimate_recoveries(cases[country], deaths[country])
-        active = cases[country] - deaths[country] - recovered
-        
-        x_fit = dates.astype(float)
-
-
-        k_arr = []
-        u_k_arr = []
-
-        for j in range(FIT_PTS, len(active)):
-
-            t2 = x_fit[j]
-            t1 = x_fit[j - FIT_PTS + 1]
-            y2 = active[j]
-            y1 = active[j - FIT_PTS + 1]
-            if 0 in [y2, y1] or y1 == y2 or y1 < 0 or y2 < 0:
-                k_arr.append(0)
-                u_k_arr.append(0)
-                params = None
-            else:
-                k_guess = np.log(y2 / y1) / (t2 - t1)
-                A_guess = active[-1]
-
-                params, covariance = curve_fit(
-                    make_exponential(t2),
-                    x_fit[j - FIT_PTS + 1 : j + 1],
-                    active[j - FIT_PTS + 1 : j + 1],
-                    [k_guess, A_guess],
-                    maxfev=100000,
-                )
+def region_file(country):
+    if COUNTIES:
+        county, state = country.replace(" ", "_").rsplit(',_', 1)
+        return f'COVID_US_counties/{state}/{county}.svg'
+    return f'COVID/{country.replace(" ", "_")}.svg'
 
-                k_arr.append(params[0])
-                u_k_arr.append(np.sqrt(covariance[0, 0]))
 
-        k_arr = np.array(k_arr)
-        u_k_arr = np.array(u_k_arr)
+@functools.lru_cache(maxsize=None)
+def analyse_region(country):
+    """Return a dict of a region's estimated recoveries and active cases, the growth
+    rate of active cases and its uncertainty for each day after the first FIT_PTS, and
+    projected scenarios for active cases over x_model (None if there's no fit). Computed
+    once per region, and shared by the figures and the data bundle."""
+    # recovered = recoveries[country]
+    recovered = estimated_recoveries[country]
+    active = cases[country] - deaths[country] - recovered
 
-        r_arr = np.exp(k_arr) - 1
-        u_r_arr = u_k_arr * np.exp(k_arr)
+    x_fit = dates.astype(float)
 
-        x_model = np.arange(
-            dates[-FIT_PTS] - np.timedelta64(1, 'D'),
-            dates[-1] + np.timedelta64(N_DAYS_PROJECTION, 'D'),
-        )
-        x_model_float = x_model.astype(float)
-
-        if not US_STATES:
-            ax1.axhline(
-                icu_beds.get(country, np.nan) * 10 / CRITICAL_CASES,  # ×10 is conversion to per million
-                linestyle=':',
-                color='r',
-                label='Critical cases ≈ ICU beds',
-            )
+    if COUNTIES:
+        k_arr, u_k_arr, params, covariance = growth_fits[country]
+        if np.isnan(params).any():
+            params = None
+    else:
+        k_arr, u_k_arr, params, covariance = fit_growth_rates(x_fit, active)
 
-        # Plot a bunch of random projections by drawing from Gaussian with the parameter
-        # covariance:
-        NUM_SIMS = 50
-        if params is not None:
-            for _ in range(NUM_SIMS):
-                scenario_params = np.random.multivariate_normal(params, covariance)
-                ax1.plot(
-                    x_model,
-                    make_exponential(x_fit[-1])(x_model_float, *scenario_params) / populations[country],
-                    '-',
-                    color='orange',
-                    alpha=0.02,
-                    linewidth=4,
-                )
+    r_arr = np.exp(k_arr) - 1
+    u_r_arr = u_k_arr * np.exp(k_arr)
 
-        # A dummy item to create the legend for the projection
-        ax1.fill_between(
-            [dates[0], dates[1]],
-            1e-6,
-            2e-6,
-            facecolor='orange',
-            alpha=0.5,
-            label='Active (projected)',
-        )
+    x_model = np.arange(
+        dates[-FIT_PTS] - np.timedelta64(1, 'D'),
+        dates[-1] + np.timedelta64(N_DAYS_PROJECTION, 'D'),
+    )
+    x_model_float = x_model.astype(float)
+
+    # A bunch of random projections drawn from a Gaussian with the parameter covariance:
+    NUM_SIMS = 50
+    projections = None
+    if params is not None:
+        scenario_params = np.random.multivariate_normal(params, covariance, NUM_SIMS)
+        k, A = scenario_params[:, :1], scenario_params[:, 1:]
+        if COUNTIES:
+            # The batched fits are of log(active), so the second parameter is log(A):
+            A = np.exp(A)
+        projections = make_exponential(x_fit[-1])(x_model_float, k, A)
+
+    return {
+        'recovered': recovered,
+        'active': active,
+        'r': r_arr,
+        'u_r': u_r_arr,
+        'x_model': x_model,
+        'projections': projections,
+    }
 
-        deaths_percent = deaths[country][-1] / cases[country][-1] * 100
-        recovered_percent = recovered[-1] / cases[country][-1] * 100
-
-        ax1.semilogy(
-            dates,
-            cases[country] / populations[country],
-            'D',
-            markerfacecolor='deepskyblue',
-            markeredgewidth=0.5,
-            markeredgecolor='k',
-            markersize=4,
-            label='Total cases',
-        )
 
-        ax4.step(
-            vax_data[country]['dates'],
-            100 * vax_data[country]['vaccinated'] / (1e6 * populations[country]),
-            color='mediumseagreen',
-            label='Vaccinated',
-            where='post',
-            linewidth=3,
+def plot_region(fig, gs, i, country, SINGLE):
+    """Plot a region as panel i of the combined figure, or as the whole figure if SINGLE.
+    Returns the axes with legend entries."""
+    if SINGLE:
+        row = col = 0
+    else:
+        row, col = divmod(i, COLS)
+
+    ax1 = fig.add_subplot(gs[20 * row : 20 * row + 12, col])
+    ax2 = fig.add_subplot(gs[20 * row + 12 : 20 * row + 18, col])
+    ax3 = ax2.twinx() # Solely to add an extra scale to ax2
+    ax4 = ax1.twinx()
+
+    print(country)
+
+    analysis = analyse_region(country)
+    recovered = analysis['recovered']
+    active = analysis['active']
+    r_arr = analysis['r']
+    u_r_arr = analysis['u_r']
+    x_model = analysis['x_model']
+
+    if not US_STATES:
+        ax1.axhline(
+            icu_beds.get(country, np.nan) * 10 / CRITICAL_CASES,  # ×10 is conversion to per million
+            linestyle=':',
+            color='r',
+            label='Critical cases ≈ ICU beds',
         )
 
-        ax1.semilogy(
-            dates,
-            active / populations[country],
-            'o',
-            markerfacecolor='orange',
-            markeredgewidth=0.5,
-            markeredgecolor='k',
-            markersize=5,
-            label=f'Active',
-        )
+    if analysis['projections'] is not None:
+        plot_projections(ax1, x_model, analysis['projections'] / populations[country])
+
+    # A dummy item to create the legend for the projection
+    ax1.fill_between(
+        [dates[0], dates[1]],
+        1e-6,
+        2e-6,
+        facecolor='orange',
+        alpha=0.5,
+        label='Active (projected)',
+    )
 
-        ax1.semilogy(
-            dates,
-            deaths[country] / populations[country],
-            '^',
-            markerfacecolor='orangered',
-            markeredgewidth=0.5,
-            markeredgecolor='k',
-            markersize=5,
-            label=f'Total deaths',
-        )
+    deaths_percent = deaths[country][-1] / cases[country][-1] * 100
+    recovered_percent = recovered[-1] / cases[country][-1] * 100
+
+    ax1.semilogy(
+        dates,
+        cases[country] / populations[country],
+        'D',
+        markerfacecolor='deepskyblue',
+        markeredgewidth=0.5,
+        markeredgecolor='k',
+        markersize=4,
+        label='Total cases',
+    )
 
-        ax1.step(
-            dates[1:],
-            exponential_smoothing(np.diff(deaths[country] / populations[country]), 5),
-            color='orangered',
-            label='Daily deaths',
-        )
+    ax4.step(
+        vax_data[country]['dates'],
+        100 * vax_data[country]['vaccinated'] / (1e6 * populations[country]),
+        color='mediumseagreen',
+        label='Vaccinated',
+        where='post',
+        linewidth=3,
+    )
 
-        ax1.step(
-            dates[1:],
-            exponential_smoothing(np.diff(cases[country] / populations[country]), 5),
-            color='deepskyblue',
-            label='Daily cases',
-        )
-        
-        ax1.grid(True, linestyle=':')
-        ax2.grid(True, linestyle=':')
-        if not SINGLE and i == 0:
-            if US_STATES:
-                plt.suptitle('US per-capita COVID-19 cases and exponential projections by state')
-            else:
-                plt.suptitle('Per-capita COVID-19 cases and exponential projections by country')
-        elif SINGLE:
-            plt.suptitle(f'{country} per-capita COVID-19 cases and exponential projection')
-        if SINGLE or i % COLS == 0:
-            ax1.set_ylabel('Cases per million inhabitants')
-        for ax in [ax1, ax2]:
-            ax.axis(
-                xmin=dates[DATES_START_INDEX] - np.timedelta64(24, 'h'), xmax=x_model[-1]
-            )
-        ax1.axis(ymin=1e-2, ymax=1e6)
-        ax4.axis(ymin=0, ymax=100)
+    ax1.semilogy(
+        dates,
+        active / populations[country],
+        'o',
+        markerfacecolor='orange',
+        markeredgewidth=0.5,
+        markeredgecolor='k',
+        markersize=5,
+        label=f'Active',
+    )
 
-        if not SINGLE and i % COLS != 0:
-            ax1.set_yticklabels([])
+    ax1.semilogy(
+        dates,
+        deaths[country] / populations[country],
+        '^',
+        markerfacecolor='orangered',
+        markeredgewidth=0.5,
+        markeredgecolor='k',
+        markersize=5,
+        label=f'Total deaths',
+    )
 
+    ax1.step(
+        dates[1:],
+        exponential_smoothing(np.diff(deaths[country] / populations[country]), 5),
+        color='orangered',
+        label='Daily deaths',
+    )
 
-        valid = active[FIT_PTS:] > 2
-        ax2.fill_between(
-            dates[FIT_PTS:][valid],
-            100 * (r_arr + u_r_arr)[valid],
-            100 * (r_arr - u_r_arr)[valid],
-            color='k',
-            alpha=0.5,
-            label='Active growth rate',
+    ax1.step(
+        dates[1:],
+        exponential_smoothing(np.diff(cases[country] / populations[country]), 5),
+        color='deepskyblue',
+        label='Daily cases',
+    )
+    
+    ax1.grid(True, linestyle=':')
+    ax2.grid(True, linestyle=':')
+    if not SINGLE and i == 0:
+        if US_STATES:
+            plt.suptitle('US per-capita COVID-19 cases and exponential projections by state')
+        else:
+            plt.suptitle('Per-capita COVID-19 cases and exponential projections by country')
+    elif SINGLE:
+        plt.suptitle(f'{country} per-capita COVID-19 cases and exponential projection')
+    if SINGLE or i % COLS == 0:
+        ax1.set_ylabel('Cases per million inhabitants')
+    for ax in [ax1, ax2]:
+        ax.axis(
+            xmin=dates[DATES_START_INDEX] - np.timedelta64(24, 'h'), xmax=x_model[-1]
         )
+    ax1.axis(ymin=1e-2, ymax=1e6)
+    ax4.axis(ymin=0, ymax=100)
 
-        ax2.axis(ymin=-30, ymax=50)
-        ax3.axis(ymin=-30, ymax=50)
+    if not SINGLE and i % COLS != 0:
+        ax1.set_yticklabels([])
 
-        growth_rate_labels = [-20, -10, 0, 10, 20, 30, 40]
 
-        doubling_time_labels = [
-            f'{np.log(2) / np.log(r / 100 + 1):.1f}' if r else '∞' for r in growth_rate_labels
-        ]
+    valid = active[FIT_PTS:] > 2
+    ax2.fill_between(
+        dates[FIT_PTS:][valid],
+        100 * (r_arr + u_r_arr)[valid],
+        100 * (r_arr - u_r_arr)[valid],
+        color='k',
+        alpha=0.5,
+        label='Active growth rate',
+    )
 
-        ax2.set_yticks(growth_rate_labels)
-        ax3.set_yticks(growth_rate_labels)
-        ax4.set_yticks([25, 50, 75, 100])
+    ax2.axis(ymin=-30, ymax=50)
+    ax3.axis(ymin=-30, ymax=50)
 
-        ax3.set_yticklabels(doubling_time_labels)
-        ax2.axhline(0, color='k', linestyle='-')
+    growth_rate_labels = [-20, -10, 0, 10, 20, 30, 40]
 
-        if SINGLE or (i % COLS == 0):
-            ax2.set_ylabel('Growth rate (%/day)')
-        else:
-            ax2.set_yticklabels([])
+    doubling_time_labels = [
+        f'{np.log(2) / np.log(r / 100 + 1):.1f}' if r else '∞' for r in growth_rate_labels
+    ]
 
-        if SINGLE or (i % COLS == COLS - 1) or (i == len(countries) - 1):
-            ax3.set_ylabel('Doubling time (days)')
-            ax4.set_ylabel('Percent vaccinated')
-        else:
-            ax4.set_yticklabels([])
-
-        for ax in [ax1, ax2]:
-            ax.xaxis.set_major_locator(locator)
-            ax.xaxis.set_major_formatter(formatter)
-            ax.get_xaxis().get_major_formatter().show_offset = False
-
-        ax1.set_xticklabels([])
-        ax2.tick_params(axis='x', rotation=90)
-
-        # Escape spaces in country names for latex
-        display_name = country.replace(" ", NBSP)
-
-        num_vaxed = vax_data[country]["vaccinated"][-1]
-        num_vaxed_percent = f'{100 * num_vaxed / (1e6 * populations[country]):.1f}'
-
-        if num_vaxed < 0:
-            num_vaxed = '0'
-            num_vaxed_percent = '0.0%'
-
-        lines = [
-            f'$\\bf {display_name} $',
-            f'Total: {cases[country][-1]}',
-            f'Active: {active[-1]} ({int(round(100 * r_arr[-1])):+.0f}%/day)',
-            f'Deaths: {deaths[country][-1]} ({deaths_percent:.1f}% of cases)',
-            f'Vaccinated: {num_vaxed} ({num_vaxed_percent}%)'
-        ]
-
-        ax1.text(
-            0.02,
-            0.98,
-            '\n'.join(lines),
-            transform=ax1.transAxes,
-            fontsize=8,
-            bbox=dict(facecolor='white', alpha=0.7, edgecolor='w', pad=0),
-            va='top',
-            # fontdict=dict(family='Ubuntu mono'),
-        )
+    ax2.set_yticks(growth_rate_labels)
+    ax3.set_yticks(growth_rate_labels)
+    ax4.set_yticks([25, 50, 75, 100])
 
-        if SINGLE:
-            plt.subplots_adjust(left=0.08, bottom=0.01, right=0.93, top=0.95, wspace=0, hspace=0.0)
+    ax3.set_yticklabels(doubling_time_labels)
+    ax2.axhline(0, color='k', linestyle='-')
 
-            handles1, labels1 = ax1.get_legend_handles_labels()
-            handles2, labels2 = ax2.get_legend_handles_labels()
-            handles4, labels4 = ax4.get_legend_handles_labels()
+    if SINGLE or (i % COLS == 0):
+        ax2.set_ylabel('Growth rate (%/day)')
+    else:
+        ax2.set_yticklabels([])
 
-            ax1.legend(
-                handles1 + handles2 + handles4,
-                labels1 + labels2 + labels4,
-                loc='upper right',
-                ncol=3,
-            )
+    if SINGLE or (i % COLS == COLS - 1) or (i == len(countries) - 1):
+        ax3.set_ylabel('Doubling time (days)')
+        ax4.set_ylabel('Percent vaccinated')
+    else:
+        ax4.set_yticklabels([])
 
-            if not os.path.exists('COVID'):
-                os.mkdir('COVID')
-            plt.savefig(f'COVID/{country.replace(" ", "_")}.svg')
+    for ax in [ax1, ax2]:
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(formatter)
+        ax.get_xaxis().get_major_formatter().show_offset = False
 
+    ax1.set_xticklabels([])
+    ax2.tick_params(axis='x', rotation=90)
 
-    if not SINGLE:
-        plt.subplots_adjust(left=0.04, bottom=0.05, right=0.96, top=0.95, wspace=0, hspace=0.0)
+    # Escape spaces in country names for latex
+    display_name = country.replace(" ", NBSP)
+
+    num_vaxed = vax_data[country]["vaccinated"][-1]
+    num_vaxed_percent = f'{100 * num_vaxed / (1e6 * populations[country]):.1f}'
+
+    if num_vaxed < 0:
+        num_vaxed = '0'
+        num_vaxed_percent = '0.0%'
+
+    lines = [
+        f'$\\bf {display_name} $',
+        f'Total: {cases[country][-1]}',
+        f'Active: {active[-1]} ({int(round(100 * r_arr[-1])):+.0f}%/day)',
+        f'Deaths: {deaths[country][-1]} ({deaths_percent:.1f}% of cases)',
+        f'Vaccinated: {num_vaxed} ({num_vaxed_percent}%)'
+    ]
+
+    ax1.text(
+        0.02,
+        0.98,
+        '\n'.join(lines),
+        transform=ax1.transAxes,
+        fontsize=8,
+        bbox=dict(facecolor='white', alpha=0.7, edgecolor='w', pad=0),
+        va='top',
+        # fontdict=dict(family='Ubuntu mono'),
+    )
+
+    if SINGLE:
+        plt.subplots_adjust(left=0.08, bottom=0.01, right=0.93, top=0.95, wspace=0, hspace=0.0)
 
         handles1, labels1 = ax1.get_legend_handles_labels()
         handles2, labels2 = ax2.get_legend_handles_labels()
         handles4, labels4 = ax4.get_legend_handles_labels()
 
-        plt.gcf().legend(
+        ax1.legend(
             handles1 + handles2 + handles4,
             labels1 + labels2 + labels4,
             loc='upper right',
             ncol=3,
         )
 
-        plt.tight_layout()
-        if US_STATES:
-            plt.savefig('COVID_US.svg')
-        else:
-            plt.savefig('COVID.svg')
-
-        # Update the date in the HTML
-        html_file = 'COVID_US.html' if US_STATES else 'COVID.html'
-        html_lines = Path(html_file).read_text().splitlines()
-        now = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d-%H:%M')
-        for i, line in enumerate(html_lines):
-            if 'Last updated' in line:
-                html_lines[i] = f'    Last updated: {now} UTC'
-        Path(html_file).write_text('\n'.join(html_lines) + '\n')
+    return ax1, ax2, ax4
+
+
+def save_region(country):
+    """Plot and save the single-region figure for a region"""
+    fig = plt.figure('single', figsize=(10, 10))
+    fig.clf()
+    gs = gridspec.GridSpec(ncols=1, nrows=20, figure=fig)
+    plot_region(fig, gs, 0, country, SINGLE=True)
+    os.makedirs(os.path.dirname(region_file(country)), exist_ok=True)
+    svgmin.savefig(fig, region_file(country))
+    # Pass the minification stats back, since this may be running in a worker process:
+    return country, svgmin.stats.pop()
+
+
+regions_by_deaths = sorted(
+    countries, key=lambda c: -np.nanmax(deaths[c] / populations[c])
+)
+
+def delta_encode(arr):
+    """Encode an integer array as its first value followed by successive differences.
+    These are small and repetitive, so the result is compact and gzips well."""
+    return np.diff(np.asarray(arr, dtype=np.int64), prepend=0).tolist()
+
+
+def fixed_point(arr, scale):
+    """Round an array to integer multiples of 1/scale, treating NaN and inf as zero"""
+    arr = np.nan_to_num(np.asarray(arr, dtype=float), nan=0, posinf=0, neginf=0)
+    return np.round(arr * scale).astype(np.int64).tolist()
+
+
+def region_data(country):
+    """Return the data the client-side renderer needs to plot a region"""
+    analysis = analyse_region(country)
+    data = {
+        'population': populations[country],
+        'cases': delta_encode(cases[country]),
+        'deaths': delta_encode(deaths[country]),
+        'active': delta_encode(analysis['active']),
+        # Growth rates and uncertainties in hundredths of a percent per day:
+        'growth': fixed_point(analysis['r'], 1e4),
+        'u_growth': fixed_point(analysis['u_r'], 1e4),
+    }
+    if not US_STATES:
+        beds = icu_beds.get(country, np.nan)
+        data['icu_beds'] = None if np.isnan(beds) else beds
+    vaccinated = vax_data[country]['vaccinated']
+    if vaccinated[-1] >= 0:
+        vax_days = vax_data[country]['dates'] - dates[0]
+        data['vax_days'] = delta_encode(vax_days.astype(int))
+        data['vaccinated'] = delta_encode(vaccinated)
+    if analysis['projections'] is not None:
+        bands = np.percentile(
+            analysis['projections'], np.ravel(PROJECTION_QUANTILES), axis=0
+        )
+        data['projection_bands'] = [delta_encode(band.round()) for band in bands]
+    return data
+
+
+def write_data_bundle(filename):
+    """Write the data for all regions, in the order they're plotted, as compact JSON for
+    the client-side renderer in covid_plots.js"""
+    x_model = analyse_region(regions_by_deaths[0])['x_model']
+    bundle = {
+        'start_date': str(dates[0]),
+        'projection_start_date': str(x_model[0]),
+        'fit_pts': FIT_PTS,
+        'projection_quantiles': PROJECTION_QUANTILES,
+        'regions': {country: region_data(country) for country in regions_by_deaths},
+    }
+    tmp = Path(f'{filename}.tmp')
+    tmp.write_text(json.dumps(bundle, separators=(',', ':')))
+    tmp.replace(filename)
+
+
+if COUNTIES:
+    data_bundle_file = 'COVID_US_counties_data.json'
+elif US_STATES:
+    data_bundle_file = 'COVID_US_data.json'
+else:
+    data_bundle_file = 'COVID_data.json'
+
+if figure_manifest.needs_update(all_digest, data_bundle_file):
+    write_data_bundle(data_bundle_file)
+    figure_manifest.record(all_digest, data_bundle_file)
+
+
+def write_region_redirect(filename, link):
+    """Replace a region's SVG with a stub that redirects to the given link"""
+    Path(filename).write_text(
+        '<svg xmlns="http://www.w3.org/2000/svg" width="400" height="30">'
+        f'<script>location.replace("{link}")</script>'
+        f'<a href="{link}"><text x="5" y="20">Moved to {link}</text></a>'
+        '</svg>\n'
+    )
+
+
+# Once the pages draw single-region plots from the data bundle, replace the SVGs
+# previously rendered for them with redirects to each region's plot on the page, so that
+# old links to them keep working:
+if not REGION_SVGS and not COUNTIES:
+    html_file = 'COVID_US.html' if US_STATES else 'COVID.html'
+    for country in regions_by_deaths:
+        link = f'../{html_file}#{country.replace(" ", "_")}'
+        redirect_digest = figure_manifest.figure_hash(redirect=link)
+        filename = region_file(country)
+        if os.path.exists(filename) and figure_manifest.needs_update(
+            redirect_digest, filename
+        ):
+            write_region_redirect(filename, link)
+            figure_manifest.record(redirect_digest, filename)
+
+if not COUNTIES and figure_manifest.needs_update(all_digest, all_countries_file):
+    fig = plt.figure(figsize=(TOTAL_WIDTH, ROWS * SUBPLOT_HEIGHT))
+    gs = gridspec.GridSpec(ncols=COLS, nrows=20 * ROWS, figure=fig)
+
+    for i, country in enumerate(regions_by_deaths):
+        ax1, ax2, ax4 = plot_region(fig, gs, i, country, SINGLE=False)
+
+    plt.subplots_adjust(left=0.04, bottom=0.05, right=0.96, top=0.95, wspace=0, hspace=0.0)
+
+    handles1, labels1 = ax1.get_legend_handles_labels()
+    handles2, labels2 = ax2.get_legend_handles_labels()
+    handles4, labels4 = ax4.get_legend_handles_labels()
+
+    plt.gcf().legend(
+        handles1 + handles2 + handles4,
+        labels1 + labels2 + labels4,
+        loc='upper right',
+        ncol=3,
+    )
+
+    plt.tight_layout()
+    svgmin.savefig(plt, all_countries_file, viewboxing=True)
+    figure_manifest.record(all_digest, all_countries_file)
+
+    # Update the date in the HTML
+    html_file = 'COVID_US.html' if US_STATES else 'COVID.html'
+    html_lines = Path(html_file).read_text().splitlines()
+    now = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d-%H:%M')
+    for i, line in enumerate(html_lines):
+        if 'Last updated' in line:
+            html_lines[i] = f'    Last updated: {now} UTC'
+    Path(html_file).write_text('\n'.join(html_lines) + '\n')
+
+    plt.close(fig)
+
+# Single-region figures, if asked for, only for those whose data changed. Each is
+# independent, so render them in parallel in forked worker processes, and record them as
+# they finish:
+if REGION_SVGS:
+    to_render = [
+        country
+        for country in regions_by_deaths
+        if figure_manifest.needs_update(country_digests[country], region_file(country))
+    ]
+    if len(to_render) > 1 and RENDER_PROCESSES > 1:
+        pool = multiprocessing.get_context('fork').Pool(RENDER_PROCESSES)
+        rendered = pool.imap_unordered(save_region, to_render)
+    else:
+        pool = None
+        rendered = map(save_region, to_render)
+    for country, svg_stats in rendered:
+        svgmin.stats.append(svg_stats)
+        figure_manifest.record(country_digests[country], region_file(country))
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+figure_manifest.report()
+svgmin.report()
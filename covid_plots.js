@@ -0,0 +1,376 @@
+// Client-side renderer for the per-region data bundles written by covid.py. Draws the
+// same plot as the per-region SVGs, for whichever region is selected, from the much
+// smaller JSON bundle.
+//
+// Usage, in the page:
+//
+//     <select id="region-select"></select>
+//     <canvas id="region-plot" width="1000" height="800" data-bundle="COVID_data.json">
+//     </canvas>
+//     <script src="covid_plots.js"></script>
+//
+// The region shown can be linked to as e.g. COVID.html#Australia, which is how the pages
+// link to each region.
+
+(function () {
+  'use strict';
+
+  var DAY = 24 * 60 * 60 * 1000;
+  var CRITICAL_CASES = 0.05;
+  var DATES_START_INDEX = 2;
+  var COLORS = {
+    cases: 'deepskyblue',
+    active: 'orange',
+    deaths: 'orangered',
+    vaccinated: 'mediumseagreen',
+  };
+
+  function deltaDecode(deltas) {
+    var result = new Array(deltas.length);
+    var total = 0;
+    for (var i = 0; i < deltas.length; i++) {
+      total += deltas[i];
+      result[i] = total;
+    }
+    return result;
+  }
+
+  function diff(arr) {
+    var result = [];
+    for (var i = 1; i < arr.length; i++) {
+      result.push(arr[i] - arr[i - 1]);
+    }
+    return result;
+  }
+
+  function exponentialSmoothing(arr, tau) {
+    var k = 1 / tau;
+    var result = [arr[0]];
+    for (var i = 1; i < arr.length; i++) {
+      result.push(k * arr[i] + (1 - k) * result[i - 1]);
+    }
+    return result;
+  }
+
+  function parseDate(s) {
+    return Date.parse(s + 'T00:00:00Z');
+  }
+
+  // A rectangle of the canvas mapping data coordinates to pixels, with a linear x axis
+  // of dates, and a linear or log y axis:
+  function Axes(ctx, left, top, width, height, xmin, xmax, ymin, ymax, log) {
+    this.ctx = ctx;
+    this.left = left;
+    this.top = top;
+    this.width = width;
+    this.height = height;
+    this.xmin = xmin;
+    this.xmax = xmax;
+    this.log = log;
+    this.ymin = log ? Math.log10(ymin) : ymin;
+    this.ymax = log ? Math.log10(ymax) : ymax;
+  }
+
+  Axes.prototype.x = function (t) {
+    return this.left + (this.width * (t - this.xmin)) / (this.xmax - this.xmin);
+  };
+
+  Axes.prototype.y = function (value) {
+    if (this.log) {
+      value = value > 0 ? Math.log10(value) : -Infinity;
+    }
+    var y = this.top + (this.height * (this.ymax - value)) / (this.ymax - this.ymin);
+    // Clip to a little outside the axes so offscreen points don't draw:
+    return Math.min(Math.max(y, this.top - 10), this.top + this.height + 10);
+  };
+
+  Axes.prototype.frame = function () {
+    var ctx = this.ctx;
+    ctx.strokeStyle = 'black';
+    ctx.lineWidth = 1;
+    ctx.setLineDash([]);
+    ctx.strokeRect(this.left, this.top, this.width, this.height);
+  };
+
+  Axes.prototype.clip = function () {
+    this.ctx.save();
+    this.ctx.beginPath();
+    this.ctx.rect(this.left, this.top, this.width, this.height);
+    this.ctx.clip();
+  };
+
+  Axes.prototype.gridAndLabels = function (yticks, formatY, monthLabels) {
+    var ctx = this.ctx;
+    ctx.strokeStyle = '#bbb';
+    ctx.setLineDash([1, 3]);
+    ctx.fillStyle = 'black';
+    ctx.font = '11px verdana, arial, sans-serif';
+    ctx.textAlign = 'right';
+    ctx.textBaseline = 'middle';
+    for (var i = 0; i < yticks.length; i++) {
+      var y = this.y(yticks[i]);
+      ctx.beginPath();
+      ctx.moveTo(this.left, y);
+      ctx.lineTo(this.left + this.width, y);
+      ctx.stroke();
+      ctx.fillText(formatY(yticks[i]), this.left - 4, y);
+    }
+    // Vertical gridlines on the first of each month:
+    var date = new Date(this.xmin);
+    date = Date.UTC(date.getUTCFullYear(), date.getUTCMonth() + 1, 1);
+    ctx.textAlign = 'center';
+    ctx.textBaseline = 'top';
+    while (date < this.xmax) {
+      var x = this.x(date);
+      ctx.beginPath();
+      ctx.moveTo(x, this.top);
+      ctx.lineTo(x, this.top + this.height);
+      ctx.stroke();
+      if (monthLabels) {
+        var d = new Date(date);
+        var label = d.getUTCMonth() === 0
+          ? String(d.getUTCFullYear())
+          : d.toLocaleString('en', { month: 'short', timeZone: 'UTC' });
+        ctx.fillText(label, x, this.top + this.height + 4);
+      }
+      date = Date.UTC(new Date(date).getUTCFullYear(), new Date(date).getUTCMonth() + 1, 1);
+    }
+    ctx.setLineDash([]);
+  };
+
+  Axes.prototype.markers = function (times, values, color, size) {
+    var ctx = this.ctx;
+    ctx.fillStyle = color;
+    ctx.strokeStyle = 'black';
+    ctx.lineWidth = 0.5;
+    for (var i = 0; i < times.length; i++) {
+      if (times[i] < this.xmin || !(values[i] > 0)) {
+        continue;
+      }
+      ctx.beginPath();
+      ctx.arc(this.x(times[i]), this.y(values[i]), size, 0, 2 * Math.PI);
+      ctx.fill();
+      ctx.stroke();
+    }
+  };
+
+  Axes.prototype.step = function (times, values, color, lineWidth) {
+    var ctx = this.ctx;
+    ctx.strokeStyle = color;
+    ctx.lineWidth = lineWidth;
+    ctx.beginPath();
+    for (var i = 0; i < times.length; i++) {
+      var x = this.x(times[i]);
+      var y = this.y(values[i]);
+      if (i === 0) {
+        ctx.moveTo(x, y);
+      } else {
+        ctx.lineTo(x, this.y(values[i - 1]));
+        ctx.lineTo(x, y);
+      }
+    }
+    ctx.stroke();
+  };
+
+  Axes.prototype.band = function (times, lower, upper, color, alpha) {
+    var ctx = this.ctx;
+    ctx.fillStyle = color;
+    ctx.globalAlpha = alpha;
+    ctx.beginPath();
+    for (var i = 0; i < times.length; i++) {
+      ctx.lineTo(this.x(times[i]), this.y(upper[i]));
+    }
+    for (i = times.length - 1; i >= 0; i--) {
+      ctx.lineTo(this.x(times[i]), this.y(lower[i]));
+    }
+    ctx.closePath();
+    ctx.fill();
+    ctx.globalAlpha = 1;
+  };
+
+  function plotRegion(canvas, bundle, name) {
+    var region = bundle.regions[name];
+    var ctx = canvas.getContext('2d');
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+
+    var start = parseDate(bundle.start_date);
+    var pop = region.population;
+    var cases = deltaDecode(region.cases);
+    var deaths = deltaDecode(region.deaths);
+    var active = deltaDecode(region.active);
+    var times = cases.map(function (_, i) { return start + i * DAY; });
+
+    var projStart = parseDate(bundle.projection_start_date);
+    var bands = (region.projection_bands || []).map(deltaDecode);
+    var projLength = bands.length ? bands[0].length : 0;
+    var projTimes = [];
+    for (var i = 0; i < projLength; i++) {
+      projTimes.push(projStart + i * DAY);
+    }
+
+    var perMillion = function (arr) {
+      return arr.map(function (v) { return v / pop; });
+    };
+
+    var xmin = times[DATES_START_INDEX] - DAY;
+    var xmax = projLength ? projTimes[projLength - 1] : times[times.length - 1];
+    var left = 70;
+    var width = canvas.width - 2 * left;
+    var main = new Axes(ctx, left, 40, width, 0.6 * canvas.height - 40, xmin, xmax, 1e-2, 1e6, true);
+    var growth = new Axes(
+      ctx, left, 0.6 * canvas.height, width, 0.3 * canvas.height, xmin, xmax, -30, 50, false
+    );
+
+    ctx.fillStyle = 'black';
+    ctx.font = 'bold 15px verdana, arial, sans-serif';
+    ctx.textAlign = 'center';
+    ctx.textBaseline = 'top';
+    ctx.fillText(name + ' per-capita COVID-19 cases and exponential projection', canvas.width / 2, 10);
+
+    main.gridAndLabels([1e-2, 1e-1, 1, 10, 100, 1e3, 1e4, 1e5, 1e6], function (v) {
+      return v < 1 ? String(v) : v.toExponential(0).replace('e+', 'e');
+    }, false);
+    growth.gridAndLabels([-20, -10, 0, 10, 20, 30, 40], function (v) { return v + '%'; }, true);
+
+    main.clip();
+    for (i = 0; i < bands.length; i += 2) {
+      main.band(projTimes, perMillion(bands[i]), perMillion(bands[i + 1]), COLORS.active, 0.2);
+    }
+    if (region.icu_beds) {
+      ctx.strokeStyle = 'red';
+      ctx.setLineDash([2, 3]);
+      ctx.beginPath();
+      var y = main.y((region.icu_beds * 10) / CRITICAL_CASES);
+      ctx.moveTo(main.left, y);
+      ctx.lineTo(main.left + main.width, y);
+      ctx.stroke();
+      ctx.setLineDash([]);
+    }
+    var smoothed = function (arr) {
+      return exponentialSmoothing(diff(perMillion(arr)), 5);
+    };
+    main.step(times.slice(1), smoothed(deaths), COLORS.deaths, 1.5);
+    main.step(times.slice(1), smoothed(cases), COLORS.cases, 1.5);
+    main.markers(times, perMillion(cases), COLORS.cases, 2.5);
+    main.markers(times, perMillion(active), COLORS.active, 3);
+    main.markers(times, perMillion(deaths), COLORS.deaths, 2.5);
+    if (region.vaccinated) {
+      // Percent vaccinated, on a linear 0-100 scale sharing the same axes:
+      var vax = new Axes(ctx, main.left, main.top, main.width, main.height, xmin, xmax, 0, 100, false);
+      var vaxTimes = deltaDecode(region.vax_days).map(function (d) { return start + d * DAY; });
+      var vaxPercent = deltaDecode(region.vaccinated).map(function (v) { return v / (1e4 * pop); });
+      vaxTimes.push(xmax);
+      vaxPercent.push(vaxPercent[vaxPercent.length - 1]);
+      vax.step(vaxTimes, vaxPercent, COLORS.vaccinated, 3);
+    }
+    ctx.restore();
+    main.frame();
+
+    // Growth rate of active cases, with its 1σ uncertainty, where there are enough
+    // active cases for it to mean anything:
+    growth.clip();
+    var r = region.growth.map(function (v) { return v / 100; });
+    var u = region.u_growth.map(function (v) { return v / 100; });
+    var fitTimes = times.slice(bundle.fit_pts);
+    var fitActive = active.slice(bundle.fit_pts);
+    var segmentStart = null;
+    for (i = 0; i <= r.length; i++) {
+      var valid = i < r.length && fitActive[i] > 2;
+      if (valid && segmentStart === null) {
+        segmentStart = i;
+      } else if (!valid && segmentStart !== null) {
+        var upper = [];
+        var lower = [];
+        for (var j = segmentStart; j < i; j++) {
+          upper.push(r[j] + u[j]);
+          lower.push(r[j] - u[j]);
+        }
+        growth.band(fitTimes.slice(segmentStart, i), lower, upper, 'black', 0.5);
+        segmentStart = null;
+      }
+    }
+    ctx.strokeStyle = 'black';
+    ctx.beginPath();
+    ctx.moveTo(growth.left, growth.y(0));
+    ctx.lineTo(growth.left + growth.width, growth.y(0));
+    ctx.stroke();
+    ctx.restore();
+    growth.frame();
+
+    // Summary, like the text box on the SVG plots:
+    var last = cases.length - 1;
+    var lines = [
+      'Total: ' + cases[last],
+      'Active: ' + active[last] + ' (' + (r[r.length - 1] >= 0 ? '+' : '') +
+        Math.round(r[r.length - 1]) + '%/day)',
+      'Deaths: ' + deaths[last] + ' (' + ((100 * deaths[last]) / cases[last]).toFixed(1) +
+        '% of cases)',
+    ];
+    if (region.vaccinated) {
+      var vaccinated = deltaDecode(region.vaccinated);
+      var n = vaccinated[vaccinated.length - 1];
+      lines.push('Vaccinated: ' + n + ' (' + (n / (1e4 * pop)).toFixed(1) + '%)');
+    }
+    ctx.font = '12px verdana, arial, sans-serif';
+    ctx.textAlign = 'left';
+    ctx.textBaseline = 'top';
+    ctx.fillStyle = 'rgba(255, 255, 255, 0.7)';
+    ctx.fillRect(main.left + 6, main.top + 6, 260, 16 * lines.length + 6);
+    ctx.fillStyle = 'black';
+    for (i = 0; i < lines.length; i++) {
+      ctx.fillText(lines[i], main.left + 10, main.top + 10 + 16 * i);
+    }
+    ctx.fillText('Cases per million inhabitants (log scale)', main.left, main.top + main.height + 4);
+    ctx.fillText('Growth rate of active cases (%/day)', growth.left, growth.top + growth.height + 20);
+  }
+
+  function init() {
+    var canvas = document.getElementById('region-plot');
+    var select = document.getElementById('region-select');
+    fetch(canvas.dataset.bundle)
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status + ' ' + response.statusText);
+        }
+        return response.json();
+      })
+      .then(function (bundle) {
+        var names = Object.keys(bundle.regions);
+        names.forEach(function (name) {
+          var option = document.createElement('option');
+          option.value = option.textContent = name;
+          select.appendChild(option);
+        });
+        var show = function () {
+          var name = decodeURIComponent(window.location.hash.slice(1)).replace(/_/g, ' ');
+          var linked = name in bundle.regions;
+          if (!linked) {
+            name = names[0];
+          }
+          select.value = name;
+          plotRegion(canvas, bundle, name);
+          // Links to regions point at the page with the region in the hash, which isn't
+          // an element's id, so scroll to the plot ourselves:
+          if (linked) {
+            canvas.scrollIntoView();
+          }
+        };
+        select.addEventListener('change', function () {
+          window.location.hash = select.value.replace(/ /g, '_');
+        });
+        window.addEventListener('hashchange', show);
+        show();
+      })
+      .catch(function (error) {
+        // Say so rather than leaving an empty canvas:
+        var message = document.createElement('p');
+        message.textContent = 'Could not load the data file ' + canvas.dataset.bundle +
+          ' (' + error.message + '), so plots for individual regions cannot be drawn. ' +
+          'Try reloading the page later.';
+        canvas.parentNode.replaceChild(message, canvas);
+        select.disabled = true;
+      });
+  }
+
+  document.addEventListener('DOMContentLoaded', init);
+})();
@@ -0,0 +1,190 @@
+# Streaming reader for covidlive's covid-live.json, a multi-megabyte array of daily
+# reports, one per jurisdiction per day, each with dozens of fields. Rather than loading
+# the whole thing and then looping over every report, the download is parsed one report
+# at a time as it arrives, and only the requested fields are kept, in per-jurisdiction
+# arrays.
+#
+# Usage:
+#
+#     data = covidlive.read_reports(['VACC_DOSE_CNT', 'VACC_GP_CNT'])
+#     data['NSW']['dates'], data['NSW']['VACC_DOSE_CNT']
+#
+# Dates are REPORT_DATE as datetime64[D], in ascending order, and fields are float64
+# arrays, with NaN where a report has null or no value for the field.
+#
+# To find out whether there's new data without downloading the whole feed:
+#
+#     latest = covidlive.latest_dates('VACC_DOSE_CNT', ['AUS', 'NSW', ...])
+#     latest['NSW']  # Most recent REPORT_DATE with a VACC_DOSE_CNT, as a datetime.date
+#
+# This keeps the answer in an index in .cache/, along with the feed's ETag and
+# Last-Modified headers. It makes a conditional request, and if the feed hasn't changed
+# it answers from the index. If it has changed, it only reads the start of the feed,
+# which has the newest reports, asking for just that with a range request. It reads on
+# until it has found a report with the field for each jurisdiction. Only if that fails
+# does it parse the whole feed.
+
+import re
+import json
+import codecs
+import urllib.error
+import urllib.request
+from datetime import date
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+
+COVIDLIVE_URL = 'https://covidlive.com.au/covid-live.json'
+
+TIMEOUT = 60  # seconds
+CHUNK_SIZE = 64 * 1024
+
+INDEX_DIR = Path('.cache')
+PROBE_BYTES = 256 * 1024
+
+_ARRAY_START = re.compile(r'\s*\[')
+_SEPARATOR = re.compile(r'\s*,?\s*')
+
+
+def _reports(stream, partial=False):
+    """Yield each report (a dict) in the JSON array read from the stream, a binary file
+    object, without reading the whole stream first. If partial is True, the stream may
+    end partway through the array, and reports up to that point are yielded."""
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    started = False
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        buffer = buffer[pos:] + utf8.decode(chunk, final=not chunk)
+        pos = 0
+        if not started:
+            match = _ARRAY_START.match(buffer)
+            if match is None:
+                if not chunk or buffer.strip():
+                    raise ValueError("covid-live.json is not a JSON array")
+                continue
+            pos = match.end()
+            started = True
+        while True:
+            pos = _SEPARATOR.match(buffer, pos).end()
+            if buffer.startswith(']', pos):
+                return
+            try:
+                report, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Incomplete report at the end of the buffer, unless there's no more
+                # data coming:
+                if not chunk:
+                    if partial:
+                        return
+                    raise
+                break
+            yield report
+        if not chunk:
+            if partial:
+                return
+            raise ValueError("covid-live.json ended before the end of the array")
+
+
+def read_reports(fields, codes=None, json_file=None):
+    """Return covidlive reports as a dict {code: {'dates': array, field: array, ...}}
+    for the given fields and jurisdiction codes (all codes if None). If json_file is
+    given (a path or binary file object), parse it instead of downloading."""
+    columns = {}
+    if json_file is None:
+        stream = urllib.request.urlopen(COVIDLIVE_URL, timeout=TIMEOUT)
+    elif hasattr(json_file, 'read'):
+        stream = nullcontext(json_file)
+    else:
+        stream = open(json_file, 'rb')
+    with stream as stream:
+        for report in _reports(stream):
+            code = report['CODE']
+            if codes is not None and code not in codes:
+                continue
+            if code not in columns:
+                columns[code] = {'dates': [], **{field: [] for field in fields}}
+            column = columns[code]
+            column['dates'].append(report['REPORT_DATE'])
+            for field in fields:
+                column[field].append(report.get(field))
+
+    result = {}
+    for code, column in columns.items():
+        dates = np.array(column['dates'], dtype='datetime64[D]')
+        # The feed is newest first. A stable sort keeps any same-date reports in order:
+        order = np.argsort(dates, kind='stable')
+        result[code] = {'dates': dates[order]}
+        for field in fields:
+            result[code][field] = np.array(column[field], dtype=float)[order]
+    return result
+
+
+def _index_file(field):
+    return INDEX_DIR / f'covidlive_latest_{field}.json'
+
+
+def _load_index(field):
+    try:
+        return json.loads(_index_file(field).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _save_index(field, index):
+    INDEX_DIR.mkdir(exist_ok=True)
+    # Write to a temporary file and rename, so a reader never sees a partial file:
+    tmp = _index_file(field).with_suffix('.tmp')
+    tmp.write_text(json.dumps(index, indent=4) + '\n')
+    tmp.replace(_index_file(field))
+
+
+def _latest_from_start(response, field, codes):
+    """Read reports from the start of the feed until each jurisdiction has one with the
+    field, and return {code: latest REPORT_DATE string}, or None if the data read
+    ran out first. Relies on the feed being newest first."""
+    latest = {}
+    for report in _reports(response, partial=True):
+        code = report['CODE']
+        if code in codes and report.get(field) is not None:
+            latest[code] = max(latest.get(code, ''), report['REPORT_DATE'])
+            if len(latest) == len(codes):
+                return latest
+    return None
+
+
+def latest_dates(field, codes):
+    """Return {code: datetime.date} of the most recent report that has a value for the
+    given field, for each jurisdiction code. Avoids downloading the feed if it hasn't
+    changed since the last call, and otherwise usually only downloads its start."""
+    index = _load_index(field)
+    headers = {'Range': f'bytes=0-{PROBE_BYTES - 1}'}
+    if index is not None and set(codes) <= set(index['latest']):
+        if index.get('etag'):
+            headers['If-None-Match'] = index['etag']
+        if index.get('last_modified'):
+            headers['If-Modified-Since'] = index['last_modified']
+    request = urllib.request.Request(COVIDLIVE_URL, headers=headers)
+    try:
+        response = urllib.request.urlopen(request, timeout=TIMEOUT)
+    except urllib.error.HTTPError as e:
+        if e.code != 304:
+            raise
+        latest = index['latest']
+    else:
+        with response:
+            latest = _latest_from_start(response, field, codes)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+        if latest is None:
+            reports = read_reports([field], codes=codes)
+            latest = {
+                code: str(reports[code]['dates'][~np.isnan(reports[code][field])].max())
+                for code in codes
+            }
+        index = {'etag': etag, 'last_modified': last_modified, 'latest': latest}
+        _save_index(field, index)
+    return {code: date.fromisoformat(latest[code]) for code in codes}
@@ -0,0 +1,141 @@
+# Manifest of hashes of the inputs each generated figure was rendered from, so that
+# scripts can skip re-rendering figures whose inputs haven't changed. This saves work,
+# and avoids pushing churn into git for figures that would come out the same anyway.
+#
+# Usage:
+#
+#     digest = figure_manifest.figure_hash(dates, cases, population=pop)
+#     if figure_manifest.needs_update(digest, 'foo.svg', 'foo.png'):
+#         ...render and save...
+#         figure_manifest.record(digest, 'foo.svg', 'foo.png')
+#     ...
+#     figure_manifest.report()
+#
+# The manifest is read once per run and records are kept in memory, then written in one
+# go by report() (or at exit, if the script doesn't get that far), so that scripts
+# checking thousands of figures don't re-read and re-write the whole manifest for each.
+#
+# Each script gets its own manifest file, so that jobs running separately (and committing
+# separately) don't conflict with each other. Runs of the same script with different
+# arguments share a manifest, and flush() locks it and only adds the run's own records, so
+# they can run concurrently. The hash automatically includes the source of the running
+# script, so changing how a figure is drawn invalidates it. Modules that draw figures on
+# behalf of several scripts (like reff.py) call use_script() to say which script's
+# manifest to use and which source files the figures depend on.
+
+import sys
+import os
+import atexit
+import json
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+import stats_store
+
+MANIFEST_DIR = Path('figure_manifests')
+
+regenerated = []
+skipped = []
+
+# The manifest as loaded at the start of the run, with this run's records added, and just
+# this run's records, not yet written:
+_manifest = None
+_unwritten = {}
+
+# Set by use_script(), otherwise the running script is used:
+_script_name = None
+_sources = None
+
+
+def use_script(name, *sources):
+    """Use the manifest of the script with the given name (without .py), and hash the
+    given source files instead of the running script"""
+    global _script_name, _sources, _manifest
+    flush()
+    _manifest = None
+    _script_name = name
+    _sources = sources
+
+
+def _manifest_file():
+    return MANIFEST_DIR / f'{_script_name or Path(sys.argv[0]).stem}.json'
+
+
+def _script_source():
+    source = b''
+    for filename in _sources or [sys.argv[0]]:
+        try:
+            source += Path(filename).read_bytes()
+        except OSError:
+            pass
+    return source
+
+
+def figure_hash(*arrays, **params):
+    """Return a hex digest of the given input arrays and keyword render parameters,
+    along with the source of the running script. Parameters must be JSON serialisable,
+    or have a str() representation that identifies them."""
+    h = hashlib.sha1(_script_source())
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        h.update(f'{arr.dtype}{arr.shape}'.encode())
+        h.update(arr.tobytes())
+    h.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def load():
+    try:
+        return json.loads(_manifest_file().read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def _loaded():
+    global _manifest
+    if _manifest is None:
+        _manifest = load()
+    return _manifest
+
+
+def needs_update(digest, *filenames):
+    """Return whether any of the given output files are missing or were rendered from
+    different inputs than those with the given digest"""
+    manifest = _loaded()
+    for filename in filenames:
+        if manifest.get(str(filename)) != digest or not os.path.exists(filename):
+            return True
+    skipped.extend(str(f) for f in filenames)
+    return False
+
+
+def record(digest, *filenames):
+    """Record that the given output files were rendered from inputs with the given
+    digest"""
+    regenerated.extend(str(f) for f in filenames)
+    records = {str(filename): digest for filename in filenames}
+    _loaded().update(records)
+    _unwritten.update(records)
+
+
+def flush():
+    """Write this run's records not yet written to the manifest"""
+    if not _unwritten:
+        return
+    MANIFEST_DIR.mkdir(exist_ok=True)
+    stats_store.update(_manifest_file(), _unwritten, indent=0, sort_keys=True)
+    _unwritten.clear()
+
+
+atexit.register(flush)
+
+
+def report():
+    """Write the manifest, and print which figures were regenerated and how many were
+    skipped as unchanged"""
+    flush()
+    for filename in regenerated:
+        print(f"regenerated: {filename}")
+    print(f"{len(regenerated)} figures regenerated, {len(skipped)} unchanged")
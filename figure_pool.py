@@ -0,0 +1,113 @@
+# Render a script's figures in parallel, each in its own forked child process, at most
+# max_workers at a time. The script submits each figure as soon as the data it needs is
+# ready, as a function that plots it, and carries on getting the data for the next ones
+# while children plot and save the ones submitted so far. Each child is forked when it
+# starts, so it has everything the script has computed by then without rebuilding or
+# pickling anything, and exits once its figure is saved, so at most max_workers figures
+# are in memory at once, rather than all of them.
+#
+# Usage:
+#
+#     pool = figure_pool.FigurePool()
+#     pool.submit('foo', digest, plot_foo, dates, cases)  # plot_foo() returns a Figure
+#     ...
+#     pool.join()
+#     figure_manifest.report()
+#     svgmin.report()
+#
+# Each figure is saved as {name}.png and {name}.svg, unless figure_manifest says its
+# inputs are unchanged, in which case it isn't plotted at all. Figures are recorded in
+# the manifest, and SVG stats passed back to the parent's svgmin.stats, as each finishes.
+#
+# submit() doesn't wait for a free worker: figures wait in a queue, and are started as
+# workers free up during later calls to submit() and join(). So plotting functions must
+# not depend on anything the script changes after submitting them, other than by adding
+# to it. Nothing must be submitted while the script has other threads running, since
+# forking a multithreaded process is unsafe.
+
+import os
+import multiprocessing
+import traceback
+from multiprocessing.connection import wait
+
+import figure_manifest
+import svgmin
+
+
+class FigureError(RuntimeError):
+    pass
+
+
+def _render(outputs, plot, args, connection):
+    try:
+        # Only pass back stats for our own SVGs:
+        svgmin.stats.clear()
+        fig = plot(*args)
+        for output in outputs:
+            svgmin.savefig(fig, output)
+        connection.send((svgmin.stats, None))
+    except BaseException:
+        connection.send((None, traceback.format_exc()))
+
+
+class FigurePool:
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count()
+        self._context = multiprocessing.get_context('fork')
+        self._pending = []
+        # {reader: (outputs, digest, process)} for each running child:
+        self._running = {}
+        self._errors = []
+
+    def submit(self, name, digest, plot, *args):
+        """Plot and save a figure by calling plot(*args) in a child process, unless
+        the figure is unchanged since it was rendered from inputs with the given
+        digest"""
+        outputs = [f'{name}.png', f'{name}.svg']
+        if figure_manifest.needs_update(digest, *outputs):
+            self._pending.append((outputs, digest, plot, args))
+        self._poll()
+
+    def _start(self, outputs, digest, plot, args):
+        reader, writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_render, args=(outputs, plot, args, writer), daemon=True
+        )
+        process.start()
+        # Close our copy of the write end, so that we get EOF if the child dies:
+        writer.close()
+        self._running[reader] = (outputs, digest, process)
+
+    def _collect(self, reader):
+        outputs, digest, process = self._running.pop(reader)
+        try:
+            stats, error = reader.recv()
+        except EOFError:
+            stats, error = None, "child process exited without saving"
+        reader.close()
+        process.join()
+        if process.exitcode:
+            error = f"{error or ''}\n(exit code {process.exitcode})".strip()
+        if error is not None:
+            self._errors.append(f"{', '.join(outputs)}:\n{error}")
+            return
+        svgmin.stats.extend(stats)
+        figure_manifest.record(digest, *outputs)
+
+    def _poll(self, block=False):
+        """Collect any finished children, or wait for at least one to finish if block,
+        and start pending figures while there are free workers"""
+        timeout = None if block else 0
+        for reader in wait(list(self._running), timeout=timeout):
+            self._collect(reader)
+        while self._pending and len(self._running) < self.max_workers:
+            self._start(*self._pending.pop(0))
+
+    def join(self):
+        """Wait for all submitted figures to be saved. Raises FigureError if any
+        failed"""
+        self._poll()
+        while self._running:
+            self._poll(block=True)
+        if self._errors:
+            raise FigureError("Failed to render figures:\n" + "\n".join(self._errors))
@@ -0,0 +1,83 @@
+# Save several variants of one finished figure - log/linear scale, SVG/PNG - in parallel.
+# Each variant is saved in a forked child process, which gets its own copy of the figure
+# (and of everything already loaded: fonts, glyph caches, the data) without having to
+# rebuild or pickle anything. The child applies that variant's changes, e.g. switching an
+# axis to a linear scale, and saves it, so the time to produce all the outputs is roughly
+# the time to produce one, given enough cores.
+#
+# Usage:
+#
+#     def linear(fig):
+#         ax2.set_yscale('linear')
+#         ...
+#
+#     figure_variants.save(
+#         fig1,
+#         [
+#             ('foo.svg', None),
+#             ('foo.png', None),
+#             ('foo_linear.svg', linear),
+#             ('foo_linear.png', linear),
+#         ],
+#         dpi=133,
+#     )
+#
+# SVGs are minified with svgmin, and their stats passed back to the parent's svgmin.stats
+# so that svgmin.report() still includes them.
+
+import multiprocessing
+import traceback
+
+import svgmin
+
+
+class VariantError(RuntimeError):
+    pass
+
+
+def _save_variant(fig, filename, setup, dpi, connection):
+    try:
+        if setup is not None:
+            setup(fig)
+        if filename.endswith('.svg'):
+            svgmin.savefig(fig, filename)
+            connection.send((svgmin.stats.pop(), None))
+        else:
+            fig.savefig(filename, **({'dpi': dpi} if dpi is not None else {}))
+            connection.send((None, None))
+    except BaseException:
+        connection.send((None, traceback.format_exc()))
+
+
+def save(fig, variants, dpi=None):
+    """Save each (filename, setup) in variants concurrently, each in a forked child
+    process. setup is None, or a function to call with the figure to modify it for that
+    variant before saving. Modifications in one variant do not affect the others, or the
+    figure in the parent process. dpi applies to raster formats only. Raises VariantError
+    if any variant fails to save."""
+    context = multiprocessing.get_context('fork')
+    children = []
+    for filename, setup in variants:
+        reader, writer = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_save_variant, args=(fig, filename, setup, dpi, writer), daemon=True
+        )
+        process.start()
+        # Close our copy of the write end, so that we get EOF if the child dies:
+        writer.close()
+        children.append((filename, process, reader))
+    errors = []
+    for filename, process, reader in children:
+        try:
+            stats, error = reader.recv()
+        except EOFError:
+            stats, error = None, "child process exited without saving"
+        process.join()
+        if stats is not None:
+            svgmin.stats.append(stats)
+        if process.exitcode:
+            error = f"{error or ''}\n(exit code {process.exitcode})".strip()
+        if error is not None:
+            errors.append(f"{filename}:\n{error}")
+    if errors:
+        raise VariantError("Failed to save figure variants:\n" + "\n".join(errors))
@@ -0,0 +1,207 @@
+# Local store of JHU's global time series of confirmed cases, deaths and recoveries by
+# country and date. Rather than downloading the full time series every day when only one
+# new column has been added, we append new columns from JHU's daily reports, which are one
+# day of data each.
+#
+# Each update re-downloads the daily report for the last date in the store, and checks it
+# against the store's last column. That detects revisions to the report, and, just after
+# a full refresh, any disagreement between the daily reports and the time series the store
+# was built from, so that the two sources are never mixed unless they agree. If it doesn't
+# match, or if the store is more than a week old (since revisions further back wouldn't be
+# detected), we do a full refresh from the time series files instead.
+#
+# Regions in the store that are missing from a daily report keep their previous day's
+# counts, rather than dropping to zero.
+#
+# Usage:
+#
+#     dates, data = jhu.global_time_series(provinces=['Hong Kong'])
+#     data['confirmed']['Australia'], data['deaths']['Hong Kong'], ...
+
+import io
+import datetime
+import urllib.error
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import prefetch
+
+REPO_URL = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master"
+TIME_SERIES_DIR = "csse_covid_19_data/csse_covid_19_time_series"
+DAILY_REPORTS_DIR = "csse_covid_19_data/csse_covid_19_daily_reports"
+
+STORE_FILE = Path('.cache', 'jhu_global.npz')
+FULL_REFRESH_INTERVAL = 7  # days
+
+KINDS = ['confirmed', 'deaths', 'recovered']
+
+
+def _time_series_url(kind):
+    return f"{REPO_URL}/{TIME_SERIES_DIR}/time_series_covid19_{kind}_global.csv"
+
+
+def _daily_report_url(date):
+    date = date.astype(datetime.date)
+    return f"{REPO_URL}/{DAILY_REPORTS_DIR}/{date.strftime('%m-%d-%Y')}.csv"
+
+
+def _by_region(df, country_column, province_column, value_columns, provinces):
+    """Sum the given columns by country, and additionally by province for the given
+    provinces, returning a DataFrame indexed by region name"""
+    countries = df.groupby(country_column)[value_columns].sum()
+    in_provinces = df[province_column].isin(provinces)
+    provinces = df[in_provinces].groupby(province_column)[value_columns].sum()
+    return pd.concat([countries, provinces])
+
+
+def _full_refresh(provinces):
+    print("JHU: full refresh from time series")
+    frames = {}
+    for kind, data in prefetch.prefetch({kind: _time_series_url(kind) for kind in KINDS}):
+        df = pd.read_csv(io.BytesIO(data))
+        date_columns = list(df.columns[4:])
+        frames[kind] = _by_region(
+            df, 'Country/Region', 'Province/State', date_columns, provinces
+        )
+    # The files don't all have the same regions, align them:
+    regions = sorted(set().union(*(frame.index for frame in frames.values())))
+    store = {
+        'regions': np.array(regions, dtype=str),
+        'provinces': np.array(sorted(provinces), dtype=str),
+        'dates': pd.to_datetime(date_columns, format='%m/%d/%y').to_numpy(
+            'datetime64[D]'
+        ),
+        'refreshed': np.datetime64(datetime.datetime.utcnow(), 'D'),
+    }
+    for kind, frame in frames.items():
+        store[kind] = frame.reindex(regions, fill_value=0).to_numpy(dtype=np.int32)
+    return store
+
+
+def _read_daily_report(data):
+    return pd.read_csv(
+        io.BytesIO(data),
+        usecols=['Province_State', 'Country_Region', 'Confirmed', 'Deaths', 'Recovered'],
+    )
+
+
+def _report_columns(report, store, previous):
+    """Return a dict {kind: column} of a daily report's counts for each region in the
+    store, with regions missing from the report taking their values from the dict
+    previous of columns in the same format. Return None if the report has regions the
+    store doesn't know about"""
+    df = _by_region(
+        report.fillna({'Confirmed': 0, 'Deaths': 0, 'Recovered': 0}),
+        'Country_Region',
+        'Province_State',
+        ['Confirmed', 'Deaths', 'Recovered'],
+        list(store['provinces']),
+    )
+    if not set(df.index) <= set(store['regions']):
+        return None
+    in_report = np.isin(store['regions'], df.index)
+    df = df.reindex(store['regions'], fill_value=0)
+    return {
+        kind: np.where(in_report, df[kind.capitalize()], previous[kind]).astype(np.int32)
+        for kind in KINDS
+    }
+
+
+def _fetch_daily_report(date):
+    try:
+        return _read_daily_report(prefetch.fetch(_daily_report_url(date)))
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+
+
+def _update(store):
+    """Append any new daily reports to the store. Return the updated store, or None if a
+    full refresh is needed"""
+    today = np.datetime64(datetime.datetime.utcnow(), 'D')
+    if today - store['refreshed'] >= FULL_REFRESH_INTERVAL:
+        return None
+    last_date = store['dates'][-1]
+    dates = np.arange(last_date, today + 1)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        reports = list(executor.map(_fetch_daily_report, dates))
+
+    # Check the report for the last day we already have matches what we have for it,
+    # which may have come from the time series rather than a daily report:
+    last_columns = {kind: store[kind][:, -1] for kind in KINDS}
+    if reports[0] is None:
+        print(f"JHU: daily report for {last_date} is missing")
+        return None
+    columns = _report_columns(reports[0], store, last_columns)
+    if columns is None or any(
+        not np.array_equal(columns[kind], last_columns[kind]) for kind in KINDS
+    ):
+        print(f"JHU: data for {last_date} has changed or doesn't match the store")
+        return None
+
+    new_columns = {kind: [] for kind in KINDS}
+    n_new = 0
+    for report in reports[1:]:
+        if report is None:
+            # Not published yet:
+            break
+        columns = _report_columns(report, store, columns)
+        if columns is None:
+            print("JHU: daily report has new regions")
+            return None
+        for kind in KINDS:
+            new_columns[kind].append(columns[kind])
+        n_new += 1
+
+    print(f"JHU: appending {n_new} daily report(s)")
+    if n_new:
+        store = dict(store)
+        store['dates'] = np.concatenate([store['dates'], dates[1 : n_new + 1]])
+        for kind in KINDS:
+            store[kind] = np.column_stack([store[kind]] + new_columns[kind])
+    return store
+
+
+def _load_store(provinces):
+    try:
+        with np.load(STORE_FILE) as f:
+            store = {name: f[name] for name in f.files}
+    except (OSError, ValueError):
+        return None
+    if list(store['provinces']) != sorted(provinces):
+        return None
+    store['refreshed'] = store['refreshed'][()]
+    # Stores from before the last column was checked directly had a checksum of it:
+    store.pop('checksum', None)
+    return store
+
+
+def _save_store(store):
+    STORE_FILE.parent.mkdir(exist_ok=True)
+    # Write to a temporary file and rename, so a reader never sees a partial file:
+    tmp = STORE_FILE.with_suffix('.tmp.npz')
+    np.savez(tmp, **store)
+    tmp.replace(STORE_FILE)
+
+
+def global_time_series(provinces=()):
+    """Return (dates, data), where data is {kind: {region: counts}} for kind in
+    'confirmed', 'deaths' and 'recovered', regions are JHU's country names plus the
+    given provinces, and counts are cumulative int64 arrays aligned with dates"""
+    store = _load_store(provinces)
+    if store is not None:
+        store = _update(store)
+    if store is None:
+        store = _full_refresh(provinces)
+    _save_store(store)
+    data = {}
+    for kind in KINDS:
+        data[kind] = {
+            str(region): row.astype(np.int64)
+            for region, row in zip(store['regions'], store[kind])
+        }
+    return store['dates'], data
@@ -0,0 +1,591 @@
+# Configuration for each jurisdiction whose R_eff and projections reff.py computes and
+# plots: where its case and vaccination data come from, its population, projected
+# vaccination rates, the restrictions timeline shaded behind the plot, and the limits
+# and labels that differ between plots. Adding a region is one more entry in
+# JURISDICTIONS, plus a three-line entry-point script if it should also be runnable on
+# its own.
+#
+# Entries are keyed by the name of their entry-point script (nsw.py etc), which is also
+# the name of their figure manifest. Their keys are:
+#
+#     prefix              Start of output filenames, also the name of the HTML page
+#     stats_file          Where to save R_eff and projections for the posting scripts
+#     timezone            pytz timezone and its label for the HTML 'Last updated' time
+#     population          Population for the SIR model
+#     cases()             Return (dates, daily cases)
+#     nonisolating_cases() Same for non-isolating cases only, for 'noniso' runs
+#     subregion(arg)      For 'others', 'concern' or an integer argument, return (dates,
+#                         daily cases, title, filename suffix, stats key suffix or None)
+#     doses_per_100(n)    Cumulative doses per 100 population for the last n days
+#     dose_rates          Projected daily doses per 100 population, as [(until date,
+#                         rate), ..., (None, rate)]
+#     old_start           Index of the first date to remake old projections from, for
+#                         'old N' runs (see animate_nsw.py)
+#     start_plot, fit_x0, R_ymax, cases_ymax, linear_ymax, linear_ymax_vax,
+#     linear_ticks, legend_order, legend_order_vax, legend_loc_vax
+#                         Plot limits, ticks and legend layout
+#     rollout_name, region, restrictions_name, total_cases_format
+#                         Wording of the title and projected total
+#     bands, fade         Restrictions timeline, see restrictions.py
+#     runs                Arguments of each run the batch runner does
+#
+# Values that depend on the latest data (e.g. a lockdown assumed to end two weeks from
+# now) may be given as functions of the array of dates instead.
+#
+# Data loaders are cached, so that the batch runner downloads and parses each source
+# once for all the runs that use it, before forking them.
+
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import matplotlib.colors as mcolors
+import pandas as pd
+
+from restrictions import whiten
+
+# HTTP headers to emulate curl
+curl_headers = {'user-agent': 'curl/7.64.1'}
+
+
+# Data from covidlive by date announced to public
+@lru_cache()
+def covidlive_data(state, start_date):
+    url = f'https://covidlive.com.au/report/daily-source-overseas/{state}'
+    df = pd.read_html(url)[1]
+
+    df = df[:200]
+
+    if df['NET2'][0] == '-':
+        df = df[1:200]
+
+    dates = np.array(
+        [
+            np.datetime64(datetime.strptime(date, "%d %b %y"), 'D') - 1
+            for date in df['DATE']
+        ]
+    )
+    cases = np.array(df['NET2'].astype(int))
+    cases = cases[dates >= start_date][::-1]
+    dates = dates[dates >= start_date][::-1]
+
+    return dates, cases
+
+
+@lru_cache()
+def _covidlive_doses_per_100(state, population, correction_doses):
+    url = f"https://covidlive.com.au/report/daily-vaccinations/{state}"
+
+    df = pd.read_html(url)[1]
+    doses = df['DOSES'][::-1]
+    daily_doses = np.diff(doses, prepend=0).astype(float)
+    dates = np.array(
+        [np.datetime64(datetime.strptime(d, '%d %b %y'), 'D') for d in df['DATE'][::-1]]
+    )
+    dates = dates[:-1]
+    daily_doses = daily_doses[:-1]
+
+    # Smooth out the data correction made on Aug 16th:
+    CORRECTION_DATE = np.datetime64('2021-08-16')
+    daily_doses[dates == CORRECTION_DATE] -= correction_doses
+    sum_prior = daily_doses[dates < CORRECTION_DATE].sum()
+    SCALE_FACTOR = 1 + correction_doses / sum_prior
+    daily_doses[dates < CORRECTION_DATE] *= SCALE_FACTOR
+
+    return 100 * daily_doses.cumsum() / population
+
+
+def covidlive_doses_per_100(state, population, correction_doses, n):
+    """return cumulative doses per 100 population for the last n days, with the given
+    number of doses the state added to its count on Aug 16th spread over prior days"""
+    return _covidlive_doses_per_100(state, population, correction_doses)[-n:]
+
+
+@lru_cache()
+def covidlive_nonisolating_data(state):
+    df = pd.read_html(f'https://covidlive.com.au/report/daily-wild-cases/{state}')[1]
+    df = df[:-5] # Data begins Jul 17th
+    if df['TOTAL'][0] == '-':
+        df = df[1:]
+    dates = np.array(
+        [
+            np.datetime64(datetime.strptime(date, "%d %b %y"), 'D') - 1
+            for date in df['DATE']
+        ]
+    )
+    cases = np.array(df['TOTAL'].astype(int))[::-1]
+    dates = dates[::-1]
+    assert dates[0] == np.datetime64('2021-07-16'), dates[0]
+    return dates, cases
+
+
+@lru_cache()
+def nsw_nonisolating_data():
+    DATA = """
+        2021-06-10 0
+        2021-06-11 0
+        2021-06-12 0
+        2021-06-13 0
+        2021-06-14 0
+        2021-06-15 0
+        2021-06-16 0
+        2021-06-17 4
+        2021-06-18 1
+        2021-06-19 2
+        2021-06-20 1
+        2021-06-21 0
+        2021-06-22 2
+        2021-06-23 12
+        2021-06-24 3
+        2021-06-25 9
+        2021-06-26 12
+    """
+
+    def unpack_data(s):
+        dates = []
+        values = []
+        for line in s.splitlines():
+            if line.strip() and not line.strip().startswith('#'):
+                date, value = line.strip().split(maxsplit=1)
+                dates.append(np.datetime64(date) - 1)
+                values.append(eval(value))
+        return np.array(dates), np.array(values)
+
+    manual_dates, manual_cases = unpack_data(DATA)
+
+    df = pd.read_html('https://covidlive.com.au/report/daily-wild-cases/nsw')[1]
+
+    if df['TOTAL'][0] == '-':
+        df = df[1:]
+
+    cl_dates = np.array(
+        [
+            np.datetime64(datetime.strptime(date, "%d %b %y"), 'D') - 1
+            for date in df['DATE']
+        ]
+    )
+    cl_cases = np.array(df['TOTAL'].astype(int))[::-1]
+    cl_dates = cl_dates[::-1]
+
+    assert cl_dates[0] == np.datetime64('2021-06-26')
+
+    dates = np.concatenate([manual_dates, cl_dates])
+    cases = np.concatenate([manual_cases, cl_cases])
+    return dates, cases
+
+
+# Data from NSW Health by LGA and test notification date
+@lru_cache()
+def nsw_lga_data(start_date=np.datetime64('2021-06-10')):
+    url = (
+        "https://data.nsw.gov.au/data/dataset/"
+        "aefcde60-3b0c-4bc0-9af1-6fe652944ec2/"
+        "resource/21304414-1ff1-4243-a5d2-f52778048b29/"
+        "download/confirmed_cases_table1_location.csv"
+    )
+    df = pd.read_csv(url)
+
+    LGAs = set(df['lga_name19'])
+    cases_by_lga = {}
+    for lga in LGAs:
+        if not isinstance(lga, str):
+            continue
+        cases_by_date = {
+            d: 0
+            for d in np.arange(
+                np.datetime64(df['notification_date'].min()),
+                np.datetime64(df['notification_date'].max()) + 1,
+            )
+        }
+
+        for _, row in df[df['lga_name19'] == lga].iterrows():
+            cases_by_date[np.datetime64(row['notification_date'])] += 1
+
+        dates = np.array(list(cases_by_date.keys()))
+        new = np.array(list(cases_by_date.values()))
+
+        new = new[dates >= start_date]
+        dates = dates[dates >= start_date]
+
+        cases_by_lga[lga.split(' (')[0]] = new
+
+    # Last day is incomplete data, ignore it:
+    dates = dates[:-1]
+    cases_by_lga = {lga: cases[:-1] for lga, cases in cases_by_lga.items()}
+    return dates, cases_by_lga
+
+
+NSW_LGAs_OF_CONCERN = [
+    'Blacktown',
+    'Campbelltown',
+    'Canterbury-Bankstown',
+    'Cumberland',
+    'Fairfield',
+    'Georges River',
+    'Liverpool',
+    'Parramatta',
+    'Penrith',
+    'Bayside',
+    'Strathfield',
+    'Burwood',
+    # "Dubbo Regional",
+    # "Newcastle",
+    # "Lake Macquarie",
+]
+
+
+def nsw_subregion(arg):
+    """Cases in the NSW LGAs of concern, the rest of the state, or the LGA of concern
+    with the given index when sorted by cases in the last fortnight, most first"""
+    dates, cases_by_lga = nsw_lga_data()
+    if arg == 'others':
+        # Sum over all LGAs *not* of concern
+        new = sum(
+            cases_by_lga[lga] for lga in cases_by_lga if lga not in NSW_LGAs_OF_CONCERN
+        )
+        region = "New South Wales (excluding LGAs of concern)"
+        return dates, new, region, '_LGA_others', '_others'
+    if arg == 'concern':
+        # Sum over all LGAs of concern
+        new = sum(
+            cases_by_lga[lga] for lga in cases_by_lga if lga in NSW_LGAs_OF_CONCERN
+        )
+        return dates, new, "New South Wales LGAs of concern", '_LGA_concern', '_concern'
+    # Sort LGAs in reverse order by last 14d cases
+    sorted_lgas_of_concern = sorted(
+        NSW_LGAs_OF_CONCERN, key=lambda k: -cases_by_lga[k][-14:].sum()
+    )
+    lga = sorted_lgas_of_concern[int(arg)]
+    return dates, cases_by_lga[lga], lga, f'_LGA_{int(arg)}', None
+
+
+def nsw_dose_rates(dates):
+    """History of previously projected rates, so I can remake old projections"""
+    if dates[-1] >= np.datetime64('2021-08-28'):
+        AUG_RATE, SEP_RATE, OCT_RATE, NOV_RATE = 1.4, 1.6, 1.8, 1.8
+    elif dates[-1] >= np.datetime64('2021-08-16'):
+        AUG_RATE, SEP_RATE, OCT_RATE, NOV_RATE = 1.2, 1.4, 1.6, 1.6
+    elif dates[-1] >= np.datetime64('2021-08-08'):
+        AUG_RATE, SEP_RATE, OCT_RATE, NOV_RATE = 1.01, 0.92, 1.26, 1.26
+    else:
+        # Projections before then had a July rate of 0.63, but the August rate was
+        # applied from the start regardless:
+        AUG_RATE, SEP_RATE, OCT_RATE, NOV_RATE = 0.76, 0.85, 1.06, 1.29
+    return [
+        ('2021-09-01', AUG_RATE),
+        ('2021-10-01', SEP_RATE),
+        ('2021-11-01', OCT_RATE),
+        (None, NOV_RATE),
+    ]
+
+
+@lru_cache()
+def nz_midnight_to_midnight_data():
+    today = datetime.now().strftime('%Y-%m-%d')
+    URL = f"https://www.health.govt.nz/system/files/documents/pages/covid_cases_{today}.csv"
+
+    df = pd.read_csv(URL, storage_options=curl_headers)
+
+    df = df[
+        (df["DHB"] != "Managed Isolation & Quarantine") & (df["Historical"] != "Yes")
+    ]
+
+    # Deliberately excluding today, as it is incomplete data
+    dates = np.arange(np.datetime64('2021-08-10'), np.datetime64(today))
+    counts = df['Report Date'].value_counts()
+    counts = np.array([counts[str(d)] if str(d) in counts.index else 0 for d in dates])
+    return dates, counts
+
+
+@lru_cache()
+def owid_doses_per_hundred(location):
+    import owid
+
+    COLUMN = 'total_vaccinations_per_hundred'
+    data = owid.read_vaccinations([COLUMN], locations=[location])
+    doses_per_100 = data[location][COLUMN].astype(float)
+    # Remove NaNs from the dataset, duplicate prev. day instead
+    for i, val in enumerate(doses_per_100):
+        if np.isnan(val):
+            doses_per_100[i] = doses_per_100[i-1]
+    return np.array(doses_per_100)
+
+
+ORANGERED = (np.array(mcolors.to_rgb("orange")) + np.array(mcolors.to_rgb("red"))) / 2
+
+
+def nz_bands(dates):
+    ALERT_LEVEL_1 = np.datetime64('2021-06-29')
+    ALERT_LEVEL_4 = np.datetime64('2021-08-17')
+    END_LOCKDOWN = dates[-1] + 14 # Who knows?
+    return [
+        dict(
+            start=ALERT_LEVEL_1,
+            end=ALERT_LEVEL_4,
+            color=whiten("yellow", 0.35),
+            label="Alert Level 1",
+        ),
+        dict(
+            start=ALERT_LEVEL_4,
+            end=END_LOCKDOWN,
+            color=ORANGERED,
+            alpha=0.45,
+            label="Alert Level 4",
+        ),
+    ]
+
+
+def nz_fade(dates):
+    END_LOCKDOWN = dates[-1] + 14
+    return dict(start=END_LOCKDOWN, days=10, color=ORANGERED, alpha=0.45)
+
+
+POP_OF_SYD = 5_312_163
+POP_OF_NSW = 8.166e6
+POP_OF_VIC = 6.681e6
+POP_OF_ACT = 431215
+POP_OF_AUCKLAND = 1.657e6
+
+# Restriction dates:
+NSW_MASKS = np.datetime64('2021-06-21')
+NSW_LGA_LOCKDOWN = np.datetime64('2021-06-26')
+NSW_LOCKDOWN = np.datetime64('2021-06-27')
+NSW_TIGHTER_LOCKDOWN = np.datetime64('2021-07-10')
+NSW_NONCRITICAL_RETAIL_CLOSED = np.datetime64('2021-07-18')
+NSW_STATEWIDE = np.datetime64('2021-08-15')
+NSW_CURFEW = np.datetime64('2021-08-23')
+NSW_END_LOCKDOWN = np.datetime64('2021-10-01')
+
+VIC_PREV_LOCKDOWN = np.datetime64('2021-05-28')
+VIC_PREV_EASING_1 = VIC_PREV_LOCKDOWN + 21
+VIC_PREV_EASING_2 = np.datetime64('2021-07-09')
+VIC_LOCKDOWN = np.datetime64('2021-07-16')
+VIC_EASING_1 = np.datetime64('2021-07-28')
+VIC_LOCKDOWN_AGAIN = np.datetime64('2021-08-06')
+VIC_CURFEW = np.datetime64('2021-08-16')
+VIC_STATEWIDE = np.datetime64('2021-08-20')
+VIC_END_STATEWIDE = np.datetime64('2021-09-10')
+VIC_EASING_AGAIN = np.datetime64('2021-09-24') # Predicted, who knows
+
+ACT_LOCKDOWN = np.datetime64('2021-08-13')
+ACT_END_LOCKDOWN = np.datetime64('2021-09-03')
+
+
+NSW = dict(
+    prefix='COVID_NSW',
+    stats_file='latest_nsw_stats.json',
+    timezone=('Australia/Melbourne', 'AEST'),
+    population=POP_OF_SYD,
+    cases=lambda: covidlive_data('nsw', np.datetime64('2021-06-10')),
+    nonisolating_cases=nsw_nonisolating_data,
+    subregion=nsw_subregion,
+    doses_per_100=lambda n: covidlive_doses_per_100('nsw', POP_OF_NSW, 93000, n),
+    dose_rates=nsw_dose_rates,
+    old_start=42,  # July 22nd, when I started making vaccine projections
+    start_plot=np.datetime64('2021-06-13'),
+    R_ymax=4,
+    cases_ymax=10_000,
+    linear_ymax=4000,
+    legend_order=[7, 8, 9, 10, 11, 12, 0, 1, 2, 3, 4, 5, 6],
+    legend_order_vax=[7, 9, 8, 10, 11, 12, 13, 0, 1, 2, 3, 4, 5, 6],
+    legend_loc_vax='center right',
+    rollout_name="New South Wales",
+    region="New South Wales",
+    total_cases_format=lambda n: f"{n/1000:.0f}k",
+    bands=[
+        dict(
+            start=NSW_MASKS,
+            end=NSW_LGA_LOCKDOWN,
+            color=whiten("yellow", 0.5),
+            label="Initial restrictions",
+        ),
+        dict(
+            start=NSW_LGA_LOCKDOWN,
+            end=NSW_LOCKDOWN,
+            color=whiten("yellow", 0.5),
+            edgecolor=whiten("orange", 0.5),
+            hatch="//////",
+            label="East Sydney LGA lockdown",
+        ),
+        dict(
+            start=NSW_LOCKDOWN,
+            end=NSW_TIGHTER_LOCKDOWN,
+            color=whiten("orange", 0.5),
+            label="Greater Sydney lockdown",
+        ),
+        dict(
+            start=NSW_TIGHTER_LOCKDOWN,
+            end=NSW_NONCRITICAL_RETAIL_CLOSED,
+            color=whiten("orange", 0.5),
+            edgecolor=whiten("red", 0.35),
+            hatch="//////",
+            label="Lockdown tightened",
+        ),
+        dict(
+            start=NSW_NONCRITICAL_RETAIL_CLOSED,
+            end=NSW_STATEWIDE,
+            color=whiten("red", 0.35),
+            label="Noncritical retail closed",
+        ),
+        dict(
+            start=NSW_STATEWIDE,
+            end=NSW_CURFEW,
+            color=whiten("red", 0.35),
+            edgecolor=whiten("red", 0.45),
+            hatch="//////",
+            label="Statewide lockdown\nOperation Stay at Home",
+        ),
+        dict(
+            start=NSW_CURFEW,
+            end=NSW_END_LOCKDOWN,
+            color="red",
+            alpha=0.45,
+            label="LGA curfew",
+        ),
+    ],
+    fade=dict(start=NSW_END_LOCKDOWN, days=10, color="red", alpha=0.45),
+    runs=[[], ['vax'], *[[str(i)] for i in range(12)], ['others'], ['concern']],
+)
+
+VIC = dict(
+    prefix='COVID_VIC_2021',
+    stats_file='latest_vic_stats.json',
+    timezone=('Australia/Melbourne', 'AEST'),
+    population=POP_OF_VIC,
+    cases=lambda: covidlive_data('vic', np.datetime64('2021-05-10')),
+    nonisolating_cases=lambda: covidlive_nonisolating_data('vic'),
+    doses_per_100=lambda n: covidlive_doses_per_100('vic', POP_OF_VIC, -75000, n),
+    dose_rates=[('2021-09-01', 1.0), ('2021-10-01', 1.2), (None, 1.4)],
+    start_plot=np.datetime64('2021-05-20'),
+    R_ymax=5,
+    cases_ymax=100_000,
+    linear_ymax=5_000,
+    linear_ymax_vax=50_000,
+    linear_ticks=10,
+    legend_order=[5, 6, 7, 8, 9, 10, 2, 1, 0, 3, 4],
+    legend_order_vax=[5, 7, 6, 8, 9, 10, 11, 2, 1, 0, 3, 4],
+    rollout_name="Victorian",
+    region="Victoria",
+    total_cases_format=lambda n: f"{n/1000:.0f}k",
+    bands=[
+        dict(
+            start=VIC_PREV_LOCKDOWN,
+            end=VIC_PREV_EASING_1,
+            color=whiten("red", 0.35),
+            label="Lockdown",
+        ),
+        dict(
+            start=VIC_PREV_EASING_1,
+            end=VIC_PREV_EASING_2,
+            color=whiten("orange", 0.5),
+            label="Eased stay-at-home orders",
+        ),
+        dict(
+            start=VIC_PREV_EASING_2,
+            end=VIC_LOCKDOWN,
+            color=whiten("yellow", 0.5),
+            label="Eased gathering/mask requirements",
+        ),
+        dict(start=VIC_LOCKDOWN, end=VIC_EASING_1, color=whiten("red", 0.35)),
+        dict(start=VIC_EASING_1, end=VIC_LOCKDOWN_AGAIN, color=whiten("orange", 0.5)),
+        dict(start=VIC_LOCKDOWN_AGAIN, end=VIC_CURFEW, color=whiten("red", 0.35)),
+        dict(
+            start=VIC_CURFEW,
+            end=VIC_STATEWIDE,
+            color=whiten("red", 0.35),
+            edgecolor=whiten("red", 0.45),
+            hatch="//////",
+            label="Curfew",
+        ),
+        dict(
+            start=VIC_STATEWIDE,
+            end=VIC_END_STATEWIDE,
+            color="red",
+            alpha=0.45,
+            label="Statewide lockdown",
+        ),
+        dict(
+            start=VIC_END_STATEWIDE,
+            end=VIC_EASING_AGAIN,
+            color=whiten("red", 0.35),
+            edgecolor=whiten("red", 0.45),
+            hatch="//////",
+        ),
+        # Hatched fade, which restrictions.fade() can't do:
+        *[
+            dict(
+                start=VIC_EASING_AGAIN.astype(int) + i,
+                end=VIC_EASING_AGAIN.astype(int) + (i + 1),
+                color="red",
+                alpha=0.35 * (10 - i) / 10,
+                edgecolor=whiten("red", 0.45 * (10 - i) / 10),
+                hatch="//////",
+                zorder=-10,
+            )
+            for i in range(10)
+        ],
+    ],
+    runs=[[], ['vax']],
+)
+
+ACT = dict(
+    prefix='COVID_ACT',
+    stats_file='latest_act_stats.json',
+    timezone=('Australia/Melbourne', 'AEST'),
+    population=POP_OF_ACT,
+    cases=lambda: covidlive_data('act', np.datetime64('2021-05-10')),
+    nonisolating_cases=lambda: covidlive_nonisolating_data('act'),
+    doses_per_100=lambda n: covidlive_doses_per_100('act', POP_OF_ACT, 40000, n),
+    dose_rates=[('2021-09-01', 1.4), ('2021-10-01', 1.6), (None, 1.8)],
+    start_plot=np.datetime64('2021-08-10'),
+    R_ymax=3,
+    cases_ymax=1_000,
+    linear_ymax=40,
+    legend_order=[1, 2, 3, 4, 5, 6, 0],
+    legend_order_vax=[1, 3, 2, 4, 5, 6, 7, 0],
+    rollout_name="ACT",
+    region="the Australian Capital Territory",
+    total_cases_format=lambda n: f"{n/1000:.1f}k",
+    bands=[
+        dict(
+            start=ACT_LOCKDOWN,
+            end=ACT_END_LOCKDOWN,
+            color="red",
+            alpha=0.45,
+            label="Lockdown",
+        ),
+    ],
+    fade=dict(start=ACT_END_LOCKDOWN, days=10, color="red", alpha=0.45),
+    runs=[[], ['vax']],
+)
+
+NZ = dict(
+    prefix='COVID_NZ',
+    stats_file='latest_nz_stats.json',
+    timezone=('NZ', 'NZST'),
+    population=POP_OF_AUCKLAND,
+    cases=nz_midnight_to_midnight_data,
+    doses_per_100=lambda n: owid_doses_per_hundred("New Zealand")[-5 * n:],
+    dose_rates=[('2021-09-01', 1.0), ('2021-10-01', 1.6), (None, 1.8)],
+    start_plot=np.datetime64('2021-08-16'),
+    fit_x0=-10,
+    R_ymax=4,
+    cases_ymax=10_000,
+    linear_ymax=160,
+    legend_order=[2, 3, 4, 5, 6, 7, 0, 1],
+    legend_order_vax=[2, 3, 4, 5, 6, 7, 8, 0, 1],
+    rollout_name="New Zealand",
+    region="New Zealand",
+    restrictions_name="Auckland alert level",
+    total_cases_format=lambda n: f"{n:.0f}",
+    bands=nz_bands,
+    fade=nz_fade,
+    runs=[[], ['vax']],
+)
+
+JURISDICTIONS = {
+    'nsw': NSW,
+    'vic-2021': VIC,
+    'act': ACT,
+    'nz': NZ,
+}
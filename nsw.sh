@@ -1,15 +1,15 @@
 #! /bin/bash
 set -e
 export MPLBACKEND=Agg
-python nsw.py
-# python nsw.py noniso
-python nsw.py vax
-# python nsw.py accel_vax
-for i in {0..11}
-do
-   python nsw.py $i
-done
-python nsw.py others
-python nsw.py concern
-# python nsw.py bipartite
-python nsw_vax.py
+
+# Keep numpy, scipy, matplotlib etc imported between runs, see worker.py:
+python worker.py start
+trap 'python worker.py stop' EXIT
+
+# All of NSW's runs (statewide, vax, LGAs etc), in parallel and sharing downloaded data.
+# See reff.py and jurisdictions.py:
+python worker.py run reff.py nsw
+# python worker.py run nsw.py noniso
+# python worker.py run nsw.py accel_vax
+# python worker.py run nsw.py bipartite
+python worker.py run nsw_vax.py
@@ -0,0 +1,109 @@
+# Reader for NYT's us-counties.csv, and Census county population estimates, for
+# covid.py's county mode. The counties file has a row per county per day, so is much
+# larger than the states file. It's parsed in chunks straight into dense county × date
+# int32 matrices of cumulative cases and deaths, rather than building per-county lists.
+#
+# Usage:
+#
+#     dates, counties, cases, deaths = nyt_counties.read_counties(csv_file)
+#     cases[list(counties).index('Cook, Illinois')]
+#     populations = nyt_counties.county_populations(
+#         counties, nyt_counties.read_populations(census_csv_file)
+#     )
+
+import numpy as np
+import pandas as pd
+
+NYT_REPO_URL = "https://raw.githubusercontent.com/nytimes/covid-19-data/master"
+COUNTIES_URL = f"{NYT_REPO_URL}/us-counties.csv"
+
+CENSUS_URL = (
+    "https://www2.census.gov/programs-surveys/popest/datasets/2010-2019/counties/totals/"
+    "co-est2019-alldata.csv"
+)
+
+CHUNKSIZE = 200_000
+
+# NYT reports some areas that aren't single counties, and gives them no FIPS code. Those
+# with a well defined population are listed here with the counties they comprise:
+COMBINED_AREAS = {
+    'New York City, New York': [36005, 36047, 36061, 36081, 36085],
+}
+
+
+def read_counties(csv_file, ignore_states=()):
+    """Return (dates, counties, cases, deaths), where counties is a dict of {'County,
+    State': FIPS code} (0 if there isn't one) in row order, and cases and deaths are
+    int32 arrays of shape (len(counties), len(dates)) of cumulative counts, zero before a
+    county's first report and carried forward over any gaps after it"""
+    codes = {}
+    counties = {}
+    chunks = []
+    for chunk in pd.read_csv(
+        csv_file,
+        usecols=['date', 'county', 'state', 'fips', 'cases', 'deaths'],
+        dtype={'county': str, 'state': str},
+        chunksize=CHUNKSIZE,
+    ):
+        chunk = chunk[~chunk['state'].isin(ignore_states)]
+        names = chunk['county'] + ', ' + chunk['state']
+        # Assign each new county the next row of the matrix:
+        new = ~names.isin(codes.keys()) & ~names.duplicated()
+        for name, fips in zip(names[new], chunk['fips'][new].fillna(0)):
+            codes[name] = len(codes)
+            counties[name] = int(fips)
+        chunks.append(
+            (
+                names.map(codes).to_numpy(dtype=np.int32),
+                pd.to_datetime(chunk['date'], format='%Y-%m-%d').to_numpy(
+                    'datetime64[D]'
+                ),
+                chunk['cases'].fillna(0).to_numpy(dtype=np.int32),
+                chunk['deaths'].fillna(0).to_numpy(dtype=np.int32),
+            )
+        )
+
+    rows, row_dates, row_cases, row_deaths = [np.concatenate(a) for a in zip(*chunks)]
+    first_date = row_dates.min()
+    dates = np.arange(first_date, row_dates.max() + 1)
+    columns = (row_dates - first_date).astype(int)
+
+    cases = np.zeros((len(codes), len(dates)), dtype=np.int32)
+    deaths = np.zeros((len(codes), len(dates)), dtype=np.int32)
+    cases[rows, columns] = row_cases
+    deaths[rows, columns] = row_deaths
+
+    # Carry counts forward over any days missing after a county's first report:
+    reported = np.zeros(cases.shape, dtype=bool)
+    reported[rows, columns] = True
+    last_report = np.where(reported, np.arange(len(dates)), 0)
+    np.maximum.accumulate(last_report, axis=1, out=last_report)
+    cases = np.take_along_axis(cases, last_report, axis=1)
+    deaths = np.take_along_axis(deaths, last_report, axis=1)
+
+    # Like the states data, skip the first day:
+    return dates[1:], counties, cases[:, 1:], deaths[:, 1:]
+
+
+def read_populations(csv_file):
+    """Return a dict of {FIPS code: population in millions} for all counties, from the
+    Census county population estimates file"""
+    df = pd.read_csv(
+        csv_file,
+        usecols=['SUMLEV', 'STATE', 'COUNTY', 'POPESTIMATE2019'],
+        encoding='latin-1',
+    )
+    df = df[df['SUMLEV'] == 50]
+    return dict(zip(df['STATE'] * 1000 + df['COUNTY'], df['POPESTIMATE2019'] / 1e6))
+
+
+def county_populations(counties, populations_by_fips):
+    """Return a dict of populations in millions for the given counties, as returned by
+    read_counties(). Counties without a known population are omitted."""
+    populations = {}
+    for name, fips in counties.items():
+        if name in COMBINED_AREAS:
+            populations[name] = sum(populations_by_fips[f] for f in COMBINED_AREAS[name])
+        elif fips in populations_by_fips:
+            populations[name] = populations_by_fips[fips]
+    return populations
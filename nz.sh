@@ -1,6 +1,11 @@
 #! /bin/bash
 set -e
 export MPLBACKEND=Agg
-python nz.py
-python nz.py vax
-python nz_vax.py
+
+# Keep numpy, scipy, matplotlib etc imported between runs, see worker.py:
+python worker.py start
+trap 'python worker.py stop' EXIT
+
+# Both runs, in parallel and sharing downloaded data. See reff.py:
+python worker.py run reff.py nz
+python worker.py run nz_vax.py
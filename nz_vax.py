@@ -1,10 +1,12 @@
 import numpy as np
-import pandas as pd
 from datetime import datetime
 import matplotlib.units as munits
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 
+import owid
+import svgmin
+
 converter = mdates.ConciseDateConverter()
 
 munits.registry[np.datetime64] = converter
@@ -20,12 +22,10 @@ def seven_day_average(data):
 
 
 def get_data():
-    REPO_URL = "https://raw.githubusercontent.com/owid/covid-19-data/master"
-    DATA_DIR = "public/data/vaccinations"
-    df = pd.read_csv(f"{REPO_URL}/{DATA_DIR}/vaccinations.csv")
-    df = df[df['location']=="New Zealand"]
-    dates = np.array([np.datetime64(d) for d in df['date']])
-    daily_doses_per_100 = np.diff(df['total_vaccinations_per_hundred'], prepend=0)
+    COLUMN = 'total_vaccinations_per_hundred'
+    data = owid.read_vaccinations([COLUMN], locations=["New Zealand"])["New Zealand"]
+    dates = data['dates']
+    daily_doses_per_100 = np.diff(data[COLUMN].astype(float), prepend=0)
     # Remove NaNs from the dataset, duplicate prev. day instead
     for i, val in enumerate(daily_doses_per_100):
         if np.isnan(val):
@@ -89,6 +89,6 @@ plt.title(f"NZ cumulative vaccinations per capita")
 
 plt.tight_layout()
 
-plt.savefig("COVID_NZ_projected_doses.svg")
+svgmin.savefig(plt, "COVID_NZ_projected_doses.svg")
 plt.savefig("COVID_NZ_projected_doses.png", dpi=133)
 plt.show()
@@ -0,0 +1,123 @@
+# Reader for OWID's vaccinations.csv. Only loads the requested columns and locations,
+# with compact dtypes, and caches what it parsed so the next script to need the same data
+# doesn't download and parse it all again. The cache accumulates the columns and locations
+# each script asks for, so scripts needing different ones don't evict each other's.
+#
+# Usage:
+#
+#     data = owid.read_vaccinations(['people_vaccinated'], locations=['Australia'])
+#     data['Australia']['dates'], data['Australia']['people_vaccinated']
+
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_URL = "https://raw.githubusercontent.com/owid/covid-19-data/master"
+DATA_DIR = "public/data/vaccinations"
+VACCINATIONS_URL = f"{REPO_URL}/{DATA_DIR}/vaccinations.csv"
+
+CACHE_FILE = Path('.cache', 'owid_vaccinations.npz')
+CACHE_MAX_AGE = 6 * 60 * 60  # seconds
+
+CHUNKSIZE = 50_000
+
+
+def _dtype(column):
+    # Per-hundred figures don't need double precision, but counts can be in the billions
+    # and can be missing, so those stay float64 with NaN for missing:
+    return np.float32 if column.endswith('per_hundred') else np.float64
+
+
+def _parse(csv_file, columns, locations):
+    """Read the CSV in chunks, keeping only the given columns and locations, and return
+    a dict of column arrays, with 'location' and 'date' columns too"""
+    chunks = []
+    for chunk in pd.read_csv(
+        csv_file,
+        usecols=['location', 'date'] + columns,
+        dtype={column: _dtype(column) for column in columns},
+        chunksize=CHUNKSIZE,
+    ):
+        if locations is not None:
+            chunk = chunk[chunk['location'].isin(locations)]
+        chunks.append(chunk)
+    df = pd.concat(chunks, ignore_index=True)
+    data = {
+        'location': df['location'].to_numpy(dtype=str),
+        'date': pd.to_datetime(df['date'], format='%Y-%m-%d').to_numpy('datetime64[D]'),
+    }
+    for column in columns:
+        data[column] = df[column].to_numpy()
+    return data
+
+
+def _load_cache():
+    """Return the cached data, or None if there isn't any, and whether it's recent
+    enough to use"""
+    try:
+        fresh = time.time() - CACHE_FILE.stat().st_mtime <= CACHE_MAX_AGE
+        with np.load(CACHE_FILE) as cache:
+            data = {name: cache[name] for name in cache.files}
+    except (OSError, ValueError):
+        return None, False
+    return data, fresh
+
+
+def _cached_columns(data):
+    return [name for name in data if name not in ['location', 'date', 'all_locations']]
+
+
+def _has(data, columns, locations):
+    """Return whether cached data has the given columns and locations"""
+    if not set(columns) <= set(data):
+        return False
+    if locations is not None and not data['all_locations']:
+        if not set(locations) <= set(data['location']):
+            return False
+    return True
+
+
+def _save_cache(data, all_locations):
+    CACHE_FILE.parent.mkdir(exist_ok=True)
+    # Write to a temporary file and rename, so a reader never sees a partial file:
+    tmp = CACHE_FILE.with_name(f'{CACHE_FILE.stem}.{os.getpid()}.tmp.npz')
+    np.savez(tmp, all_locations=all_locations, **data)
+    tmp.replace(CACHE_FILE)
+
+
+def read_vaccinations(columns, locations=None, csv_file=None):
+    """Return OWID vaccination data as a dict {location: {'dates': array, column: array,
+    ...}} for the given columns and locations (all locations if None). If csv_file is
+    given (a path or file object), parse it instead of using the cache or downloading.
+    Whatever is parsed is cached for subsequent calls."""
+    cache, fresh = _load_cache()
+    if csv_file is None and fresh and _has(cache, columns, locations):
+        data = cache
+    else:
+        # Also parse whatever is already cached, so that scripts needing different
+        # columns or locations add to the cache rather than evicting each other's:
+        parse_columns, parse_locations = list(columns), locations
+        if cache is not None:
+            parse_columns += [c for c in _cached_columns(cache) if c not in columns]
+            if locations is not None and not cache['all_locations']:
+                parse_locations = sorted(set(locations) | set(cache['location']))
+            elif cache['all_locations']:
+                parse_locations = None
+        data = _parse(csv_file or VACCINATIONS_URL, parse_columns, parse_locations)
+        _save_cache(data, all_locations=parse_locations is None)
+
+    # Split into per-location arrays. The file is sorted by location and then date, and
+    # a stable sort keeps it that way:
+    order = np.argsort(data['location'], kind='stable')
+    names, starts = np.unique(data['location'][order], return_index=True)
+    result = {}
+    for name, rows in zip(names, np.split(order, starts[1:])):
+        if locations is not None and name not in locations:
+            continue
+        result[str(name)] = {'dates': data['date'][rows]}
+        for column in columns:
+            result[str(name)][column] = data[column][rows]
+    return result
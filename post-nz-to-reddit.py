@@ -1,12 +1,12 @@
 import sys
-import json
+import math
 from datetime import datetime, timedelta
-from pathlib import Path
 from textwrap import dedent
 
-import numpy as np
 import praw
 
+import stats_store
+
 
 def th(n):
     """Ordinal of an integer, eg "1st", "2nd" etc"""
@@ -17,7 +17,7 @@ def th(n):
 
 def make_title():
     """Title of the reddit post"""
-    stats = json.loads(Path("latest_nz_stats.json").read_text())
+    stats = stats_store.load("latest_nz_stats.json")
     today = stats['today']  # The date of the last update - should be today
     R_eff = stats['R_eff']
     u_R_eff = stats['u_R_eff']
@@ -32,7 +32,7 @@ def make_title():
     return " ".join(title.split())
 
 def make_comment():
-    stats = json.loads(Path("latest_nz_stats.json").read_text())
+    stats = stats_store.load("latest_nz_stats.json")
 
     proj_lines = [
         "day  cases  68% range",
@@ -51,7 +51,8 @@ def make_comment():
 
     proj_lines = "\n        ".join(proj_lines)
 
-    doubling_time = 5 * np.log(2) / np.log(stats['R_eff'])
+    R_eff = stats['R_eff']
+    doubling_time = 5 * math.log(2) / math.log(R_eff) if R_eff != 1 else math.inf
 
     this_script_url = (
         "https://github.com/chrisjbillington/chrisjbillington.github.io/"
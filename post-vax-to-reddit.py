@@ -1,10 +1,10 @@
 import sys
-import json
 from datetime import datetime
-from pathlib import Path
 
 import praw
 
+import stats_store
+
 
 def th(n):
     """Ordinal of an integer, eg "1st", "2nd" etc"""
@@ -15,7 +15,7 @@ def th(n):
 
 def make_title():
     """Title of the reddit post"""
-    vax_stats = json.loads(Path("latest_vax_stats.json").read_text())
+    vax_stats = stats_store.load("latest_vax_stats.json")
     latest_cumulative_doses = vax_stats['latest_cumulative_doses']
     latest_daily_doses = vax_stats['latest_daily_doses']
     phase_C_date = vax_stats['phase_C_date']
@@ -1,12 +1,12 @@
 import sys
-import json
+import math
 from datetime import datetime, timedelta
-from pathlib import Path
 from textwrap import dedent
 
-import numpy as np
 import tweepy
 
+import stats_store
+
 
 def th(n):
     """Ordinal of an integer, eg "1st", "2nd" etc"""
@@ -21,7 +21,7 @@ def fmt(a):
 
 
 def stats():
-    stats = json.loads(Path("latest_vic_stats.json").read_text())
+    stats = stats_store.load("latest_vic_stats.json")
     today = stats['today']  # The date of the last update - should be today
     R_eff = stats['R_eff']
     u_R_eff = stats['u_R_eff']
@@ -61,7 +61,7 @@ def tweet_2_text():
     return fmt(COMMENT_TEXT)
 
 def tweet_3_text():
-    stats = json.loads(Path("latest_vic_stats.json").read_text())
+    stats = stats_store.load("latest_vic_stats.json")
 
     proj_lines = [
         "day  cases  68% range",
@@ -78,7 +78,8 @@ def tweet_3_text():
 
     proj_lines = "\n    ".join(proj_lines)
 
-    doubling_time = 5 * np.log(2) / np.log(stats['R_eff'])
+    R_eff = stats['R_eff']
+    doubling_time = 5 * math.log(2) / math.log(R_eff) if R_eff != 1 else math.inf
 
     doubling_or_halving = "Doubling" if doubling_time > 0 else "Halving"
 
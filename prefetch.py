@@ -0,0 +1,55 @@
+# Concurrent downloading of a script's data sources, so that startup takes as long as
+# the slowest single download rather than the sum of all of them.
+#
+# Usage:
+#
+#     SOURCES = {'cases': CASES_URL, 'vax': (VAX_URL, 120)}  # optional per-source timeout
+#     for name, data in prefetch.prefetch(SOURCES):
+#         ...parse data (bytes) while the remaining downloads continue...
+
+import time
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_TIMEOUT = 60  # seconds
+DEFAULT_RETRIES = 3
+
+
+def fetch(url, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, headers=None):
+    """Download a URL and return the response body as bytes. Retries with exponential
+    backoff on timeouts, connection errors and server errors, but not on client errors
+    like 404, which won't fix themselves."""
+    request = urllib.request.Request(url, headers=headers or {})
+    for attempt in range(retries + 1):
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code < 500 or attempt == retries:
+                raise
+            error = e
+        except (urllib.error.URLError, OSError) as e:
+            if attempt == retries:
+                raise
+            error = e
+        delay = 2 ** attempt
+        print(f"Error downloading {url}: {error}. Retrying in {delay}s")
+        time.sleep(delay)
+
+
+def prefetch(sources, max_workers=8, retries=DEFAULT_RETRIES, headers=None):
+    """Download all sources concurrently. sources is a dict of {name: url} or {name:
+    (url, timeout)}. Yields (name, data) tuples, with data as bytes, in the order the
+    downloads complete. If any download fails after retries, its exception is raised
+    when it would have been yielded."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for name, source in sources.items():
+            url, timeout = source if isinstance(source, tuple) else (source, None)
+            future = executor.submit(
+                fetch, url, timeout or DEFAULT_TIMEOUT, retries, headers
+            )
+            futures[future] = name
+        for future in as_completed(futures):
+            yield futures[future], future.result()
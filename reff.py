@@ -0,0 +1,798 @@
+# R_eff estimates and case projections for each jurisdiction in jurisdictions.py,
+# plotted over its restrictions timeline along with daily cases. Projections are either a
+# simple exponential trend, or with 'vax', a stochastic SIR model including the projected
+# vaccine rollout. nsw.py, vic-2021.py, act.py and nz.py are entry points for one run of
+# their jurisdiction each.
+#
+# Usage:
+#
+#     python nsw.py vax                # One run of one jurisdiction
+#     python reff.py                   # Every run of every jurisdiction
+#     python reff.py nsw act           # Every run of the given jurisdictions
+#
+# The runs a jurisdiction has are listed in its config. Arguments of a run are 'vax' for
+# the vaccine projection, 'noniso' for non-isolating cases only, a subregion ('others',
+# 'concern' or an integer) if the jurisdiction has them, and 'old N' to remake the
+# projection from N days after the jurisdiction's old_start.
+#
+# The batch runner loads every data source the runs need once, in this process (the
+# loaders in jurisdictions.py are cached), and then forks each run into its own process,
+# up to one per CPU at a time, so that runs share downloaded data and imported modules
+# instead of each paying for them again. Each run is seeded the same as when run on its
+# own, so its outputs are the same either way. Runs of the same jurisdiction only update
+# their own keys in its stats file (see stats_store.py), so can run concurrently.
+
+import os
+import sys
+import multiprocessing
+import multiprocessing.connection
+from datetime import datetime
+from pathlib import Path
+
+from scipy.optimize import curve_fit
+import numpy as np
+from numpy import convolve
+import matplotlib.pyplot as plt
+import matplotlib.units as munits
+import matplotlib.dates as mdates
+import matplotlib.ticker as mticker
+
+import figure_manifest
+import figure_variants
+import jurisdictions
+import restrictions
+import stats_store
+import svgmin
+from jurisdictions import JURISDICTIONS
+
+converter = mdates.ConciseDateConverter()
+
+munits.registry[np.datetime64] = converter
+munits.registry[datetime.date] = converter
+munits.registry[datetime] = converter
+
+tau = 5  # reproductive time of the virus in days
+
+SMOOTHING = 4
+PADDING = 3 * int(round(3 * SMOOTHING))
+N_monte_carlo = 1000
+
+
+def gaussian_smoothing(data, pts):
+    """gaussian smooth an array by given number of points"""
+    x = np.arange(-4 * pts, 4 * pts + 1, 1)
+    kernel = np.exp(-(x ** 2) / (2 * pts ** 2))
+    smoothed = convolve(data, kernel, mode='same')
+    normalisation = convolve(np.ones_like(data), kernel, mode='same')
+    return smoothed / normalisation
+
+
+def partial_derivatives(function, x, params, u_params):
+    model_at_center = function(x, *params)
+    partial_derivatives = []
+    for i, (param, u_param) in enumerate(zip(params, u_params)):
+        d_param = u_param / 1e6
+        params_with_partial_differential = np.zeros(len(params))
+        params_with_partial_differential[:] = params[:]
+        params_with_partial_differential[i] = param + d_param
+        model_at_partial_differential = function(x, *params_with_partial_differential)
+        partial_derivative = (model_at_partial_differential - model_at_center) / d_param
+        partial_derivatives.append(partial_derivative)
+    return partial_derivatives
+
+
+def model_uncertainty(function, x, params, covariance):
+    u_params = [np.sqrt(abs(covariance[i, i])) for i in range(len(params))]
+    derivs = partial_derivatives(function, x, params, u_params)
+    squared_model_uncertainty = sum(
+        derivs[i] * derivs[j] * covariance[i, j]
+        for i in range(len(params))
+        for j in range(len(params))
+    )
+    return np.sqrt(squared_model_uncertainty)
+
+
+def get_confidence_interval(data, confidence_interval=0.68, axis=0):
+    """Return median (lower, upper) for a confidence interval of the data along the
+    given axis"""
+    n = data.shape[axis]
+    ix_median = n // 2
+    ix_lower = int((n * (1 - confidence_interval)) // 2)
+    ix_upper = n - ix_lower
+    sorted_data = np.sort(data, axis=axis)
+    median = sorted_data.take(ix_median, axis=axis)
+    lower = sorted_data.take(ix_lower, axis=axis)
+    upper = sorted_data.take(ix_upper, axis=axis)
+    return median, (lower, upper)
+
+
+def stochastic_sir(
+    initial_caseload,
+    initial_cumulative_cases,
+    initial_R_eff,
+    tau,
+    population_size,
+    vaccine_immunity,
+    n_days,
+    n_trials=10000,
+    cov_caseload_R_eff=None,
+):
+    """Run n trials of a stochastic SIR model, starting from an initial caseload and
+    cumulative cases, for a population of the given size, an initial observed R_eff
+    (i.e. the actual observed R_eff including the effects of the current level of
+    immunity), a mean generation time tau, and an array `vaccine_immunity` for the
+    fraction of the population that is immune over time. Must have length n_days, or can
+    be a constant. Runs n_trials separate trials for n_days each. cov_caseload_R_eff, if
+    given, can be a covariance matrix representing the uncertainty in the initial
+    caseload and R_eff. It will be used to randomly draw an initial caseload and R_eff
+    from a multivariate Gaussian distribution each trial. Returns the full dataset of
+    daily infections, cumulative infections, and R_eff over time, with the first axis of
+    each array being the trial number, and the second axis the day.
+    """
+    if not isinstance(vaccine_immunity, np.ndarray):
+        vaccine_immunity = np.full(n_days, vaccine_immunity)
+    # Our results dataset over all trials, will extract conficence intervals at the end.
+    trials_infected_today = np.zeros((n_trials, n_days))
+    trials_R_eff = np.zeros((n_trials, n_days))
+    for i in range(n_trials):
+        # print(f"trial {i}")
+        # Randomly choose an R_eff and caseload from the distribution
+        if cov_caseload_R_eff is not None:
+            caseload, R_eff = np.random.multivariate_normal(
+                [initial_caseload, initial_R_eff], cov_caseload_R_eff
+            )
+            R_eff = max(0.1, R_eff)
+            caseload = max(0, caseload)
+        else:
+            caseload, R_eff = initial_caseload, initial_R_eff
+        cumulative = initial_cumulative_cases
+        # First we back out an R0 from the R_eff and existing immunity. In this context,
+        # R0 is the rate of spread *including* the effects of restrictions and
+        # behavioural change, which are assumed constant here, but excluding immunity
+        # due to vaccines or previous infection.
+        R0 = R_eff / ((1 - vaccine_immunity[0]) * (1 - cumulative / population_size))
+        # Initial pops in each compartment
+        infectious = int(round(caseload * tau / R_eff))
+        recovered = cumulative - infectious
+        for j, vax_immune in enumerate(vaccine_immunity):
+            # vax_immune is as fraction of the population, recovered and infectious are
+            # in absolute nubmers so need to be normalised by population to get
+            # susceptible fraction
+            s = (1 - vax_immune) * (1 - (recovered + infectious) / population_size)
+            R_eff = s * R0
+            infected_today = np.random.poisson(infectious * R_eff / tau)
+            recovered_today = np.random.binomial(infectious, 1 / tau)
+            infectious += infected_today - recovered_today
+            recovered += recovered_today
+            cumulative += infected_today
+            trials_infected_today[i, j] = infected_today
+            trials_R_eff[i, j] = R_eff
+
+    cumulative_infected = trials_infected_today.cumsum(axis=1) + initial_cumulative_cases
+
+    return trials_infected_today, cumulative_infected, trials_R_eff
+
+
+def projected_vaccine_immune_population(t, historical_doses_per_100, today, dose_rates):
+    """compute projected future susceptible population, given an array
+    historical_doses_per_100 for cumulative doses doses per 100 population prior to and
+    including today (length doesn't matter, so long as it goes back longer than
+    VAX_ONSET_MU plus 3 * VAX_ONSET_SIGMA), and assuming a certain vaccine efficacy and
+    a rollout schedule dose_rates of [(until date, daily doses per 100), ..., (None,
+    daily doses per 100)]"""
+
+    # We assume vaccine effectiveness after each dose ramps up the integral of a Gaussian
+    # with the following mean and stddev in days:
+    VAX_ONSET_MU = 10.5
+    VAX_ONSET_SIGMA = 3.5
+
+    # Days from today until each rate stops applying:
+    schedule = [
+        (None if until is None else (np.datetime64(until) - today).astype(int), rate)
+        for until, rate in dose_rates
+    ]
+
+    doses_per_100 = np.zeros_like(t)
+    doses_per_100[0] = historical_doses_per_100[-1]
+    for i in range(1, len(doses_per_100)):
+        rate = next(rate for until, rate in schedule if until is None or i < until)
+        doses_per_100[i] = doses_per_100[i - 1] + rate
+
+    doses_per_100 = np.clip(doses_per_100, 0, 85 * 2)
+
+    all_doses_per_100 = np.concatenate([historical_doses_per_100, doses_per_100])
+    # The "prepend=0" makes it as if all the doses in the initial day were just
+    # administered all at once, but as long as historical_doses_per_100 is long enough
+    # for it to have taken full effect, it doesn't matter.
+    daily = np.diff(all_doses_per_100, prepend=0)
+
+    # convolve daily doses with a transfer function for delayed effectiveness of vaccnes
+    pts = int(VAX_ONSET_MU + 3 * VAX_ONSET_SIGMA)
+    x = np.arange(-pts, pts + 1, 1)
+    kernel = np.exp(-((x - VAX_ONSET_MU) ** 2) / (2 * VAX_ONSET_SIGMA ** 2))
+    kernel /= kernel.sum()
+    convolved = convolve(daily, kernel, mode='same')
+
+    effective_doses_per_100 = convolved.cumsum()
+
+    immune = 0.4 * effective_doses_per_100[len(historical_doses_per_100):] / 100
+
+    return immune
+
+
+def exponential(x, A, k):
+    return A * np.exp(k * x)
+
+
+def estimate_R_eff(new, fit_pts, x0):
+    """Smooth daily cases and compute R_eff from the smoothed growth rate, along with
+    the variance of each and their covariance from a Monte-Carlo of the data with noise.
+    Returns new_smoothed, R, variance_new_smoothed, variance_R, cov_R_new_smoothed, and
+    SHOT_NOISE_FACTOR"""
+    new_padded = np.zeros(len(new) + PADDING)
+    new_padded[: -PADDING] = new
+
+    # Smoothing requires padding to give sensible results at the right edge. Compute an
+    # exponential fit to daily cases over the last fortnight, and pad the data with the
+    # fit results prior to smoothing.
+
+    delta_x = 1
+    fit_x = np.arange(-fit_pts, 0)
+    fit_weights = 1 / (1 + np.exp(-(fit_x - x0) / delta_x))
+    pad_x = np.arange(PADDING)
+
+    def clip_params(params):
+        # Clip exponential fit params to be within a reasonable range to suppress when
+        # unlucky points lead us to an unrealistic exponential blowup. Modifies array
+        # in-place.
+        R_CLIP = 5 # Limit the exponential fits to a maximum of R=5
+        params[0] = min(params[0], 2 * new[-fit_pts:].max() + 1)
+        params[1] = min(params[1], np.log(R_CLIP ** (1 / tau)))
+
+    params, cov = curve_fit(exponential, fit_x, new[-fit_pts:], sigma=1 / fit_weights)
+    clip_params(params)
+    fit = exponential(pad_x, *params).clip(0.1, None)
+
+    new_padded[-PADDING:] = fit
+    new_smoothed = gaussian_smoothing(new_padded, SMOOTHING)[: -PADDING]
+    R = (new_smoothed[1:] / new_smoothed[:-1]) ** tau
+
+    variance_R = np.zeros_like(R)
+    variance_new_smoothed = np.zeros_like(new_smoothed)
+    cov_R_new_smoothed = np.zeros_like(R)
+
+    # Uncertainty in new cases is whatever multiple of Poisson noise puts them on
+    # average 1 sigma away from the smoothed new cases curve. Only use data when smoothed
+    # data > 1.0
+    valid = new_smoothed > 1.0
+    if valid.sum():
+        SHOT_NOISE_FACTOR = np.sqrt(
+            ((new[valid] - new_smoothed[valid]) ** 2 / new_smoothed[valid]).mean()
+        )
+    else:
+        SHOT_NOISE_FACTOR = 1.0
+    u_new = SHOT_NOISE_FACTOR * np.sqrt(new)
+
+    # Monte-carlo of the above with noise to compute variance in R, new_smoothed,
+    # and their covariance:
+
+    for i in range(N_monte_carlo):
+        new_with_noise = np.random.normal(new, u_new).clip(0.1, None)
+        params, cov = curve_fit(
+            exponential,
+            fit_x,
+            new_with_noise[-fit_pts:],
+            sigma=1 / fit_weights,
+            maxfev=20000,
+        )
+        clip_params(params)
+        scenario_params = np.random.multivariate_normal(params, cov)
+        clip_params(scenario_params)
+        fit = exponential(pad_x, *scenario_params).clip(0.1, None)
+
+        new_padded[:-PADDING] = new_with_noise
+        new_padded[-PADDING:] = fit
+        new_smoothed_noisy = gaussian_smoothing(new_padded, SMOOTHING)[:-PADDING]
+        variance_new_smoothed += (
+            (new_smoothed_noisy - new_smoothed) ** 2 / N_monte_carlo
+        )
+        R_noisy = (new_smoothed_noisy[1:] / new_smoothed_noisy[:-1]) ** tau
+        variance_R += (R_noisy - R) ** 2 / N_monte_carlo
+        cov_R_new_smoothed += (
+            (new_smoothed_noisy[1:] - new_smoothed[1:]) * (R_noisy - R) / N_monte_carlo
+        )
+
+    return (
+        new_smoothed,
+        R,
+        variance_new_smoothed,
+        variance_R,
+        cov_R_new_smoothed,
+        SHOT_NOISE_FACTOR,
+    )
+
+
+def _resolve(value, dates):
+    """Config values may be functions of the dates of the data"""
+    return value(dates) if callable(value) else value
+
+
+def parse_args(config, args):
+    """Return a dict of options for a run with the given arguments"""
+    options = {
+        'vax': 'vax' in args,
+        'noniso': 'noniso' in args,
+        'subregion': None,
+        'old': None,
+    }
+    remaining = [arg for arg in args if arg not in ('vax', 'noniso')]
+    if 'old_start' in config and remaining[:1] == ['old'] and len(remaining) == 2:
+        options['old'] = int(remaining[1])
+        options['vax'] = True
+    elif 'subregion' in config and len(remaining) == 1:
+        options['subregion'] = remaining[0]
+    elif remaining:
+        raise ValueError(args)
+    return options
+
+
+def load(config, options):
+    """Return dates, daily cases and cumulative doses per 100 for a run, and the region,
+    filename suffix and stats key suffix (None for no stats) its cases are for"""
+    if options['subregion'] is not None:
+        dates, new, region, suffix, stats_suffix = config['subregion'](
+            options['subregion']
+        )
+    elif options['noniso']:
+        dates, new = config['nonisolating_cases']()
+        region, suffix, stats_suffix = config['region'], '_noniso', '_noniso'
+    else:
+        dates, new = config['cases']()
+        region, suffix, stats_suffix = config['region'], '', ''
+    doses_per_100 = config['doses_per_100'](len(dates))
+    return dates, new, doses_per_100, region, suffix, stats_suffix
+
+
+def run(name, args):
+    """Compute, plot and save R_eff and projections for the jurisdiction with the given
+    name, with the given run arguments"""
+    config = JURISDICTIONS[name]
+    options = parse_args(config, args)
+    VAX = options['vax']
+    NONISOLATING = options['noniso']
+    SUBREGION = options['subregion'] is not None
+    OLD = options['old'] is not None
+
+    # Our uncertainty calculations are stochastic. Make them reproducible, at least:
+    np.random.seed(0)
+
+    figure_manifest.use_script(name, __file__, jurisdictions.__file__)
+
+    dates, new, doses_per_100, region, suffix, stats_suffix = load(config, options)
+
+    all_dates = dates
+    all_new = new
+
+    if OLD:
+        end = config['old_start'] + options['old']
+        dates = dates[:end]
+        new = new[:end]
+        doses_per_100 = doses_per_100[:end]
+
+    START_PLOT = config['start_plot']
+    END_PLOT = np.datetime64('2022-01-01') if VAX else dates[-1] + 28
+
+    FIT_PTS = min(20, len(dates[dates >= START_PLOT]))
+    (
+        new_smoothed,
+        R,
+        variance_new_smoothed,
+        variance_R,
+        cov_R_new_smoothed,
+        SHOT_NOISE_FACTOR,
+    ) = estimate_R_eff(new, FIT_PTS, config.get('fit_x0', -14))
+
+    u_R = np.sqrt(variance_R)
+    R_upper = R + u_R
+    R_lower = R - u_R
+
+    u_new_smoothed = np.sqrt(variance_new_smoothed)
+    new_smoothed_upper = new_smoothed + u_new_smoothed
+    new_smoothed_lower = new_smoothed - u_new_smoothed
+
+    R_upper = R_upper.clip(0, 10)
+    R_lower = R_lower.clip(0, 10)
+    R = R.clip(0, None)
+
+    new_smoothed_upper = new_smoothed_upper.clip(0, None)
+    new_smoothed_lower = new_smoothed_lower.clip(0, None)
+    new_smoothed = new_smoothed.clip(0, None)
+
+    # Projection of daily case numbers:
+    days_projection = (np.datetime64('2022-02-01') - dates[-1]).astype(int)
+    t_projection = np.linspace(0, days_projection, days_projection + 1)
+
+    # Construct a covariance matrix for the latest estimate in new_smoothed and R:
+    cov = np.array(
+        [
+            [variance_new_smoothed[-1], cov_R_new_smoothed[-1]],
+            [cov_R_new_smoothed[-1], variance_R[-1]],
+        ]
+    )
+
+    if VAX:
+        # Fancy stochastic SIR model
+        trials_infected_today, trials_cumulative, trials_R_eff = stochastic_sir(
+            initial_caseload=new_smoothed[-1],
+            initial_cumulative_cases=new.sum(),
+            initial_R_eff=R[-1],
+            tau=tau,
+            population_size=config['population'],
+            vaccine_immunity=projected_vaccine_immune_population(
+                t_projection,
+                doses_per_100,
+                dates[-1],
+                _resolve(config['dose_rates'], dates),
+            ),
+            n_days=days_projection + 1,
+            n_trials=1000 if OLD else 10000, # just save some time if we're animating
+            cov_caseload_R_eff=cov,
+        )
+
+        new_projection, (
+            new_projection_lower,
+            new_projection_upper,
+        ) = get_confidence_interval(trials_infected_today)
+
+        cumulative_median, (
+            cumulative_lower,
+            cumulative_upper,
+        ) = get_confidence_interval(trials_cumulative)
+
+        R_eff_projection, (
+            R_eff_projection_lower,
+            R_eff_projection_upper,
+        ) = get_confidence_interval(trials_R_eff)
+
+        total_cases = cumulative_median[-1]
+        total_cases_lower = cumulative_lower[-1]
+        total_cases_upper = cumulative_upper[-1]
+
+    else:
+        # Simple model, no vaccines or community immunity
+        def log_projection_model(t, A, R):
+            return np.log(A * R ** (t / tau))
+
+        new_projection = np.exp(
+            log_projection_model(t_projection, new_smoothed[-1], R[-1])
+        )
+        log_new_projection_uncertainty = model_uncertainty(
+            log_projection_model, t_projection, (new_smoothed[-1], R[-1]), cov
+        )
+        new_projection_upper = np.exp(
+            np.log(new_projection) + log_new_projection_uncertainty
+        )
+        new_projection_lower = np.exp(
+            np.log(new_projection) - log_new_projection_uncertainty
+        )
+
+    fig1 = plt.figure(figsize=(10, 6))
+    ax1 = plt.axes()
+
+    restrictions.bands(ax1, _resolve(config['bands'], dates))
+    fade = _resolve(config.get('fade'), dates)
+    if fade is not None:
+        restrictions.fade(ax1, **fade)
+
+    ax1.fill_between(
+        dates[1:] + 1,
+        R,
+        label=R"$R_\mathrm{eff}$",
+        step='pre',
+        color='C0',
+    )
+
+    if VAX:
+        ax1.fill_between(
+            np.concatenate([dates[1:].astype(int), dates[-1].astype(int) + t_projection])
+            + 1,
+            np.concatenate([R_lower, R_eff_projection_lower]),
+            np.concatenate([R_upper, R_eff_projection_upper]),
+            label=R"$R_\mathrm{eff}$/projection uncertainty",
+            color='cyan',
+            edgecolor='blue',
+            alpha=0.2,
+            step='pre',
+            zorder=2,
+            hatch="////",
+        )
+        ax1.fill_between(
+            dates[-1].astype(int) + t_projection + 1,
+            R_eff_projection,
+            label=R"$R_\mathrm{eff}$ (projection)",
+            step='pre',
+            color='C0',
+            linewidth=0,
+            alpha=0.75
+        )
+    else:
+        ax1.fill_between(
+            dates[1:] + 1,
+            R_lower,
+            R_upper,
+            label=R"$R_\mathrm{eff}$ uncertainty",
+            color='cyan',
+            edgecolor='blue',
+            alpha=0.2,
+            step='pre',
+            zorder=2,
+            hatch="////",
+        )
+
+    ax1.axhline(1.0, color='k', linewidth=1)
+    ax1.axis(xmin=START_PLOT, xmax=END_PLOT, ymin=0, ymax=config['R_ymax'])
+    ax1.grid(True, linestyle=":", color='k', alpha=0.5)
+
+    ax1.set_ylabel(R"$R_\mathrm{eff}$")
+
+    u_R_latest = (R_upper[-1] - R_lower[-1]) / 2
+
+    R_eff_string = fR"$R_\mathrm{{eff}}={R[-1]:.02f} \pm {u_R_latest:.02f}$"
+
+    if VAX:
+        title_lines = [
+            f"Projected effect of {config['rollout_name']} vaccination rollout",
+            f"Starting from currently estimated {R_eff_string}",
+        ]
+    else:
+        restrictions_name = config.get('restrictions_name', "restriction levels")
+        title_lines = [
+            f"$R_\\mathrm{{eff}}$ in {region}, with {restrictions_name} and daily cases"
+            + (" (nonisolating cases only)" if NONISOLATING else ""),
+            f"Latest estimate: {R_eff_string}",
+        ]
+
+    ax1.set_title('\n'.join(title_lines))
+
+    ax1.yaxis.set_major_locator(mticker.MultipleLocator(0.25))
+    ax2 = ax1.twinx()
+    if OLD:
+        ax2.step(all_dates + 1, all_new + 0.02, color='purple', alpha=0.5)
+    ax2.step(dates + 1, new + 0.02, color='purple', label='Daily cases')
+    ax2.plot(
+        dates.astype(int) + 0.5,
+        new_smoothed,
+        color='magenta',
+        label='Daily cases (smoothed)',
+    )
+
+    ax2.fill_between(
+        dates.astype(int) + 0.5,
+        new_smoothed_lower,
+        new_smoothed_upper,
+        color='magenta',
+        alpha=0.3,
+        linewidth=0,
+        zorder=10,
+        label=f'Smoothing/{"projection" if VAX else "trend"} uncertainty',
+    )
+    ax2.plot(
+        dates[-1].astype(int) + 0.5 + t_projection,
+        new_projection.clip(0, 1e6),  # seen SVG rendering issues when this is big
+        color='magenta',
+        linestyle='--',
+        label=f'Daily cases ({"projection" if VAX else "trend"})',
+    )
+    ax2.fill_between(
+        dates[-1].astype(int) + 0.5 + t_projection,
+        new_projection_lower.clip(0, 1e6),  # seen SVG rendering issues when this is big
+        new_projection_upper.clip(0, 1e6),
+        color='magenta',
+        alpha=0.3,
+        linewidth=0,
+    )
+
+    ax2.set_ylabel(
+        f"Daily {'non-isolating' if NONISOLATING else 'confirmed'} cases (log scale)"
+    )
+
+    ax2.set_yscale('log')
+    ax2.axis(ymin=1, ymax=config['cases_ymax'])
+    fig1.tight_layout(pad=1.8)
+
+    handles, labels = ax1.get_legend_handles_labels()
+    handles2, labels2 = ax2.get_legend_handles_labels()
+
+    handles += handles2
+    labels += labels2
+    if VAX:
+        order = config['legend_order_vax']
+    else:
+        order = config['legend_order']
+    ax2.legend(
+        [handles[idx] for idx in order],
+        [labels[idx] for idx in order],
+        loc=config.get('legend_loc_vax', 'upper left') if VAX else 'upper left',
+        ncol=1 if VAX else 2,
+        prop={'size': 8},
+    )
+
+    ax2.yaxis.set_major_formatter(mticker.ScalarFormatter())
+    ax2.yaxis.set_minor_formatter(mticker.ScalarFormatter())
+    ax2.tick_params(axis='y', which='minor', labelsize='x-small')
+    plt.setp(ax2.get_yminorticklabels()[1::2], visible=False)
+    locator = mdates.DayLocator([1, 15] if VAX else [1, 5, 10, 15, 20, 25])
+    ax1.xaxis.set_major_locator(locator)
+    formatter = mdates.ConciseDateFormatter(locator, show_offset=False)
+    ax1.xaxis.set_major_formatter(formatter)
+
+    text = fig1.text(
+        0.99,
+        0.02,
+        f"@chrisbilbo | chrisbillington.net/{config['prefix']}",
+        size=8,
+        alpha=0.5,
+        color=(0, 0, 0.25),
+        fontfamily="monospace",
+        horizontalalignment="right"
+    )
+    text.set_bbox(dict(facecolor='white', alpha=0.8, linewidth=0))
+
+    if VAX:
+        fmt = config['total_cases_format']
+        total_cases_range = f"{fmt(total_cases_lower)}—{fmt(total_cases_upper)}"
+        text = fig1.text(
+            0.63,
+            0.83,
+            "\n".join(
+                [
+                    f"Projected total cases in outbreak:  {fmt(total_cases)}",
+                    f"                                  68% range:  {total_cases_range}",
+                ]
+            ),
+            fontsize='small',
+        )
+        text.set_bbox(dict(facecolor='white', alpha=0.8, linewidth=0))
+
+        suffix = '_vax'
+
+    def linear_scale(fig):
+        """Switch the cases axis to a linear scale, for the _linear variants"""
+        ax2.set_yscale('linear')
+        if VAX:
+            ymax = config.get('linear_ymax_vax', config['linear_ymax'])
+        else:
+            ymax = config['linear_ymax']
+        ax2.axis(ymin=0, ymax=ymax)
+        ticks = config.get('linear_ticks', 8)
+        ax2.yaxis.set_major_locator(mticker.MultipleLocator(ymax / ticks))
+        ax2.set_ylabel("Daily confirmed cases (linear scale)")
+
+    # Hash of the inputs to the figures, so we can skip re-rendering them if unchanged:
+    digest = figure_manifest.figure_hash(
+        dates, new, doses_per_100, args=list(args), region=region
+    )
+    prefix = config['prefix']
+    if OLD:
+        variants = [(f"{name}_animated/{options['old']:04d}.png", None)]
+        if not SUBREGION:
+            variants.append(
+                (f"{name}_animated_linear/{options['old']:04d}.png", linear_scale)
+            )
+    else:
+        variants = [(f'{prefix}{suffix}.svg', None), (f'{prefix}{suffix}.png', None)]
+        if not SUBREGION:
+            variants += [
+                (f'{prefix}{suffix}_linear.svg', linear_scale),
+                (f'{prefix}{suffix}_linear.png', linear_scale),
+            ]
+    outputs = [filename for filename, _ in variants]
+
+    if OLD or figure_manifest.needs_update(digest, *outputs):
+        figure_variants.save(fig1, variants, dpi=133)
+        if not OLD:
+            figure_manifest.record(digest, *outputs)
+    if not OLD:
+        figure_manifest.report()
+        svgmin.report()
+
+    # Save some deets to a file for the auto reddit posting to use. Only this run's keys
+    # are updated, leaving those from runs with other arguments, which may run
+    # concurrently:
+    stats = {}
+
+    if stats_suffix is not None:
+        stats[f'R_eff{stats_suffix}'] = R[-1]
+        stats[f'u_R_eff{stats_suffix}'] = u_R_latest
+        if not stats_suffix:
+            stats['today'] = str(np.datetime64(datetime.now(), 'D'))
+
+    if VAX:
+        # Case number predictions
+        stats['projection'] = []
+        # in case I ever want to get the orig projection range not expanded - like to
+        # compare past projections:
+        stats['SHOT_NOISE_FACTOR'] = SHOT_NOISE_FACTOR
+        for i, cases in enumerate(new_projection):
+            date = dates[-1] + i
+            lower = new_projection_lower[i]
+            upper = new_projection_upper[i]
+            lower = SHOT_NOISE_FACTOR * (lower - cases) + cases
+            upper = SHOT_NOISE_FACTOR * (upper - cases) + cases
+            stats['projection'].append(
+                {'date': str(date), 'cases': cases, 'upper': upper, 'lower': lower}
+            )
+            if i < 8:
+                print(f"{cases:.0f} {lower:.0f}—{upper:.0f}")
+
+    if not OLD:
+        # Only save data if this isn't a re-run on old data
+        stats_store.update(config['stats_file'], stats)
+
+        # Update the date in the HTML. Other runs of the same jurisdiction do the same,
+        # so hold a lock while we do:
+        html_file = f'{prefix}.html'
+        from pytz import timezone
+
+        zone, zone_label = config['timezone']
+        now = datetime.now(timezone(zone)).strftime('%Y-%m-%d %H:%M')
+        with stats_store.locked(html_file):
+            html_lines = Path(html_file).read_text().splitlines()
+            for i, line in enumerate(html_lines):
+                if 'Last updated' in line:
+                    html_lines[i] = f'    Last updated: {now} {zone_label}'
+            Path(html_file).write_text('\n'.join(html_lines) + '\n')
+
+
+def run_all(names=None, processes=None):
+    """Do every run of the jurisdictions with the given names (default all), each in a
+    forked process, with up to the given number of processes (default one per CPU) at a
+    time. Returns a list of the runs that failed"""
+    jobs = [
+        (name, args)
+        for name in names or JURISDICTIONS
+        for args in JURISDICTIONS[name]['runs']
+    ]
+
+    # Load the data for every run here, so that the forked runs find it already cached.
+    # If loading fails, the run will try again and report the error itself:
+    for name, args in jobs:
+        config = JURISDICTIONS[name]
+        try:
+            load(config, parse_args(config, args))
+        except Exception:
+            pass
+
+    context = multiprocessing.get_context('fork')
+    processes = processes or os.cpu_count()
+    pending = list(jobs)
+    running = {}
+    failed = []
+    while pending or running:
+        while pending and len(running) < processes:
+            name, args = pending.pop(0)
+            process = context.Process(target=run, args=(name, args))
+            process.start()
+            running[process.sentinel] = (process, name, args)
+        for sentinel in multiprocessing.connection.wait(list(running)):
+            process, name, args = running.pop(sentinel)
+            process.join()
+            if process.exitcode != 0:
+                failed.append(' '.join([name, *args]))
+    return failed
+
+
+def main(name, args):
+    """Do one run of the jurisdiction with the given name, for its entry-point script"""
+    run(name, args)
+    plt.show()
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:]
+    unknown = [name for name in names if name not in JURISDICTIONS]
+    if unknown:
+        sys.exit(f"Unknown jurisdictions: {', '.join(unknown)}")
+    failed = run_all(names)
+    if failed:
+        sys.exit("Failed runs:\n" + '\n'.join(failed))
@@ -0,0 +1,60 @@
+# Drawing helpers for the restriction timelines shaded behind the R_eff plots made by
+# reff.py. Each jurisdiction in jurisdictions.py lists its restriction levels as bands,
+# dicts of the start and end dates and the fill_betweenx() arguments to draw it with,
+# and optionally a fade at the end of its lockdown.
+#
+# The fade at the end of a lockdown used to be 30 fill_betweenx patches of decreasing
+# alpha, each of which became its own path and style in the SVG. fade() draws it as a
+# single small image instead, which matplotlib embeds once as a PNG, so the SVG is smaller
+# and quicker to paint. Hatched bands need no special treatment: matplotlib's SVG backend
+# already defines each distinct (hatch, facecolor, edgecolor) as one <pattern> that the
+# band and its legend entry both refer to.
+#
+# Usage:
+#
+#     restrictions.bands(ax1, [dict(start=LOCKDOWN, end=END_LOCKDOWN, color="red")])
+#     restrictions.fade(ax1, END_LOCKDOWN, 10, color="red", alpha=0.45)
+#
+# See benchmarks/restriction_bands.py for the size comparison.
+
+import numpy as np
+import matplotlib.colors as mcolors
+import matplotlib.dates as mdates
+
+# Number of alpha steps in the fade. The image is interpolated when drawn, so this only
+# needs to be enough that the steps aren't visible:
+FADE_STEPS = 30
+
+
+def fade(ax, start, days, color, alpha, zorder=-10):
+    """Shade the full height of ax from the date start for the given number of days, in
+    the given colour with opacity fading linearly from alpha to zero"""
+    rgba = np.zeros((1, FADE_STEPS, 4))
+    rgba[..., :3] = mcolors.to_rgb(color)
+    rgba[..., 3] = alpha * np.linspace(1, 0, FADE_STEPS)
+    x0 = mdates.date2num(start)
+    # The timeline bands span y from -10 to 10 so they cover any y limits of the R_eff
+    # axes; do the same here:
+    return ax.imshow(
+        rgba,
+        extent=(x0, x0 + days, -10, 10),
+        aspect='auto',
+        interpolation='bilinear',
+        zorder=zorder,
+    )
+
+
+def whiten(color, f):
+    """Mix a color with white where f is how much of the original colour to keep"""
+    white = np.array(mcolors.to_rgb("white"))
+    return (1 - f) * white + f * np.array(mcolors.to_rgb(color))
+
+
+def bands(ax, bands):
+    """Shade the full height of ax between the start and end dates of each band. Other
+    keys of each band are passed to fill_betweenx() (color, hatch, label etc)"""
+    for band in bands:
+        kwargs = dict(band)
+        start = kwargs.pop('start')
+        end = kwargs.pop('end')
+        ax.fill_betweenx([-10, 10], [start, start], [end, end], linewidth=0, **kwargs)
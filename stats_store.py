@@ -0,0 +1,66 @@
+# Store for the latest_*_stats.json files the R_eff scripts leave for the posting scripts.
+# Several runs of the same script (e.g. nsw.py and nsw.py concern) each contribute
+# different keys to the same file. Reading the file, changing some keys and writing it
+# back races with other runs doing the same, so instead each run upserts just its own keys
+# with update(), which holds an exclusive lock on the file for the read-modify-write.
+# Files are replaced atomically, so readers never see a partial file and don't need the
+# lock.
+#
+# Usage:
+#
+#     stats_store.update('latest_nsw_stats.json', {'R_eff': R[-1], 'u_R_eff': u_R})
+#     ...
+#     stats = stats_store.load('latest_nsw_stats.json')
+#
+# Locks are taken on files in .cache/locks/ rather than on the JSON files themselves,
+# since those are replaced rather than modified in place. figure_manifest uses update()
+# for its manifests for the same reason.
+
+import os
+import json
+import fcntl
+from contextlib import contextmanager
+from pathlib import Path
+
+LOCK_DIR = Path('.cache', 'locks')
+
+
+@contextmanager
+def locked(filename):
+    """Context manager holding an exclusive lock associated with the given file, for as
+    long as the context is active"""
+    LOCK_DIR.mkdir(parents=True, exist_ok=True)
+    lock_file = LOCK_DIR / (str(filename).replace(os.sep, '_') + '.lock')
+    with open(lock_file, 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def load(filename):
+    """Return the contents of a stats file. Raises FileNotFoundError if it doesn't
+    exist"""
+    return json.loads(Path(filename).read_text())
+
+
+def write(filename, data, **kwargs):
+    """Atomically replace the contents of a JSON file. kwargs are passed to json.dumps()"""
+    # Write to a temporary file and rename, so a reader never sees a partial file:
+    tmp = Path(f'{filename}.{os.getpid()}.tmp')
+    tmp.write_text(json.dumps(data, **kwargs) + '\n')
+    os.replace(tmp, filename)
+
+
+def update(filename, values, indent=4, **kwargs):
+    """Set the given keys in a stats file, leaving other keys as they are, creating the
+    file if it doesn't exist. Safe to call concurrently from multiple processes. kwargs
+    are passed to json.dumps()"""
+    with locked(filename):
+        try:
+            data = load(filename)
+        except FileNotFoundError:
+            data = {}
+        data.update(values)
+        write(filename, data, indent=indent, **kwargs)
@@ -0,0 +1,196 @@
+# Minifier for the SVGs matplotlib writes, replacing the separate scour step. It works on
+# the SVG as text with a couple of regex passes rather than parsing it into a DOM, so is
+# fast enough to run on every figure as it's saved:
+#
+# - whitespace between tags, comments and metadata are removed
+# - coordinates are rounded to PRECISION decimal places
+# - ids that nothing refers to are removed, and the rest shortened
+# - groups left with no attributes are unwrapped
+# - inline styles are replaced with classes, one per distinct style
+#
+# Usage:
+#
+#     svgmin.savefig(fig, 'foo.svg')  # Instead of fig.savefig('foo.svg')
+#     ...
+#     svgmin.report()
+#
+# Or to minify existing files in parallel:
+#
+#     python svgmin.py [--viewboxing] FILE [FILE ...]
+
+import sys
+import io
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Decimal places to keep in coordinates. The units are points, so this is much finer
+# than can be seen:
+PRECISION = 2
+
+# (filename, size before, size after, seconds minifying and writing) for each file:
+stats = []
+
+_JUNK = re.compile(r'<!--.*?-->|<metadata>.*?</metadata>|(?<=>)\s+(?=<)', re.S)
+_TAG = re.compile(r'</g>|<([A-Za-z][\w:.-]*)((?:\s+[\w:.-]+="[^"]*")*)\s*(/?)>')
+_ATTR = re.compile(r'([\w:.-]+)="([^"]*)"')
+_REFERENCE = re.compile(r'url\(#([^)]+)\)|href="#([^"]+)"')
+_URL = re.compile(r'url\(#([^)]+)\)')
+_DECIMAL = re.compile(r'-?\d*\.\d+')
+_TRANSLATE = re.compile(r'translate\(([^)]*)\)')
+_WHITESPACE = re.compile(r'\s+')
+
+_COORDINATE_ATTRS = {'d', 'points', 'x', 'y', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r'}
+
+
+def _round(match):
+    s = f'{float(match.group()):.{PRECISION}f}'.rstrip('0').rstrip('.')
+    return '0' if s == '-0' else s
+
+
+def _short_names():
+    """Generate a, b, ..., z, ba, bb, ..."""
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    i = 0
+    while True:
+        name = ''
+        n = i
+        while True:
+            n, r = divmod(n, 26)
+            name = letters[r] + name
+            if not n:
+                break
+        yield name
+        i += 1
+
+
+def minify(svg, viewboxing=False):
+    """Return a minified copy of the given SVG text. If viewboxing, set the width and
+    height to 100% so the SVG scales to its container, like scour's --enable-viewboxing"""
+    svg = _JUNK.sub('', svg)
+
+    referenced = set()
+    for match in _REFERENCE.finditer(svg):
+        referenced.add(match.group(1) or match.group(2))
+
+    names = _short_names()
+    ids = {}
+    classes = {}
+    # Whether each currently open group was unwrapped:
+    unwrapped_groups = []
+
+    def short_id(name):
+        if name not in ids:
+            ids[name] = next(names)
+        return ids[name]
+
+    def replace_references(value):
+        return _URL.sub(lambda m: f'url(#{short_id(m.group(1))})', value)
+
+    def process_tag(match):
+        if match.group() == '</g>':
+            return '' if unwrapped_groups.pop() else '</g>'
+        tag, attrs, selfclosing = match.groups()
+        out = []
+        has_class = 'class="' in attrs
+        for name, value in _ATTR.findall(attrs):
+            if name == 'id':
+                if value not in referenced:
+                    continue
+                value = short_id(value)
+            elif name == 'style':
+                value = replace_references(value)
+                if not has_class:
+                    if value not in classes:
+                        classes[value] = next(names)
+                    name, value = 'class', classes[value]
+            elif name in _COORDINATE_ATTRS:
+                value = _WHITESPACE.sub(' ', _DECIMAL.sub(_round, value)).strip()
+            elif name == 'transform':
+                value = _TRANSLATE.sub(
+                    lambda m: f'translate({_DECIMAL.sub(_round, m.group(1))})', value
+                )
+            elif name.endswith('href') and value.startswith('#'):
+                value = '#' + short_id(value[1:])
+            elif 'url(#' in value:
+                value = replace_references(value)
+            elif viewboxing and tag == 'svg' and name in ('width', 'height'):
+                value = '100%'
+            out.append(f' {name}="{value}"')
+        if tag == 'g':
+            if not out:
+                if not selfclosing:
+                    unwrapped_groups.append(True)
+                return ''
+            if not selfclosing:
+                unwrapped_groups.append(False)
+        return f'<{tag}{"".join(out)}{selfclosing}>'
+
+    svg = _TAG.sub(process_tag, svg)
+
+    if classes:
+        rules = ''.join(f'.{cls}{{{style}}}' for style, cls in classes.items())
+        end = svg.rindex('</svg>')
+        svg = f'{svg[:end]}<style type="text/css">{rules}</style>{svg[end:]}'
+    return svg
+
+
+def _write(filename, svg, size_before, start_time):
+    # Write to a temporary file and rename, so a reader never sees a partial file:
+    tmp = f'{filename}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(svg)
+    os.replace(tmp, filename)
+    seconds = time.perf_counter() - start_time
+    result = (str(filename), size_before, len(svg.encode()), seconds)
+    stats.append(result)
+    return result
+
+
+def minify_file(filename, viewboxing=False):
+    """Minify an SVG file in place. Returns (filename, size before, size after,
+    seconds)"""
+    start_time = time.perf_counter()
+    with open(filename, encoding='utf-8') as f:
+        svg = f.read()
+    return _write(filename, minify(svg, viewboxing), len(svg.encode()), start_time)
+
+
+def savefig(fig, filename, viewboxing=False, **kwargs):
+    """Like fig.savefig(filename, **kwargs), but minifying SVG output before writing it.
+    fig may also be matplotlib.pyplot, to save the current figure."""
+    if not str(filename).endswith('.svg'):
+        fig.savefig(filename, **kwargs)
+        return
+    buf = io.StringIO()
+    fig.savefig(buf, format='svg', **kwargs)
+    svg = buf.getvalue()
+    start_time = time.perf_counter()
+    _write(filename, minify(svg, viewboxing), len(svg.encode()), start_time)
+
+
+def report(results=None):
+    """Print total sizes before and after minification, and the time taken"""
+    results = stats if results is None else results
+    if not results:
+        return
+    before = sum(r[1] for r in results)
+    after = sum(r[2] for r in results)
+    seconds = sum(r[3] for r in results)
+    print(
+        f"svgmin: {len(results)} SVGs, {before / 1e6:.2f} MB → {after / 1e6:.2f} MB "
+        f"({100 * after / before:.0f}%) in {seconds:.2f}s"
+    )
+
+
+if __name__ == '__main__':
+    viewboxing = '--viewboxing' in sys.argv
+    filenames = [arg for arg in sys.argv[1:] if arg != '--viewboxing']
+    with ProcessPoolExecutor() as executor:
+        results = list(
+            executor.map(minify_file, filenames, [viewboxing] * len(filenames))
+        )
+    for filename, before, after, seconds in results:
+        print(f"{filename}: {before} → {after} bytes in {seconds:.3f}s")
+    report(results)
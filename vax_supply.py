@@ -0,0 +1,235 @@
+# Simulation of Australia's vaccine supply and its allocation to first and second doses,
+# for aus_vax.py's supply figures and projections. Each day, shipments arrive and are
+# split between doses available for first doses and doses reserved for second doses,
+# first doses are given (the actual number for past days, a fraction of what's available
+# for future days), and second doses are scheduled tau_AZ or tau_pfizer days later.
+#
+# Usage:
+#
+#     curves = vax_supply.simulate(all_dates, doses, pfizer_supply=(dates, shipments),
+#                                  ..., daily_usage=1 / 21)
+#     curves['AZ_available'], curves['pfizer_second_doses'], ...
+#
+# To simulate many scenarios at once, pass shipments as (n_scenarios, n_shipments) arrays
+# and/or pfizer_preference, daily_usage and max_eligible as arrays of length n_scenarios,
+# and the curves returned are (n_scenarios, n_days) arrays:
+#
+#     curves = vax_supply.simulate(..., daily_usage=rng.uniform(1 / 28, 1 / 14, 2000))
+#
+# Every change the simulation makes to a curve applies from some day onward, so rather
+# than adding it to the rest of the array each time (quadratic in the number of days),
+# it's recorded as a change on that day, with a running total of each curve's value
+# today, and the curves are the cumulative sums of the changes at the end. Shipments are
+# looked up by day number rather than by searching the arrays of shipment dates. This
+# gives the same curves as the quadratic version up to floating point rounding.
+
+import numpy as np
+
+CURVES = [
+    'first_doses',
+    'AZ_first_doses',
+    'pfizer_first_doses',
+    'AZ_second_doses',
+    'pfizer_second_doses',
+    'AZ_reserved',
+    'pfizer_reserved',
+    'AZ_available',
+    'pfizer_available',
+    'wasted',
+]
+
+
+def _by_day(all_dates, supply):
+    """Array of the shipment arriving on each day of all_dates (zero if none), and a
+    boolean array of which days have one, from (dates, shipments) arrays. If shipments
+    is 2D, the first axis is scenarios, and the array of shipments is (n_days,
+    n_scenarios)"""
+    supply_dates, shipments = supply
+    shipments = np.asarray(shipments)
+    lots = np.zeros((len(all_dates),) + shipments.shape[:-1])
+    delivered = np.zeros(len(all_dates), dtype=bool)
+    days = (supply_dates - all_dates[0]).astype(int)
+    # In reverse, so that the first shipment listed wins if a date appears twice:
+    for k in reversed(range(len(days))):
+        if 0 <= days[k] < len(all_dates):
+            lots[days[k]] = shipments[..., k]
+            delivered[days[k]] = True
+    return lots, delivered
+
+
+def simulate(
+    all_dates,
+    doses,
+    pfizer_supply,
+    AZ_OS_supply,
+    AZ_local_supply,
+    max_AZ_administered,
+    max_eligible,
+    pfizer_wastage,
+    AZ_wastage,
+    tau_pfizer,
+    tau_AZ,
+    pfizer_preference=2,
+    daily_usage=1 / 21,
+):
+    """Simulate vaccine supply and allocation over all_dates, given cumulative first
+    doses for the first len(doses) days, and the Pfizer, overseas AZ and local AZ supply
+    as (dates, shipments) arrays. Past first doses are split between AZ and Pfizer in
+    proportion to what's available of each, weighted by pfizer_preference, and future
+    first doses are daily_usage of each vaccine's available doses, up to max_eligible
+    first doses in total. Returns a dict of the arrays named in CURVES, which are
+    (n_scenarios, n_days) if any of the shipments or parameters have a scenarios axis."""
+    n_days = len(all_dates)
+    n_past = len(doses)
+    # Shape of the scenarios axis, if any:
+    shape = np.broadcast_shapes(
+        np.shape(pfizer_supply[1])[:-1],
+        np.shape(AZ_OS_supply[1])[:-1],
+        np.shape(AZ_local_supply[1])[:-1],
+        np.shape(pfizer_preference),
+        np.shape(daily_usage),
+        np.shape(max_eligible),
+    )
+
+    pfizer_lots, pfizer_delivered = _by_day(all_dates, pfizer_supply)
+    AZ_OS_lots, AZ_OS_delivered = _by_day(all_dates, AZ_OS_supply)
+    AZ_local_lots, AZ_local_delivered = _by_day(all_dates, AZ_local_supply)
+
+    # Values on day zero, plus past first doses, which future days stay at unless
+    # changed:
+    initial = dict.fromkeys(CURVES, 0.0)
+    for name, (supply_dates, shipments) in [
+        ('pfizer_available', pfizer_supply),
+        ('AZ_available', AZ_OS_supply),
+        ('AZ_available', AZ_local_supply),
+    ]:
+        initial[name] += np.asarray(shipments)[..., supply_dates < all_dates[0]].sum(-1)
+    first_doses = np.zeros(n_days, dtype=float)
+    first_doses[:n_past] = doses
+    first_doses[n_past:] = doses[-1]
+    initial['first_doses'] = first_doses.reshape((n_days,) + (1,) * len(shape))
+
+    changes = {name: np.zeros((n_days,) + shape) for name in CURVES}
+    # Running totals of the changes up to and including the current day:
+    total = dict.fromkeys(CURVES, 0.0)
+
+    def change(name, amount, delay=0):
+        """Change a curve by the given amount from delay days after today onward"""
+        if delay == 0:
+            total[name] += amount
+        if i + delay < n_days:
+            changes[name][i + delay] += amount
+
+    def value(name):
+        """A curve's value today, including changes so far today"""
+        if name == 'first_doses':
+            return initial[name][i] + total[name]
+        return initial[name] + total[name]
+
+    AZ_first_doses_today = pfizer_first_doses_today = 0
+    first_doses_yesterday = None
+    for i, date in enumerate(all_dates):
+        # Changes scheduled for today by previous days:
+        for name in CURVES:
+            total[name] += changes[name][i]
+
+        if pfizer_delivered[i]:
+            pfizer_lot = pfizer_lots[i]
+            if date < np.datetime64('2021-06-27'):
+                change('pfizer_available', 0.5 * (1 - pfizer_wastage) * pfizer_lot)
+                change('pfizer_reserved', 0.5 * (1 - pfizer_wastage) * pfizer_lot)
+                change('wasted', pfizer_wastage * pfizer_lot)
+            else:
+                outstanding_pfizer_second_doses = value('pfizer_first_doses') - value(
+                    'pfizer_second_doses'
+                )
+                reserve_allocation = (
+                    0.4 * outstanding_pfizer_second_doses - value('pfizer_reserved')
+                )
+                change(
+                    'pfizer_available',
+                    (1 - pfizer_wastage) * pfizer_lot - reserve_allocation,
+                )
+                change('pfizer_reserved', reserve_allocation)
+                change('wasted', pfizer_wastage * pfizer_lot)
+
+        if AZ_OS_delivered[i]:
+            AZ_lot = AZ_OS_lots[i]
+            change('AZ_available', 0.5 * (1 - AZ_wastage) * AZ_lot)
+            change('AZ_reserved', 0.5 * (1 - AZ_wastage) * AZ_lot)
+            change('wasted', AZ_wastage * AZ_lot)
+        if AZ_local_delivered[i]:
+            AZ_lot = AZ_local_lots[i]
+            if date < np.datetime64('2021-04-11'):
+                change('AZ_available', 0.5 * (1 - AZ_wastage) * AZ_lot)
+                change('AZ_reserved', 0.5 * (1 - AZ_wastage) * AZ_lot)
+            else:
+                outstanding_AZ_second_doses = value('AZ_first_doses') - value(
+                    'AZ_second_doses'
+                )
+                reserve_allocation = (
+                    0.66 * outstanding_AZ_second_doses - value('AZ_reserved')
+                )
+                change('AZ_available', (1 - AZ_wastage) * AZ_lot - reserve_allocation)
+                change('AZ_reserved', reserve_allocation)
+                change('wasted', AZ_wastage * AZ_lot)
+                # Once we're finished our 5M local (plus 350k imported) AZ first doses,
+                # all remaining supply is reserved for 2nd doses:
+                excess = np.maximum(
+                    value('AZ_first_doses') + value('AZ_available') - max_AZ_administered,
+                    0,
+                )
+                change('AZ_available', -excess)
+                change('AZ_reserved', excess)
+
+        if i == 0:
+            first_doses_today = value('first_doses')
+        elif i < n_past:
+            first_doses_today = value('first_doses') - first_doses_yesterday
+        if i < n_past:
+            P = pfizer_preference
+            AZ_available = value('AZ_available')
+            pfizer_available = value('pfizer_available')
+            AZ_frac = AZ_available / (AZ_available + P * pfizer_available)
+            pfizer_frac = P * pfizer_available / (AZ_available + P * pfizer_available)
+
+            AZ_first_doses_today = AZ_frac * first_doses_today
+            pfizer_first_doses_today = pfizer_frac * first_doses_today
+        else:
+            # This is the assumption for projecting based on expected supply. That we
+            # use 5% of available doses each day on first doses. Since a dose will be
+            # reserved as well, this means we're always 10 days away from running out of
+            # vaccine at the current rate - which is approximately what we see in the
+            # data.
+            AZ_first_doses_today = daily_usage * value('AZ_available')
+            pfizer_first_doses_today = daily_usage * value('pfizer_available')
+
+            first_doses_today = AZ_first_doses_today + pfizer_first_doses_today
+            total_first_doses = value('AZ_first_doses') + value('pfizer_first_doses')
+            first_doses_today = np.maximum(
+                0, np.minimum(max_eligible - total_first_doses, first_doses_today)
+            )
+            pfizer_first_doses_today = first_doses_today - AZ_first_doses_today
+            change('first_doses', first_doses_today)
+
+        change('AZ_first_doses', AZ_first_doses_today)
+        change('pfizer_first_doses', pfizer_first_doses_today)
+
+        change('AZ_available', -AZ_first_doses_today)
+        change('pfizer_available', -pfizer_first_doses_today)
+
+        change('AZ_reserved', -AZ_first_doses_today, delay=tau_AZ)
+        change('pfizer_reserved', -pfizer_first_doses_today, delay=tau_pfizer)
+
+        change('first_doses', -AZ_first_doses_today, delay=tau_AZ)
+        change('first_doses', -pfizer_first_doses_today, delay=tau_pfizer)
+
+        change('AZ_second_doses', AZ_first_doses_today, delay=tau_AZ)
+        change('pfizer_second_doses', pfizer_first_doses_today, delay=tau_pfizer)
+
+        first_doses_yesterday = value('first_doses')
+
+    return {
+        name: np.moveaxis(initial[name] + changes[name].cumsum(axis=0), 0, -1)
+        for name in CURVES
+    }
@@ -1,7 +1,12 @@
 #! /bin/bash
 set -e
 export MPLBACKEND=Agg
-python vic-2021.py
-# python vic-2021.py noniso
-python vic-2021.py vax
-python vic_vax.py
+
+# Keep numpy, scipy, matplotlib etc imported between runs, see worker.py:
+python worker.py start
+trap 'python worker.py stop' EXIT
+
+# Both runs, in parallel and sharing downloaded data. See reff.py:
+python worker.py run reff.py vic-2021
+# python worker.py run vic-2021.py noniso
+python worker.py run vic_vax.py
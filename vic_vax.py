@@ -5,6 +5,8 @@ import matplotlib.units as munits
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 
+import svgmin
+
 converter = mdates.ConciseDateConverter()
 
 munits.registry[np.datetime64] = converter
@@ -113,6 +115,6 @@ plt.title(f"{STATE} cumulative vaccinations per capita")
 
 plt.tight_layout()
 
-plt.savefig("COVID_VIC_projected_doses.svg")
+svgmin.savefig(plt, "COVID_VIC_projected_doses.svg")
 plt.savefig("COVID_VIC_projected_doses.png", dpi=133)
 plt.show()
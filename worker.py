@@ -0,0 +1,250 @@
+# A long-lived worker process that keeps numpy, scipy, pandas and matplotlib imported,
+# and runs scripts in forked copies of itself, so that running e.g. nsw.py a dozen times
+# in a row doesn't pay the import cost a dozen times.
+#
+# Usage:
+#
+#     python worker.py start                      # Start in the background
+#     python worker.py run nsw.py vax             # Like `python nsw.py vax`
+#     python worker.py stop
+#
+# `python worker.py serve` runs the worker in the foreground instead.
+#
+# Jobs are sent over a Unix socket in .cache/, so each checkout of the repo has its own
+# worker. Each job runs in a child forked from the worker, in the client's working
+# directory and environment, and with the client's stdin, stdout and stderr (the file
+# descriptors are passed over the socket), so output can be piped as usual. The job's
+# exit status is passed back to the client and becomes its exit status. Only third-party
+# modules are imported ahead of time; the repo's own modules are imported fresh by each
+# job, so edits to them take effect without restarting the worker. If no worker is
+# running, `run` just runs the script with python as normal.
+#
+# The worker exits by itself after IDLE_TIMEOUT seconds without any jobs.
+
+import sys
+import os
+import json
+import time
+import signal
+import socket
+import traceback
+from pathlib import Path
+from multiprocessing.reduction import sendfds, recvfds
+
+SOCKET_FILE = Path(__file__).resolve().parent / '.cache' / 'worker.sock'
+IDLE_TIMEOUT = 30 * 60
+
+PRELOAD = [
+    'numpy',
+    'scipy.optimize',
+    'scipy.signal',
+    'scipy.stats',
+    'pandas',
+    'matplotlib',
+    'matplotlib.pyplot',
+    'matplotlib.dates',
+    'matplotlib.units',
+    'matplotlib.ticker',
+    'matplotlib.colors',
+    'pytz',
+    'requests',
+]
+
+
+def _send(conn, message):
+    conn.sendall(json.dumps(message).encode() + b'\n')
+
+
+def _recv(conn):
+    """Read one newline-terminated JSON message, or None on EOF"""
+    data = b''
+    while not data.endswith(b'\n'):
+        chunk = conn.recv(1)
+        if not chunk:
+            return None
+        data += chunk
+    return json.loads(data)
+
+
+def preload():
+    for name in PRELOAD:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+
+
+def _run_job(conn, request, fds):
+    """Run in the forked child: become the requested script and report its exit status"""
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    os.chdir(request['cwd'])
+    os.environ.clear()
+    os.environ.update(request['env'])
+    script, *args = request['argv']
+    sys.argv = [script, *args]
+    sys.path[0] = os.path.dirname(os.path.abspath(script))
+    _send(conn, {'pid': os.getpid()})
+    try:
+        import runpy
+
+        if not os.path.exists(script):
+            print(f"python: can't open file {script!r}", file=sys.stderr)
+            status = 2
+        else:
+            runpy.run_path(script, run_name='__main__')
+            status = 0
+    except SystemExit as e:
+        if e.code is None:
+            status = 0
+        elif isinstance(e.code, int):
+            status = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            status = 1
+    except BaseException as e:
+        # Omit our own and runpy's frames from the traceback, as python would:
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != script:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb or e.__traceback__)
+        status = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    _send(conn, {'status': status})
+    os._exit(status)
+
+
+def serve():
+    preload()
+    SOCKET_FILE.parent.mkdir(exist_ok=True)
+    if SOCKET_FILE.exists():
+        SOCKET_FILE.unlink()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(SOCKET_FILE))
+    server.listen()
+    server.settimeout(1)
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+    jobs = set()
+    last_active = time.monotonic()
+    try:
+        while True:
+            # Reap finished jobs:
+            for pid in list(jobs):
+                if os.waitpid(pid, os.WNOHANG)[0]:
+                    jobs.remove(pid)
+            if jobs:
+                last_active = time.monotonic()
+            elif time.monotonic() - last_active > IDLE_TIMEOUT:
+                break
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            conn.settimeout(None)
+            with conn:
+                request = _recv(conn)
+                if request is None:
+                    continue
+                if request.get('stop'):
+                    break
+                fds = recvfds(conn, 3)
+                pid = os.fork()
+                if pid == 0:
+                    # Never return into the worker's loop from the child:
+                    try:
+                        server.close()
+                        _run_job(conn, request, fds)
+                    finally:
+                        os._exit(1)
+                for fd in fds:
+                    os.close(fd)
+                jobs.add(pid)
+            last_active = time.monotonic()
+    finally:
+        server.close()
+        SOCKET_FILE.unlink()
+
+
+def _connect():
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(str(SOCKET_FILE))
+    except (FileNotFoundError, ConnectionRefusedError):
+        conn.close()
+        return None
+    return conn
+
+
+def start():
+    """Start a worker in the background unless one is already running, and wait until it
+    is accepting jobs"""
+    conn = _connect()
+    if conn is not None:
+        conn.close()
+        return
+    pid = os.fork()
+    if pid == 0:
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        try:
+            serve()
+        finally:
+            os._exit(0)
+    while (conn := _connect()) is None:
+        if os.waitpid(pid, os.WNOHANG)[0]:
+            sys.exit("worker: failed to start")
+        time.sleep(0.05)
+    conn.close()
+
+
+def stop():
+    conn = _connect()
+    if conn is not None:
+        with conn:
+            _send(conn, {'stop': True})
+
+
+def run(argv):
+    """Run a script in the worker and return its exit status, or if there's no worker,
+    replace this process with `python script args...`"""
+    conn = _connect()
+    if conn is None:
+        os.execv(sys.executable, [sys.executable, *argv])
+    with conn:
+        _send(conn, {'argv': argv, 'cwd': os.getcwd(), 'env': dict(os.environ)})
+        sendfds(conn, [0, 1, 2])
+        message = _recv(conn)
+        if message is None:
+            print("worker: job failed to start", file=sys.stderr)
+            return 1
+        pid = message['pid']
+
+        # The job isn't in our process group, so pass on signals meant for us:
+        def forward(signum, frame):
+            os.kill(pid, signum)
+
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+            signal.signal(signum, forward)
+        message = _recv(conn)
+        if message is None:
+            print("worker: job exited without reporting a status", file=sys.stderr)
+            return 1
+        return message['status']
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['serve']:
+        serve()
+    elif sys.argv[1:2] == ['start']:
+        start()
+    elif sys.argv[1:2] == ['stop']:
+        stop()
+    elif sys.argv[1:2] == ['run'] and sys.argv[2:]:
+        sys.exit(run(sys.argv[2:]))
+    else:
+        sys.exit(f"usage: {sys.argv[0]} serve | start | stop | run SCRIPT [ARGS...]")